@@ -0,0 +1,258 @@
+# acelerado.py
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+from config import G
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Backend compilado (Numba) opcional para os lacos mais quentes:
+#   - soma movel + maxima anual (idf.calculate_annual_maxima e
+#     regional.matriz_maximas), em uma unica passada com soma compensada;
+#   - bissecoes das secoes trapezoidais (manning.y_normal, y_critico,
+#     b_para_Q e as versoes vetoriais), com a mesma regra de parada de
+#     bissecao e bissecao_vetorial.
+# Os nucleos sao funcoes Python comuns sobre arrays; com o Numba instalado
+# sao compilados com njit, senao as funcoes originais (NumPy/pandas) seguem
+# sendo usadas. A escolha e automatica; PLUVIAH_ACELERADO=0 ou
+# definir_backend("numpy") forcam o caminho original.
+
+NUMBA = "numba"
+NUMPY = "numpy"
+
+_BACKEND = NUMBA if numba is not None and os.environ.get("PLUVIAH_ACELERADO", "1") != "0" else NUMPY
+
+
+def disponivel():
+    """True se o Numba esta instalado."""
+    return numba is not None
+
+def backend():
+    return _BACKEND
+
+def ativo():
+    """True quando os nucleos compilados devem ser usados."""
+    return _BACKEND == NUMBA
+
+def definir_backend(nome):
+    """'numba', 'numpy' (forca o caminho original) ou 'auto'."""
+    global _BACKEND
+    if nome == "auto":
+        nome = NUMBA if numba is not None else NUMPY
+    if nome not in (NUMBA, NUMPY):
+        raise ValueError(f"Backend '{nome}' invalido.")
+    if nome == NUMBA and numba is None:
+        raise ImportError("O backend 'numba' requer o pacote numba.")
+    _BACKEND = nome
+
+def _compilar(funcao):
+    if numba is None:
+        return funcao
+    return numba.njit(cache=True, nogil=True, error_model="numpy")(funcao)
+
+
+# --- Soma movel e maxima anual ---
+
+def _maximas_por_grupo(valores, serie, ano, janela):
+    """
+    Soma movel de `janela` registros (min_periods=1, NaN ignorados) reiniciada
+    a cada serie, e maxima por (serie, ano). Os registros devem estar
+    ordenados por serie e tempo. Retorna serie, ano e maxima de cada grupo.
+    """
+    n = len(valores)
+    out_serie = np.empty(n, dtype=np.int64)
+    out_ano = np.empty(n, dtype=np.int64)
+    out_max = np.empty(n, dtype=np.float64)
+    k = -1
+    soma = 0.0
+    comp = 0.0
+    validos = 0
+    inicio = 0
+    for i in range(n):
+        if i == 0 or serie[i] != serie[i - 1]:
+            soma = 0.0
+            comp = 0.0
+            validos = 0
+            inicio = i
+        if i == 0 or serie[i] != serie[i - 1] or ano[i] != ano[i - 1]:
+            k += 1
+            out_serie[k] = serie[i]
+            out_ano[k] = ano[i]
+            out_max[k] = np.nan
+        # Remove o registro que saiu da janela (soma compensada de Kahan)
+        j = i - janela
+        if j >= inicio:
+            antigo = valores[j]
+            if antigo == antigo:
+                y = -antigo - comp
+                t = soma + y
+                comp = (t - soma) - y
+                soma = t
+                validos -= 1
+        x = valores[i]
+        if x == x:
+            y = x - comp
+            t = soma + y
+            comp = (t - soma) - y
+            soma = t
+            validos += 1
+        if validos == 0:
+            soma = 0.0
+            comp = 0.0
+        elif not out_max[k] >= soma:
+            out_max[k] = soma
+    return out_serie[:k + 1], out_ano[:k + 1], out_max[:k + 1]
+
+_maximas_por_grupo = _compilar(_maximas_por_grupo)
+
+def maximas_anuais(df, duracao):
+    """Mesmo resultado de idf.calculate_annual_maxima (indice datahora ordenado)."""
+    anos = df.index.year
+    valores = df["precipitacao"].to_numpy(dtype=np.float64)
+    _, ano, maxima = _maximas_por_grupo(valores, np.zeros(len(valores), dtype=np.int64),
+                                        anos.to_numpy(dtype=np.int64), int(duracao))
+    serie = pd.Series(maxima, index=pd.Index(ano.astype(anos.dtype), name=anos.name), name="precipitacao")
+    return serie.dropna()
+
+def matriz_maximas(station_id, datahora, precipitacao, duracao):
+    """Maximas (station_id, ano) de uma tabela longa ja ordenada, como Series com MultiIndex."""
+    codigos, estacoes = pd.factorize(station_id, sort=False)
+    anos = pd.DatetimeIndex(datahora).year
+    serie, ano, maxima = _maximas_por_grupo(np.asarray(precipitacao, dtype=np.float64), codigos.astype(np.int64),
+                                            anos.to_numpy(dtype=np.int64), int(duracao))
+    indice = pd.MultiIndex.from_arrays([estacoes[serie], ano.astype(anos.dtype)], names=["station_id", "ano"])
+    return pd.Series(maxima, index=indice, name="valor")
+
+
+# --- Bissecoes em secoes trapezoidais ---
+
+NORMAL, CRITICA, LARGURA = 0, 1, 2
+
+def _residuo_escalar(tipo, x, Qd, b, z, S, n):
+    # Mesmas expressoes de geom_trapezio, manning_Q e froude (manning.py)
+    if tipo == LARGURA:
+        b, y = x, b
+    else:
+        y = x
+    if y <= 0:
+        A = 0.0
+        P = max(b, 0.0)
+        T = max(b, 0.0)
+    else:
+        A = y * (b + z * y)
+        P = b + 2.0 * y * (1.0 + z**2) ** 0.5
+        T = b + 2.0 * z * y
+    if tipo == CRITICA:
+        if A <= 0 or T <= 0:
+            return np.nan
+        denom = (G * (A / T)) ** 0.5
+        return (Qd / A) / denom - 1.0 if denom > 0 else np.inf
+    if P <= 0 or S <= 0 or n <= 0:
+        return -Qd
+    return (1.0 / n) * A * ((A / P) ** (2.0 / 3.0)) * (S ** 0.5) - Qd
+
+def _residuo_vetor(tipo, y, Qd, b, z, S, n):
+    # Mesmas expressoes de geom_trapezio_vetor, manning_Q_vetor e y_critico_vetor
+    y = max(y, 0.0)
+    A = y * (b + z * y)
+    P = b + 2.0 * y * (1.0 + z**2) ** 0.5
+    T = b + 2.0 * z * y
+    if tipo == CRITICA:
+        return Qd / A / math.sqrt(G * A / T) - 1.0
+    if P > 0 and A > 0:
+        return (1.0 / n) * A * (A / P) ** (2.0 / 3.0) * math.sqrt(S) - Qd
+    return -Qd
+
+def _bissecoes_escalares(tipo, Qd, b, z, S, n, a0, b0, tol, maxit):
+    """Regra de manning.bissecao aplicada a cada elemento (NaN = sem raiz)."""
+    saida = np.empty(len(Qd))
+    for k in range(len(Qd)):
+        fa = _residuo_escalar(tipo, a0, Qd[k], b[k], z[k], S[k], n[k])
+        fb = _residuo_escalar(tipo, b0, Qd[k], b[k], z[k], S[k], n[k])
+        if fa * fb > 0:
+            saida[k] = np.nan
+            continue
+        esq, dir_ = a0, b0
+        raiz = np.nan
+        for _ in range(maxit):
+            m = 0.5 * (esq + dir_)
+            fm = _residuo_escalar(tipo, m, Qd[k], b[k], z[k], S[k], n[k])
+            if abs(fm) < tol or (dir_ - esq) < tol:
+                raiz = max(m, 0.0)
+                break
+            if fa * fm < 0:
+                dir_ = m
+            else:
+                esq, fa = m, fm
+        if raiz != raiz:
+            raiz = max(0.5 * (esq + dir_), 0.0)
+        saida[k] = raiz
+    return saida
+
+def _bissecoes_vetoriais(tipo, Qd, b, z, S, n, a0, b0, tol, maxit):
+    """Regra de manning.bissecao_vetorial aplicada a cada elemento."""
+    saida = np.empty(len(Qd))
+    for k in range(len(Qd)):
+        esq, dir_ = a0, b0
+        fa = _residuo_vetor(tipo, esq, Qd[k], b[k], z[k], S[k], n[k])
+        fb = _residuo_vetor(tipo, dir_, Qd[k], b[k], z[k], S[k], n[k])
+        if not fa * fb <= 0:
+            saida[k] = np.nan
+            continue
+        for _ in range(maxit):
+            m = 0.5 * (esq + dir_)
+            fm = _residuo_vetor(tipo, m, Qd[k], b[k], z[k], S[k], n[k])
+            if fa * fm <= 0:
+                dir_ = m
+            else:
+                esq, fa = m, fm
+            if dir_ - esq < tol:
+                break
+        saida[k] = max(0.5 * (esq + dir_), 0.0)
+    return saida
+
+_residuo_escalar = _compilar(_residuo_escalar)
+_residuo_vetor = _compilar(_residuo_vetor)
+_bissecoes_escalares = _compilar(_bissecoes_escalares)
+_bissecoes_vetoriais = _compilar(_bissecoes_vetoriais)
+
+def _arrays(*valores):
+    return [np.ascontiguousarray(v, dtype=np.float64).ravel()
+            for v in np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in valores))]
+
+def _escalar(tipo, Qd, p1, p2, p3, p4, a, b, tol=1e-6, maxit=100):
+    with np.errstate(all='ignore'):
+        r = _bissecoes_escalares(tipo, *_arrays(Qd, p1, p2, p3, p4), float(a), float(b), tol, maxit)[0]
+    return None if np.isnan(r) else float(r)
+
+def y_normal(Qd, b, z, S, n, y_min=1e-4, y_max=50.0):
+    """Mesmo resultado de manning.y_normal (float ou None)."""
+    return _escalar(NORMAL, Qd, b, z, S, n, y_min, y_max)
+
+def y_critico(Qd, b, z, y_min=1e-4, y_max=50.0):
+    """Mesmo resultado de manning.y_critico (float ou None)."""
+    return _escalar(CRITICA, Qd, b, z, 0.0, 0.0, y_min, y_max)
+
+def b_para_Q(Qd, z, y, S, n, b_min=0.01, b_max=50.0):
+    """Mesmo resultado de manning.b_para_Q (float ou None)."""
+    return _escalar(LARGURA, Qd, y, z, S, n, b_min, b_max)
+
+def _vetor(tipo, Qd, b, z, S, n, y_min, y_max, tol=1e-6, maxit=100):
+    Qd, b, z, S, n = np.broadcast_arrays(*(np.asarray(v, dtype=np.float64) for v in (Qd, b, z, S, n)))
+    with np.errstate(all='ignore'):
+        y = _bissecoes_vetoriais(tipo, *_arrays(Qd, b, z, S, n), float(y_min), float(y_max), tol, maxit)
+    return y.reshape(Qd.shape)
+
+def y_normal_vetor(Qd, b, z, S, n, y_min=1e-4, y_max=50.0):
+    """Mesmo resultado de manning.y_normal_vetor."""
+    return _vetor(NORMAL, Qd, b, z, S, n, y_min, y_max)
+
+def y_critico_vetor(Qd, b, z, y_min=1e-4, y_max=50.0):
+    """Mesmo resultado de manning.y_critico_vetor."""
+    return _vetor(CRITICA, Qd, b, z, 0.0, 1.0, y_min, y_max)
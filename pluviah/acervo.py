@@ -0,0 +1,145 @@
+# acervo.py
+
+import numpy as np
+import pandas as pd
+from idf import calculate_annual_maxima, calculate_idf_curves
+from diagnostico import etapa, medido, contar_linhas
+
+# Leitura de acervos Parquet com varias estacoes (station_id, datahora,
+# precipitacao), particionados por station_id como em gerador.salvar_parquet.
+# O acervo e aberto sem ler dados; os filtros de estacao e de ano sao
+# repassados ao pyarrow, que descarta particoes inteiras pelo station_id e
+# grupos de linhas pelas estatisticas de datahora gravadas no arquivo.
+# Cada estacao e entregue no formato de load_data, pronta para idf.py.
+#
+# Requer pyarrow (importado somente quando um acervo e aberto).
+
+
+def _dataset():
+    try:
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("A leitura de acervos Parquet requer o pacote pyarrow.") from e
+    return ds
+
+
+class AcervoParquet:
+    """Acervo Parquet multi-estacao aberto de forma preguicosa (nenhum dado e lido na abertura)."""
+
+    def __init__(self, caminho, coluna_estacao="station_id", coluna_tempo="datahora", coluna_valor="precipitacao"):
+        self._ds = _dataset()
+        self.caminho = caminho
+        self.coluna_estacao = coluna_estacao
+        self.coluna_tempo = coluna_tempo
+        self.coluna_valor = coluna_valor
+        self.dataset = self._ds.dataset(caminho, format="parquet", partitioning="hive")
+        faltando = {coluna_estacao, coluna_tempo, coluna_valor} - set(self.dataset.schema.names)
+        if faltando:
+            raise ValueError(f"Colunas ausentes no acervo: {sorted(faltando)}")
+
+    def estacoes(self):
+        """Identificadores das estacoes, obtidos dos nomes das particoes (sem ler dados)."""
+        ids = set()
+        for fragmento in self.dataset.get_fragments():
+            chaves = self._ds.get_partition_keys(fragmento.partition_expression)
+            if self.coluna_estacao not in chaves:
+                # Acervo sem particionamento por estacao: le apenas essa coluna
+                coluna = self.dataset.to_table(columns=[self.coluna_estacao]).column(0)
+                return sorted(pd.unique(coluna.to_numpy()).tolist())
+            ids.add(chaves[self.coluna_estacao])
+        return sorted(ids)
+
+    def _expressoes(self, estacoes, anos):
+        ds = self._ds
+        por_estacao = por_ano = None
+        if estacoes is not None:
+            por_estacao = ds.field(self.coluna_estacao).isin(list(np.atleast_1d(estacoes).tolist()))
+        if anos is not None:
+            if isinstance(anos, tuple) and len(anos) == 2:
+                intervalos = [(anos[0], anos[1])]
+            else:
+                intervalos = [(a, a) for a in sorted(set(np.atleast_1d(anos).tolist()))]
+            tempo = ds.field(self.coluna_tempo)
+            for inicio, fim in intervalos:
+                trecho = (tempo >= pd.Timestamp(int(inicio), 1, 1)) & (tempo < pd.Timestamp(int(fim) + 1, 1, 1))
+                por_ano = trecho if por_ano is None else por_ano | trecho
+        return por_estacao, por_ano
+
+    def filtro(self, estacoes=None, anos=None):
+        """
+        Expressao pyarrow para estacoes (id ou lista) e anos (ano, lista ou
+        intervalo (inicio, fim) inclusivo). None = sem restricao.
+        """
+        return _combinar(*self._expressoes(estacoes, anos))
+
+    def plano_leitura(self, estacoes=None, anos=None):
+        """Arquivos e grupos de linhas que uma leitura com esses filtros vai abrir."""
+        por_estacao, por_ano = self._expressoes(estacoes, anos)
+        linhas = []
+        for fragmento in self.dataset.get_fragments(filter=_combinar(por_estacao, por_ano)):
+            # O filtro por grupo so pode usar colunas gravadas no arquivo (nao as da particao)
+            no_arquivo = self.coluna_estacao in fragmento.physical_schema.names
+            expressao = _combinar(por_estacao, por_ano) if no_arquivo else por_ano
+            partes = fragmento.split_by_row_group(filter=expressao) if expressao is not None \
+                else fragmento.split_by_row_group()
+            for parte in partes:
+                for grupo in parte.row_groups:
+                    linhas.append({"arquivo": fragmento.path, "grupo": grupo.id, "linhas": grupo.num_rows})
+        return pd.DataFrame(linhas, columns=["arquivo", "grupo", "linhas"])
+
+    @medido("acervo.ler")
+    def ler(self, estacoes=None, anos=None):
+        """Tabela longa (station_id, datahora, precipitacao) ordenada por estacao e tempo."""
+        colunas = [self.coluna_estacao, self.coluna_tempo, self.coluna_valor]
+        with etapa("acervo.leitura_parquet"):
+            tabela = self.dataset.to_table(columns=colunas, filter=self.filtro(estacoes, anos))
+        contar_linhas("acervo.ler", tabela.num_rows)
+        df = tabela.to_pandas()
+        df = df.rename(columns={self.coluna_estacao: "station_id", self.coluna_tempo: "datahora",
+                                self.coluna_valor: "precipitacao"})
+        df = df.dropna(subset=["datahora", "precipitacao"])
+        return df.sort_values(["station_id", "datahora"], kind="stable").reset_index(drop=True)
+
+    def serie(self, estacao, anos=None):
+        """Serie de uma estacao no formato de load_data (indice datahora, coluna precipitacao)."""
+        df = self.ler([estacao], anos)
+        return _formato_load_data(df)
+
+    def iterar_series(self, estacoes=None, anos=None, estacoes_por_leitura=50):
+        """
+        Gera (station_id, serie) para as estacoes pedidas (todas se None),
+        lendo `estacoes_por_leitura` estacoes de cada vez para limitar a memoria.
+        """
+        estacoes = self.estacoes() if estacoes is None else list(np.atleast_1d(estacoes).tolist())
+        for primeira in range(0, len(estacoes), estacoes_por_leitura):
+            bloco = self.ler(estacoes[primeira:primeira + estacoes_por_leitura], anos)
+            for estacao, grupo in bloco.groupby("station_id", sort=True):
+                yield estacao, _formato_load_data(grupo)
+
+    def maximas_anuais(self, duracoes, estacoes=None, anos=None, estacoes_por_leitura=50):
+        """
+        Maximas anuais por estacao (calculate_annual_maxima), no formato
+        {duracao: DataFrame estacoes x anos} usado por regional.analise_regional.
+        """
+        resultado = {d: {} for d in duracoes}
+        for estacao, serie in self.iterar_series(estacoes, anos, estacoes_por_leitura):
+            for duracao in duracoes:
+                resultado[duracao][estacao] = calculate_annual_maxima(serie, duracao)
+        return {d: pd.DataFrame(m).T.rename_axis(index="station_id", columns="ano").sort_index(axis=1)
+                for d, m in resultado.items()}
+
+    def curvas_idf(self, duracao, trs, estacoes=None, anos=None, estacoes_por_leitura=50):
+        """Resultado de calculate_idf_curves para cada estacao: {station_id: (df_idf, ...)}."""
+        trs = np.asarray(trs)
+        return {estacao: calculate_idf_curves(calculate_annual_maxima(serie, duracao), duracao, trs)
+                for estacao, serie in self.iterar_series(estacoes, anos, estacoes_por_leitura)}
+
+
+def _combinar(a, b):
+    if a is None:
+        return b
+    return a if b is None else a & b
+
+def _formato_load_data(df):
+    return pd.DataFrame({"precipitacao": df["precipitacao"].to_numpy()},
+                        index=pd.DatetimeIndex(df["datahora"].to_numpy(), name="datahora"))
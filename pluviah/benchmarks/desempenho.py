@@ -0,0 +1,224 @@
+# benchmarks/desempenho.py
+"""
+Suite de desempenho do PLUVIAH.
+
+Mede tempo de execucao e pico de memoria das funcoes centrais com dados
+sinteticos em escalas realistas (1 a 100 anos de dados horarios e 10 a 10^5
+secoes hidraulicas), grava os resultados em um baseline JSON e falha quando
+alguma medicao piora acima de um limite configuravel.
+
+Uso (a partir da pasta pluviah/):
+    python -m benchmarks.desempenho --salvar benchmarks/baseline.json
+    python -m benchmarks.desempenho --baseline benchmarks/baseline.json --limite 0.25
+"""
+
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from data_handler import load_data
+from gerador import gerar_serie
+from idf import calculate_annual_maxima, calculate_idf_curves, calcular_chuva_projeto
+from manning import dimensionar_conduto_circular, y_normal, y_critico, CurvaChave
+from relatorio import gerar_pdf_bytes
+
+ANOS = [1, 10, 50, 100]
+SECOES = [10, 100, 1000, 10000, 100000]
+ANOS_RAPIDO = [1, 10]
+SECOES_RAPIDO = [10, 100, 1000]
+TRS = np.array([2, 5, 10, 25, 50, 100])
+CASOS_SERIE = ("load_data", "calculate_annual_maxima", "calculate_idf_curves", "calcular_chuva_projeto",
+               "gerar_pdf_bytes")
+CASOS_SECOES = ("y_normal", "y_critico", "dimensionar_conduto_circular", "CurvaChave.profundidade")
+
+
+# --- Dados Sinteticos ---
+
+def serie_sintetica(anos, semente=42):
+    """Gera uma serie horaria sintetica de precipitacao no formato de load_data."""
+    return gerar_serie(anos, inicio="1950-01-01", semente=semente)
+
+def csv_sintetico(df):
+    """Converte a serie para o CSV aceito por load_data (em memoria)."""
+    buffer = io.StringIO()
+    df.round(2).to_csv(buffer)
+    buffer.seek(0)
+    return buffer.getvalue()
+
+def secoes_sinteticas(n_secoes, semente=42):
+    """Gera vazoes e geometrias trapezoidais sinteticas."""
+    rng = np.random.default_rng(semente)
+    return {
+        "Q": rng.uniform(0.05, 20.0, n_secoes),
+        "b": rng.uniform(0.5, 5.0, n_secoes),
+        "z": rng.uniform(0.0, 2.0, n_secoes),
+        "S": rng.uniform(0.0005, 0.02, n_secoes),
+        "n": rng.uniform(0.011, 0.035, n_secoes),
+    }
+
+
+# --- Casos de Medicao ---
+
+def _nomes_serie(anos):
+    return [f"{caso}[{anos}a]" for caso in CASOS_SERIE]
+
+def _nomes_secoes(n_secoes):
+    return [f"{caso}[{n_secoes}s]" for caso in CASOS_SECOES]
+
+def _casos_serie(anos):
+    df = serie_sintetica(anos)
+    texto_csv = csv_sintetico(df)
+    maximas = calculate_annual_maxima(df, 24)
+    if len(maximas) < 5:
+        maximas = pd.Series(np.random.default_rng(0).gumbel(60, 15, 30))
+    resultado = calculate_idf_curves(maximas, 24, TRS)
+    gumbel_params, lp3_params = resultado[4], resultado[5]
+    dados_relatorio = {
+        "idf": {"df_idf": resultado[0], "duracao": 24,
+                "params_gumbel": resultado[1], "params_lp3": resultado[2]},
+        "chuva_projeto": {"intensidade": 12.3, "chuva_total": 45.6},
+        "tc": {"tc_min": 23.4},
+        "vazao": {"q_projeto": 1.2, "C": 0.6, "A": 5.0},
+    }
+
+    def chuva_projeto_lote():
+        for tr in range(2, 102):
+            calcular_chuva_projeto(tr, "Gumbel", gumbel_params, lp3_params)
+            calcular_chuva_projeto(tr, "Log-Pearson III", gumbel_params, lp3_params)
+
+    return dict(zip(_nomes_serie(anos), [
+        lambda: load_data(io.StringIO(texto_csv)),
+        lambda: [calculate_annual_maxima(df, d) for d in (1, 2, 3, 6, 12, 24)],
+        lambda: calculate_idf_curves(maximas, 24, TRS),
+        chuva_projeto_lote,
+        lambda: gerar_pdf_bytes.__wrapped__(dados_relatorio),
+    ]))
+
+def _casos_secoes(n_secoes):
+    s = secoes_sinteticas(n_secoes)
+    curva = CurvaChave(2.0, 1.5, 0.001, 0.015)
+    vazoes_curva = np.clip(s["Q"], curva.Q_min, curva.Q_max)
+
+    def y_normal_lote():
+        for Q, b, z, S, n in zip(s["Q"], s["b"], s["z"], s["S"], s["n"]):
+            y_normal(Q, b, z, S, n)
+
+    def y_critico_lote():
+        for Q, b, z in zip(s["Q"], s["b"], s["z"]):
+            y_critico(Q, b, z)
+
+    def conduto_lote():
+        for Q, S, n in zip(s["Q"], s["S"], s["n"]):
+            dimensionar_conduto_circular(Q, n, S, 0.05, 3.0, 0.01)
+
+    return dict(zip(_nomes_secoes(n_secoes), [
+        y_normal_lote,
+        y_critico_lote,
+        conduto_lote,
+        lambda: curva.profundidade(vazoes_curva),
+    ]))
+
+
+# --- Execucao e Comparacao ---
+
+def medir(funcao, repeticoes=3):
+    """Retorna o menor tempo (s) entre as repeticoes e o pico de memoria (MiB) de uma execucao."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"tempo_s": min(tempos), "pico_mib": pico / 2**20}
+
+def executar(anos=ANOS, secoes=SECOES, repeticoes=3, filtro=None, saida=sys.stdout):
+    """
+    Executa os casos cujo nome contem `filtro` (todos se None) e retorna um
+    dicionario nome -> medicoes. Os dados sinteticos de cada escala so sao
+    gerados se algum caso dela passar pelo filtro.
+    """
+    resultados = {}
+    grupos = [(_nomes_serie(a), _casos_serie, a) for a in anos]
+    grupos += [(_nomes_secoes(s), _casos_secoes, s) for s in secoes]
+
+    for nomes, construir, escala in grupos:
+        selecionados = [nome for nome in nomes if not filtro or filtro in nome]
+        if not selecionados:
+            continue
+        casos = construir(escala)
+        for nome in selecionados:
+            # Casos muito longos sao medidos uma unica vez
+            rep = 1 if ("100000s" in nome or "100a" in nome) else repeticoes
+            resultados[nome] = medir(casos[nome], rep)
+            print(f"{nome:<45} {resultados[nome]['tempo_s']:>10.4f} s {resultados[nome]['pico_mib']:>10.1f} MiB",
+                  file=saida)
+    return resultados
+
+def comparar(resultados, baseline, limite=0.25, limite_memoria=None):
+    """
+    Compara as medicoes atuais com um baseline. Retorna a lista de regressoes
+    (nome, metrica, valor_base, valor_atual) acima do limite relativo.
+    """
+    limite_memoria = limite if limite_memoria is None else limite_memoria
+    regressoes = []
+    for nome, atual in resultados.items():
+        base = baseline.get("resultados", {}).get(nome)
+        if base is None:
+            continue
+        for metrica, lim in (("tempo_s", limite), ("pico_mib", limite_memoria)):
+            if base[metrica] > 0 and atual[metrica] > base[metrica] * (1.0 + lim):
+                regressoes.append((nome, metrica, base[metrica], atual[metrica]))
+    return regressoes
+
+def salvar_baseline(resultados, caminho):
+    """Grava as medicoes em JSON junto com informacoes do ambiente."""
+    conteudo = {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "resultados": resultados,
+    }
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(conteudo, f, indent=2, ensure_ascii=False)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de desempenho do PLUVIAH.")
+    parser.add_argument("--baseline", help="Arquivo JSON de referencia para comparacao.")
+    parser.add_argument("--salvar", help="Grava as medicoes atuais neste arquivo JSON.")
+    parser.add_argument("--limite", type=float, default=0.25, help="Piora relativa de tempo tolerada (padrao 0.25).")
+    parser.add_argument("--limite-memoria", type=float, default=None, help="Piora relativa de memoria tolerada (padrao = --limite).")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--rapido", action="store_true", help="Usa apenas as escalas menores.")
+    parser.add_argument("--filtro", help="Executa apenas casos cujo nome contenha este texto.")
+    args = parser.parse_args(argv)
+
+    anos, secoes = (ANOS_RAPIDO, SECOES_RAPIDO) if args.rapido else (ANOS, SECOES)
+    resultados = executar(anos, secoes, args.repeticoes, args.filtro)
+
+    if args.salvar:
+        salvar_baseline(resultados, args.salvar)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressoes = comparar(resultados, baseline, args.limite, args.limite_memoria)
+        for nome, metrica, base, atual in regressoes:
+            print(f"REGRESSAO {nome} [{metrica}]: {base:.4f} -> {atual:.4f}")
+        if regressoes:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
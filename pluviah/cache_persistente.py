@@ -0,0 +1,324 @@
+# cache_persistente.py
+
+import atexit
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from config import VERSAO_CACHE
+import diagnostico
+
+# Cache de resultados em disco compartilhado entre sessoes, reinicios do
+# servidor e processos (varias replicas do dashboard na mesma maquina ou com o
+# mesmo volume). O st.cache_data continua na frente, em memoria; este cache so
+# e consultado quando o processo ainda nao tem o resultado.
+#
+# A chave combina o hash do conteudo dos argumentos, o nome da funcao, a
+# VERSAO_CACHE de config.py e o hash do codigo-fonte do modulo da funcao, de
+# modo que alterar o calculo invalida automaticamente os resultados antigos.
+#
+# Configuracao por variaveis de ambiente:
+#   PLUVIAH_CACHE_DIR        pasta do banco (padrao ~/.cache/pluviah)
+#   PLUVIAH_CACHE_LIMITE_MB  tamanho maximo antes do descarte LRU (padrao 512)
+#   PLUVIAH_CACHE=0          desativa o cache persistente
+#
+# As leituras nao tomam a trava de escrita do SQLite: contadores de
+# acertos/falhas e horarios de acesso (usados no descarte LRU) ficam em
+# memoria e sao gravados em lote a cada `leituras_por_descarga` leituras, a
+# cada gravacao e ao consultar as estatisticas.
+
+
+def hash_conteudo(*partes):
+    """Hash estavel do conteudo de DataFrames, Series, arrays, bytes, arquivos e parametros."""
+    h = hashlib.sha256()
+    for parte in partes:
+        _atualizar_hash(h, parte)
+        h.update(b"|")
+    return h.hexdigest()
+
+def _atualizar_hash(h, parte):
+    if isinstance(parte, (pd.DataFrame, pd.Series)):
+        h.update(pd.util.hash_pandas_object(parte, index=True).to_numpy().tobytes())
+        rotulos = parte.columns if isinstance(parte, pd.DataFrame) else parte.name
+        h.update(repr(list(np.atleast_1d(rotulos))).encode())
+    elif isinstance(parte, np.ndarray):
+        h.update(np.ascontiguousarray(parte).tobytes())
+        h.update(repr((parte.dtype, parte.shape)).encode())
+    elif isinstance(parte, (bytes, bytearray, memoryview)):
+        h.update(parte)
+    elif hasattr(parte, "getvalue"):
+        # Arquivos em memoria (UploadedFile do Streamlit, io.BytesIO, io.StringIO)
+        valor = parte.getvalue()
+        h.update(valor if isinstance(valor, bytes) else valor.encode())
+    elif isinstance(parte, dict):
+        for k in sorted(parte, key=repr):
+            h.update(repr(k).encode())
+            _atualizar_hash(h, parte[k])
+    elif isinstance(parte, (list, tuple)):
+        h.update(type(parte).__name__.encode())
+        for item in parte:
+            _atualizar_hash(h, item)
+    else:
+        h.update(repr(parte).encode())
+    h.update(b";")
+
+@functools.lru_cache(maxsize=None)
+def _versao_modulo(arquivo):
+    try:
+        with open(arquivo, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16]
+    except (OSError, TypeError):
+        return ""
+
+def versao_codigo(funcao):
+    """VERSAO_CACHE mais o hash do arquivo-fonte onde a funcao foi definida."""
+    try:
+        arquivo = inspect.getsourcefile(inspect.unwrap(funcao))
+    except TypeError:
+        arquivo = None
+    return f"{VERSAO_CACHE}:{_versao_modulo(arquivo)}"
+
+
+class CachePersistente:
+    """
+    Cache em SQLite (modo WAL) com descarte LRU por tamanho. Seguro para varias
+    threads (uma conexao por thread) e varios processos usando o mesmo arquivo.
+    Os valores sao gravados com pickle.
+    """
+
+    def __init__(self, caminho, limite_bytes=512 * 1024**2, timeout_s=30.0, leituras_por_descarga=100):
+        self.caminho = caminho
+        self.limite_bytes = limite_bytes
+        self.timeout_s = timeout_s
+        self.leituras_por_descarga = leituras_por_descarga
+        self._local = threading.local()
+        self._trava = threading.Lock()
+        self._pendentes = {"acertos": Counter(), "falhas": Counter()}
+        self._acessos = {}
+        self._leituras = 0
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        with self._conexao() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS itens (
+                chave TEXT PRIMARY KEY, funcao TEXT, valor BLOB, tamanho INTEGER,
+                criado REAL, acessado REAL)""")
+            con.execute("CREATE INDEX IF NOT EXISTS itens_acessado ON itens (acessado)")
+            con.execute("""CREATE TABLE IF NOT EXISTS estatisticas (
+                funcao TEXT PRIMARY KEY, acertos INTEGER DEFAULT 0, falhas INTEGER DEFAULT 0,
+                descartes INTEGER DEFAULT 0)""")
+        atexit.register(self._descarregar_silencioso)
+
+    def _con(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=self.timeout_s, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def _conexao(self):
+        return _Transacao(self._con())
+
+    def _contar(self, con, funcao, campo, quantidade=1):
+        con.execute("INSERT OR IGNORE INTO estatisticas (funcao) VALUES (?)", (funcao,))
+        con.execute(f"UPDATE estatisticas SET {campo} = {campo} + ? WHERE funcao = ?", (quantidade, funcao))
+
+    def obter(self, chave, funcao=""):
+        """Retorna (True, valor) em caso de acerto ou (False, None)."""
+        # Sem BEGIN: em modo WAL a consulta le um instantaneo sem a trava de escrita
+        linha = self._con().execute("SELECT valor FROM itens WHERE chave = ?", (chave,)).fetchone()
+        with self._trava:
+            if linha is None:
+                self._pendentes["falhas"][funcao] += 1
+            else:
+                self._pendentes["acertos"][funcao] += 1
+                self._acessos[chave] = time.time()
+            self._leituras += 1
+            descarregar = self._leituras >= self.leituras_por_descarga
+        if descarregar:
+            self.descarregar()
+        if linha is None:
+            return False, None
+        return True, pickle.loads(linha[0])
+
+    def _retirar_pendentes(self):
+        with self._trava:
+            pendentes, acessos = self._pendentes, self._acessos
+            self._pendentes = {"acertos": Counter(), "falhas": Counter()}
+            self._acessos = {}
+            self._leituras = 0
+        return pendentes, acessos
+
+    def _gravar_pendentes(self, con, pendentes, acessos):
+        con.executemany("UPDATE itens SET acessado = MAX(acessado, ?) WHERE chave = ?",
+                        [(t, c) for c, t in acessos.items()])
+        for campo, contagem in pendentes.items():
+            for funcao, quantidade in contagem.items():
+                self._contar(con, funcao, campo, quantidade)
+
+    def descarregar(self):
+        """Grava no banco os contadores e horarios de acesso acumulados em memoria."""
+        pendentes, acessos = self._retirar_pendentes()
+        if not acessos and not any(pendentes.values()):
+            return
+        try:
+            with self._conexao() as con:
+                self._gravar_pendentes(con, pendentes, acessos)
+        except sqlite3.Error:
+            # Banco ocupado: devolve os dados para a proxima descarga
+            with self._trava:
+                for campo, contagem in pendentes.items():
+                    self._pendentes[campo].update(contagem)
+                for chave, t in acessos.items():
+                    self._acessos[chave] = max(t, self._acessos.get(chave, 0.0))
+            raise
+
+    def _descarregar_silencioso(self):
+        try:
+            self.descarregar()
+        except (sqlite3.Error, OSError):
+            pass
+
+    def gravar(self, chave, valor, funcao=""):
+        """Grava o valor e descarta os itens menos usados se o limite for excedido."""
+        blob = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.limite_bytes:
+            return
+        agora = time.time()
+        pendentes, acessos = self._retirar_pendentes()
+        with self._conexao() as con:
+            # Acessos pendentes entram antes do descarte LRU
+            self._gravar_pendentes(con, pendentes, acessos)
+            con.execute("INSERT OR REPLACE INTO itens VALUES (?, ?, ?, ?, ?, ?)",
+                        (chave, funcao, blob, len(blob), agora, agora))
+            total = con.execute("SELECT COALESCE(SUM(tamanho), 0) FROM itens").fetchone()[0]
+            if total > self.limite_bytes:
+                self._descartar(con, total - self.limite_bytes)
+
+    def _descartar(self, con, excesso):
+        removidos = {}
+        liberado = 0
+        for chave, funcao, tamanho in con.execute(
+                "SELECT chave, funcao, tamanho FROM itens ORDER BY acessado ASC").fetchall():
+            if liberado >= excesso:
+                break
+            con.execute("DELETE FROM itens WHERE chave = ?", (chave,))
+            liberado += tamanho
+            removidos[funcao] = removidos.get(funcao, 0) + 1
+        for funcao, quantidade in removidos.items():
+            self._contar(con, funcao, "descartes", quantidade)
+
+    def obter_ou_calcular(self, nome, partes_chave, funcao, *args, **kwargs):
+        """
+        Devolve o resultado de funcao(*args, **kwargs) guardado sob o hash de
+        `partes_chave` (conteudo dos dados e parametros) ou calcula e grava.
+        """
+        chave = hash_conteudo(nome, versao_codigo(funcao), partes_chave)
+        diagnostico.registrar_consulta_cache(f"persistente.{nome}")
+        achou, valor = self.obter(chave, nome)
+        if achou:
+            return valor
+        diagnostico.registrar_falha_cache(f"persistente.{nome}")
+        valor = funcao(*args, **kwargs)
+        self.gravar(chave, valor, nome)
+        return valor
+
+    def memorizar(self, funcao, nome=None, chave=None):
+        """
+        Envolve a funcao com o cache. A chave e o hash de todos os argumentos,
+        ou de chave(*args, **kwargs) quando informada.
+        """
+        nome = nome or f"{funcao.__module__}.{funcao.__qualname__}"
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            partes = chave(*args, **kwargs) if chave else (args, kwargs)
+            return self.obter_ou_calcular(nome, partes, funcao, *args, **kwargs)
+        return envoltorio
+
+    def estatisticas(self):
+        """Acertos, falhas, descartes, itens e bytes por funcao."""
+        self.descarregar()
+        with self._conexao() as con:
+            contagens = pd.read_sql_query("SELECT * FROM estatisticas", con)
+            ocupacao = pd.read_sql_query(
+                "SELECT funcao, COUNT(*) AS itens, SUM(tamanho) AS bytes FROM itens GROUP BY funcao", con)
+        df = contagens.merge(ocupacao, on="funcao", how="outer").fillna(0)
+        consultas = df["acertos"] + df["falhas"]
+        df["taxa_acerto"] = df["acertos"] / consultas.where(consultas > 0)
+        return df[["funcao", "acertos", "falhas", "taxa_acerto", "descartes", "itens", "bytes"]]
+
+    def limpar(self):
+        self._retirar_pendentes()
+        with self._conexao() as con:
+            con.execute("DELETE FROM itens")
+            con.execute("DELETE FROM estatisticas")
+
+
+class _Transacao:
+    """Contexto de transacao imediata (reserva a escrita no inicio, evitando deadlock entre processos)."""
+
+    def __init__(self, con):
+        self.con = con
+
+    def __enter__(self):
+        self.con.execute("BEGIN IMMEDIATE")
+        return self.con
+
+    def __exit__(self, tipo, *exc):
+        self.con.execute("ROLLBACK" if tipo else "COMMIT")
+        return False
+
+
+class CacheNulo:
+    """Mesma interface, sem armazenamento (cache desativado)."""
+
+    def obter(self, chave, funcao=""):
+        return False, None
+
+    def gravar(self, chave, valor, funcao=""):
+        pass
+
+    def obter_ou_calcular(self, nome, partes_chave, funcao, *args, **kwargs):
+        return funcao(*args, **kwargs)
+
+    def memorizar(self, funcao, nome=None, chave=None):
+        return funcao
+
+    def estatisticas(self):
+        return pd.DataFrame(columns=["funcao", "acertos", "falhas", "taxa_acerto", "descartes", "itens", "bytes"])
+
+    def limpar(self):
+        pass
+
+
+_PADRAO = None
+_TRAVA = threading.Lock()
+
+def cache_padrao():
+    """Cache do processo, configurado pelas variaveis de ambiente PLUVIAH_CACHE*."""
+    global _PADRAO
+    with _TRAVA:
+        if _PADRAO is None:
+            if os.environ.get("PLUVIAH_CACHE", "1") == "0":
+                _PADRAO = CacheNulo()
+            else:
+                pasta = os.environ.get("PLUVIAH_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "pluviah")
+                limite = float(os.environ.get("PLUVIAH_CACHE_LIMITE_MB", 512)) * 1024**2
+                _PADRAO = CachePersistente(os.path.join(pasta, "resultados.sqlite"), int(limite))
+        return _PADRAO
+
+def definir_cache(cache):
+    """Substitui o cache do processo (outra implementacao com obter/gravar/obter_ou_calcular)."""
+    global _PADRAO
+    with _TRAVA:
+        _PADRAO = cache
@@ -4,6 +4,10 @@
 G = 9.81      # Aceleração da gravidade (m/s²)
 RHO = 1000.0  # Densidade da água (kg/m³)
 
+# Versão dos resultados guardados no cache persistente. Incrementar quando uma
+# mudança de cálculo não estiver no mesmo arquivo da função (ex.: dependências).
+VERSAO_CACHE = "1"
+
 # Mapeamento de materiais para coeficiente de Manning (n)
 MATERIAIS_MANNING = {
     "Canal de concreto acabado": 0.013,
@@ -17,3 +21,26 @@ MATERIAIS_MANNING = {
     "Vegetação densa": 0.070,
     "Outro (personalizado)": 0.015,
 }
+
+# Diâmetros comerciais de tubos de drenagem (m)
+DIAMETROS_COMERCIAIS = [0.30, 0.40, 0.50, 0.60, 0.70, 0.80, 0.90, 1.00, 1.20, 1.50, 1.75, 2.00]
+
+# Limites de projeto para a otimização de condutos
+LIMITES_CONDUTOS = {
+    "v_min": 0.6,          # Velocidade mínima de autolimpeza (m/s)
+    "v_max": 5.0,          # Velocidade máxima (m/s)
+    "tau_min": 1.0,        # Tensão de arraste mínima (Pa)
+    "yd_max": 0.75,        # Lâmina relativa máxima (y/D)
+    "cobertura_min": 1.0,  # Recobrimento mínimo sobre a geratriz superior (m)
+    "prof_max": 5.0,       # Profundidade máxima da soleira (m)
+}
+
+# Modelo de custo por trecho (valores de referência, em R$)
+CUSTOS_CONDUTOS = {
+    "tubo_coef": 1100.0,       # Custo do tubo assentado: coef * D^expoente (R$/m, D em m)
+    "tubo_expoente": 1.5,
+    "escavacao_m3": 65.0,      # Escavação e reaterro (R$/m³)
+    "folga_vala": 0.3,         # Folga lateral da vala de cada lado do tubo (m)
+    "escoramento_m2": 45.0,    # Escoramento das paredes da vala (R$/m²)
+    "prof_escoramento": 1.25,  # Profundidade a partir da qual a vala é escorada (m)
+}
@@ -8,19 +8,27 @@ import plotly.graph_objects as go
 import tempfile
 import os
 import math
+import time
+import uuid
 from streamlit_option_menu import option_menu
 
 # --- 1. IMPORTAÇÕES DA LÓGICA MODULARIZADA ---
 from data_handler import load_data
 from idf import calculate_annual_maxima, calculate_idf_curves, calcular_chuva_projeto
-from tc import calcular_tc_kirpich, calcular_tc_giandotti
+from distribuicoes import ajustar_distribuicoes
+from eventos import segmentar_eventos, estatisticas_eventos, eventos_por_ano
+from tc import calcular_tc_kirpich, calcular_tc_giandotti, calcular_tc_lote
 from racional import calcular_vazao_racional
 from manning import (
     dimensionar_conduto_circular, geom_trapezio, manning_Q, froude, tau_medio,
-    y_normal, y_critico, b_para_Q
+    y_normal, y_critico, b_para_Q, verificar_condutos_parciais
 )
-from relatorio import gerar_pdf_bytes
+from relatorio import gerar_pdf_bytes, gerar_html_bytes
+from tarefas import GerenciadorTarefas, chave_tarefa, CONCLUIDA, ERRO
+from cache_persistente import cache_padrao
+from serie_compacta import SerieCompacta, RegistroSeries
 from config import MATERIAIS_MANNING, G, RHO
+import diagnostico
 
 
 # =============================================================================
@@ -68,17 +76,207 @@ st.markdown("""
 # ==============================================================================
 # 3. FUNÇÕES COM CACHE
 # ==============================================================================
+# O corpo das funcoes com cache so executa em caso de falha (cache miss);
+# as funcoes publicas registram a consulta para o painel de diagnostico.
+# Em caso de falha no st.cache_data (memoria do processo), o resultado ainda
+# pode vir do cache persistente em disco, compartilhado entre processos.
 @st.cache_data
-def cached_load_data(uploaded_file):
-    return load_data(uploaded_file)
+def _cache_load_data(uploaded_file):
+    diagnostico.registrar_falha_cache("cache.load_data")
+    df = cache_padrao().obter_ou_calcular("data_handler.load_data", uploaded_file, load_data, uploaded_file)
+    return SerieCompacta.de_dataframe(df)
 
 @st.cache_data
-def cached_calculate_annual_maxima(_df, duration):
-    return calculate_annual_maxima(_df, duration)
+def _cache_calculate_annual_maxima(_df, duration, chave_df):
+    diagnostico.registrar_falha_cache("cache.calculate_annual_maxima")
+    return maximas_persistente(_df, duration, chave_df)
 
 @st.cache_data
-def cached_calculate_idf_curves(series, duration, trs_np):
-    return calculate_idf_curves(series, duration, trs_np)
+def _cache_segmentar_eventos(_df, intervalo_seco_h, limiar_mm, chave_df):
+    diagnostico.registrar_falha_cache("cache.segmentar_eventos")
+    return segmentar_eventos(_df, intervalo_seco_h, limiar_mm)
+
+def cached_load_data(uploaded_file):
+    diagnostico.registrar_consulta_cache("cache.load_data")
+    return _cache_load_data(uploaded_file)
+
+def cached_calculate_annual_maxima(_df, duration):
+    diagnostico.registrar_consulta_cache("cache.calculate_annual_maxima")
+    return _cache_calculate_annual_maxima(_df, duration, chave_df_sessao())
+
+def cached_segmentar_eventos(_df, intervalo_seco_h, limiar_mm):
+    diagnostico.registrar_consulta_cache("cache.segmentar_eventos")
+    return _cache_segmentar_eventos(_df, intervalo_seco_h, limiar_mm, chave_df_sessao())
+
+# ==============================================================================
+# 3.1 SÉRIE DA SESSÃO (COMPACTA E COMPARTILHADA)
+# ==============================================================================
+# Cada sessao guarda apenas uma referencia a serie compacta (float32 e tempo
+# implicito); sessoes com o mesmo conteudo compartilham a mesma copia e o
+# mesmo DataFrame materializado, ambos somente leitura.
+@st.cache_resource
+def obter_registro_series():
+    return RegistroSeries(max_materializadas=4)
+
+def sessao_id():
+    if 'sessao_id' not in st.session_state:
+        st.session_state['sessao_id'] = uuid.uuid4().hex
+    return st.session_state['sessao_id']
+
+def definir_serie_sessao(dados):
+    """Registra a serie (DataFrame ou SerieCompacta) como dados da sessao."""
+    anterior = st.session_state.get('serie')
+    st.session_state['serie'] = obter_registro_series().adquirir(dados, sessao_id())
+    if anterior is not None:
+        anterior.liberar()
+
+def tem_dados():
+    return st.session_state.get('serie') is not None
+
+def df_sessao():
+    """DataFrame (compartilhado, somente leitura) da serie da sessao."""
+    return st.session_state.serie.dataframe()
+
+def chave_df_sessao():
+    """Hash do conteudo da serie da sessao."""
+    return st.session_state.serie.chave
+
+# Compatibilidade: DataFrame colocado diretamente em st.session_state['df']
+if st.session_state.get('df') is not None:
+    definir_serie_sessao(st.session_state.pop('df'))
+
+# Versoes com cache persistente; chave_df identifica o conteudo da serie sem re-hash a cada chamada
+def maximas_persistente(df, duracao, chave_df):
+    return cache_padrao().obter_ou_calcular(
+        "idf.calculate_annual_maxima", (chave_df, duracao), calculate_annual_maxima, df, duracao)
+
+def curvas_idf_persistente(series, duracao, trs):
+    return cache_padrao().obter_ou_calcular(
+        "idf.calculate_idf_curves", (series, duracao, trs), calculate_idf_curves, series, duracao, trs)
+
+def gerar_pdf_com_grafico(dados_relatorio, grafico_png):
+    """Grava a imagem do grafico em um PNG temporario so durante a montagem do PDF."""
+    fd, caminho = tempfile.mkstemp(suffix=".png")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(grafico_png)
+        return gerar_pdf_bytes({**dados_relatorio, "idf": {**dados_relatorio["idf"], "fig_path": caminho}})
+    finally:
+        os.remove(caminho)
+
+def pdf_persistente(dados_relatorio, grafico_png):
+    # A chave usa o conteudo da imagem, nao um caminho temporario
+    return cache_padrao().obter_ou_calcular("relatorio.gerar_pdf_bytes", (dados_relatorio, grafico_png),
+                                            gerar_pdf_com_grafico, dados_relatorio, grafico_png)
+
+# ==============================================================================
+# 3.2 TAREFAS EM SEGUNDO PLANO
+# ==============================================================================
+# Gerenciador unico por processo: sessoes que pedem o mesmo calculo (mesmos
+# dados e parametros) compartilham a mesma tarefa; cada sessao registra seu
+# interesse e o cancelamento so interrompe a tarefa sem outros interessados.
+@st.cache_resource
+def obter_gerenciador_tarefas():
+    return GerenciadorTarefas(max_workers=2)
+
+DURACOES_PADRAO = [1, 2, 3, 6, 12, 24]
+
+def figura_idf(df_idf, duracao):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df_idf["TR (anos)"], y=df_idf[f"Gumbel_{duracao}h (mm)"], mode='lines+markers', name='Gumbel', line=dict(color='#D55E00')))
+    fig.add_trace(go.Scatter(x=df_idf["TR (anos)"], y=df_idf[f"LP3_{duracao}h (mm)"], mode='lines+markers', name='Log-Pearson III', line=dict(color='#0072B2')))
+    fig.update_layout(
+        title=f"Precipitação Estimada vs. Período de Retorno (Duração: {duracao}h)",
+        xaxis_title="Período de Retorno (anos)", yaxis_title="Precipitação (mm)",
+        xaxis_type="log", template="plotly_dark", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+        legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01)
+    )
+    return fig
+
+def tarefa_idf(tarefa, df, chave_df, duracao, trs):
+    """Maximas, ajuste estatistico e imagem do grafico (bytes PNG) para o relatorio PDF."""
+    tarefa.reportar(0.05, f"Calculando máximas anuais para {duracao}h...")
+    series_maximas = maximas_persistente(df, duracao, chave_df)
+    tarefa.reportar(0.35, "Ajustando Gumbel e Log-Pearson III...")
+    results = curvas_idf_persistente(series_maximas, duracao, trs)
+    if results[0] is None:
+        return results, None
+
+    tarefa.reportar(0.6, "Gerando imagem do gráfico para o relatório...")
+    with diagnostico.etapa("dashboard.grafico_idf"):
+        fig_pdf = figura_idf(results[0], duracao)
+        fig_pdf.update_layout(
+            template="plotly_white", 
+            paper_bgcolor='white', 
+            plot_bgcolor='white',
+            font=dict(color="black"),
+            xaxis=dict(gridcolor="lightgrey", linecolor="black", title_font=dict(color="black"), tickfont=dict(color="black")),
+            yaxis=dict(gridcolor="lightgrey", linecolor="black", title_font=dict(color="black"), tickfont=dict(color="black")),
+            title_font=dict(color="black"),
+            legend=dict(font=dict(color="black"))
+        )
+    # A exportacao depende do Kaleido; se falhar, o ajuste continua valido e
+    # apenas o relatorio PDF fica indisponivel. O PNG temporario e apagado
+    # assim que lido: a sessao guarda so os bytes.
+    caminho = os.path.join(tempfile.gettempdir(), f"pluviah_idf_{uuid.uuid4().hex}.png")
+    try:
+        with diagnostico.etapa("dashboard.write_image"):
+            fig_pdf.write_image(caminho, scale=2)
+        with open(caminho, "rb") as f:
+            return results, f.read()
+    except Exception:
+        return results, None
+    finally:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+def tarefa_distribuicoes(tarefa, df, chave_df, duracoes):
+    """Ajusta todas as distribuicoes candidatas, uma duracao por vez (com progresso)."""
+    partes = []
+    for k, duracao in enumerate(duracoes):
+        tarefa.reportar(k / len(duracoes), f"Ajustando distribuições para {duracao}h...")
+        maximas = maximas_persistente(df, duracao, chave_df)
+        partes.append(ajustar_distribuicoes({duracao: maximas}))
+    return pd.concat(partes, ignore_index=True)
+
+def acompanhar_tarefa(chave_sessao):
+    """
+    Mostra o progresso da tarefa cuja chave esta em st.session_state[chave_sessao].
+    Retorna a tarefa quando termina (uma unica vez) e None enquanto executa.
+    """
+    chave = st.session_state.get(chave_sessao)
+    tarefa = obter_gerenciador_tarefas().obter(chave) if chave else None
+    if tarefa is None:
+        st.session_state.pop(chave_sessao, None)
+        return None
+    if not tarefa.terminada:
+        col_prog, col_btn = st.columns([5, 1])
+        col_prog.progress(tarefa.progresso, text=f"{tarefa.descricao}: {tarefa.mensagem}")
+        if col_btn.button("Cancelar", key=f"cancelar_{chave_sessao}"):
+            # Retira so o interesse desta sessao; a tarefa segue se outra sessao a aguarda
+            obter_gerenciador_tarefas().cancelar(chave, interessado=sessao_id())
+            del st.session_state[chave_sessao]
+            st.info("Cálculo cancelado.")
+            return None
+        st.session_state['aguardando_tarefas'] = True
+        return None
+    del st.session_state[chave_sessao]
+    if tarefa.estado == ERRO:
+        st.error(f"Erro no cálculo: {tarefa.erro}")
+    elif tarefa.estado != CONCLUIDA:
+        st.info("Cálculo cancelado.")
+    return tarefa
+
+# ==============================================================================
+# 4. DIAGNÓSTICO DE DESEMPENHO
+# ==============================================================================
+# O registro e global ao processo (todas as sessoes): a coleta so muda pelos
+# botoes do painel, nunca a cada rerun de uma sessao.
+def alternar_diagnostico():
+    if diagnostico.ativo():
+        diagnostico.desativar()
+    else:
+        diagnostico.ativar()
 
 # ==============================================================================
 # 5. INTERFACE DO DASHBOARD
@@ -89,7 +287,7 @@ st.caption("Uma ferramenta para análise de séries históricas de chuva, geraç
 st.divider()
 
 # --- LÓGICA DE ESTADO: SEM DADOS CARREGADOS ---
-if 'df' not in st.session_state or st.session_state.df is None:
+if not tem_dados():
     st.info("Para começar carregue um arquivo com dados de chuva.")
     
     pagina_selecionada = "Visão Geral"
@@ -133,7 +331,7 @@ else:
 # --- ABA 1: VISÃO GERAL (COM UPLOADER CONDICIONAL) ---
 if pagina_selecionada == "Visão Geral":
     
-    if 'df' not in st.session_state or st.session_state.df is None:
+    if not tem_dados():
         st.markdown("### <i class='fas fa-upload'></i> Carregar Dados de Chuva", unsafe_allow_html=True)
         uploaded_file = st.file_uploader(
             "Selecione seu arquivo CSV", type=["csv"],
@@ -142,14 +340,14 @@ if pagina_selecionada == "Visão Geral":
         if uploaded_file is not None:
             try:
                 with st.spinner("Analisando seu arquivo..."):
-                    st.session_state['df'] = cached_load_data(uploaded_file)
+                    definir_serie_sessao(cached_load_data(uploaded_file))
                 st.rerun()
             except Exception as e:
                 st.error(f"Erro ao processar o arquivo: {e}")
-                st.session_state['df'] = None
+                st.session_state['serie'] = None
     
     else:
-        df = st.session_state.df
+        df = df_sessao()
         ano_min_disponivel = df.index.year.min()
         ano_max_disponivel = df.index.year.max()
         df_analise = df
@@ -157,6 +355,7 @@ if pagina_selecionada == "Visão Geral":
         _, col_btn = st.columns([5, 1])
         with col_btn:
             if st.button("Alterar Arquivo"):
+                st.session_state.serie.liberar()
                 st.session_state.clear()
                 st.rerun()
 
@@ -216,6 +415,43 @@ if pagina_selecionada == "Visão Geral":
             with st.expander("Ver dados da tabela de máximas anuais"):
                 st.dataframe(df_maximas.set_index("Ano"), use_container_width=True)
 
+        st.divider()
+
+        st.subheader("Eventos de Chuva")
+        col_ev1, col_ev2 = st.columns(2)
+        intervalo_seco = col_ev1.number_input("Tempo seco mínimo entre eventos (h)", min_value=1.0, value=6.0, step=1.0,
+                                              help="Eventos separados por menos tempo sem chuva são unidos em um só.")
+        limiar_chuva = col_ev2.number_input("Limiar de registro chuvoso (mm)", min_value=0.0, value=0.0, step=0.1)
+
+        with st.spinner("Segmentando eventos..."):
+            eventos = cached_segmentar_eventos(df_analise, intervalo_seco, limiar_chuva)
+
+        if eventos.empty:
+            st.warning("Nenhum evento de chuva encontrado com esses critérios.")
+        else:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Eventos Identificados", f"{len(eventos):,}")
+            col2.metric("Maior Altura de Evento", f"{eventos['altura (mm)'].max():.1f} mm")
+            col3.metric("Maior Duração", f"{eventos['duracao (h)'].max():.0f} h")
+
+            fig_eventos = px.scatter(
+                eventos, x="duracao (h)", y="altura (mm)", color="intensidade_pico (mm/h)",
+                hover_data=["inicio", "tempo_pico (h)", "seco_antecedente (h)"],
+                labels={"duracao (h)": "Duração (h)", "altura (mm)": "Altura (mm)",
+                        "intensidade_pico (mm/h)": "Pico (mm/h)"},
+                title="Altura x Duração dos Eventos", color_continuous_scale="Blues"
+            )
+            fig_eventos.update_layout(template="plotly_dark", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+            st.plotly_chart(fig_eventos, use_container_width=True)
+
+            st.markdown("**Estatísticas dos eventos**")
+            st.dataframe(estatisticas_eventos(eventos).style.format("{:.2f}"), use_container_width=True)
+
+            with st.expander("Ver eventos por ano"):
+                st.dataframe(eventos_por_ano(eventos), use_container_width=True)
+            with st.expander("Ver catálogo de eventos"):
+                st.dataframe(eventos, use_container_width=True)
+
 # --- ABA 2: CURVAS IDF ---
 elif pagina_selecionada == "Curvas IDF":
     st.markdown("## <i class='fas fa-chart-area'></i> Curvas Intensidade-Duração-Frequência (IDF)", unsafe_allow_html=True)
@@ -224,12 +460,24 @@ elif pagina_selecionada == "Curvas IDF":
     
     if st.button("Calcular Curvas IDF e Ajuste Estatístico"):
         trs = np.array([2, 5, 10, 25, 50, 100])
-        with st.spinner(f"Ajustando curvas para {duracao_idf}h..."):
-            series_maximas = cached_calculate_annual_maxima(st.session_state.df, duracao_idf)
-            results = cached_calculate_idf_curves(series_maximas, duracao_idf, trs)
+        chave = chave_tarefa("idf", chave_df_sessao(), duracao_idf, trs)
+        obter_gerenciador_tarefas().submeter(chave, tarefa_idf, df_sessao(), chave_df_sessao(),
+                                             duracao_idf, trs, descricao=f"Curvas IDF ({duracao_idf}h)",
+                                             interessado=sessao_id())
+        st.session_state['tarefa_idf'] = chave
+        st.session_state['tarefa_idf_duracao'] = duracao_idf
+
+    tarefa = acompanhar_tarefa('tarefa_idf')
+    if tarefa is not None:
+        duracao_tarefa = st.session_state.pop('tarefa_idf_duracao', None)
+        if tarefa.estado == CONCLUIDA:
+            results, grafico_png = tarefa.resultado
             st.session_state['idf_results'] = results
-            st.session_state['duracao_idf_calculada'] = duracao_idf
-    
+            st.session_state['duracao_idf_calculada'] = duracao_tarefa
+            st.session_state['grafico_png'] = grafico_png
+            if results[0] is not None and grafico_png is None:
+                st.warning("Não foi possível exportar a imagem do gráfico (Kaleido); o relatório PDF ficará indisponível, mas o relatório HTML pode ser gerado.")
+
     if st.session_state.get('idf_results'):
         df_idf, params_gumbel, params_lp3, _, gumbel_params_tuple, lp3_params_tuple = st.session_state.get('idf_results')
         
@@ -244,32 +492,7 @@ elif pagina_selecionada == "Curvas IDF":
                 'params_gumbel': params_gumbel, 'params_lp3': params_lp3
             })
 
-            fig_idf = go.Figure()
-            fig_idf.add_trace(go.Scatter(x=df_idf["TR (anos)"], y=df_idf[f"Gumbel_{duracao_calculada}h (mm)"], mode='lines+markers', name='Gumbel', line=dict(color='#D55E00')))
-            fig_idf.add_trace(go.Scatter(x=df_idf["TR (anos)"], y=df_idf[f"LP3_{duracao_calculada}h (mm)"], mode='lines+markers', name='Log-Pearson III', line=dict(color='#0072B2')))
-            fig_idf.update_layout(
-                title=f"Precipitação Estimada vs. Período de Retorno (Duração: {duracao_calculada}h)",
-                xaxis_title="Período de Retorno (anos)", yaxis_title="Precipitação (mm)",
-                xaxis_type="log", template="plotly_dark", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                legend=dict(yanchor="top", y=0.99, xanchor="left", x=0.01)
-            )
-            st.plotly_chart(fig_idf, use_container_width=True)
-
-            fig_pdf = go.Figure(fig_idf)
-            fig_pdf.update_layout(
-                template="plotly_white", 
-                paper_bgcolor='white', 
-                plot_bgcolor='white',
-                font=dict(color="black"),
-                xaxis=dict(gridcolor="lightgrey", linecolor="black", title_font=dict(color="black"), tickfont=dict(color="black")),
-                yaxis=dict(gridcolor="lightgrey", linecolor="black", title_font=dict(color="black"), tickfont=dict(color="black")),
-                title_font=dict(color="black"),
-                legend=dict(font=dict(color="black"))
-            )
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmpfile:
-                fig_pdf.write_image(tmpfile.name, scale=2)
-                st.session_state['grafico_path'] = tmpfile.name
+            st.plotly_chart(figura_idf(df_idf, duracao_calculada), use_container_width=True)
             
             st.subheader("Resultados da Análise IDF")
             st.dataframe(df_idf.style.format("{:.2f}"))
@@ -291,6 +514,41 @@ elif pagina_selecionada == "Curvas IDF":
             col5.metric("Desvio Padrão (log10)", f"{params_lp3['std_log']:.3f}")
             col6.metric("Assimetria (log10)", f"{params_lp3['skew']:.3f}")
 
+    st.divider()
+    with st.expander("Comparação de distribuições (todas as durações)"):
+        st.caption("Ajusta Gumbel, Log-Pearson III, GEV, Gama, Log-Normal 2/3, Pearson III e GPD "
+                   "para as durações de 1 a 24 h e ordena os modelos por AIC/BIC, com testes K-S e Anderson-Darling. "
+                   "Só os ajustes por máxima verossimilhança (MV) entram no ranking; o Log-Pearson III por "
+                   "momentos (o mesmo das curvas IDF) aparece apenas como referência.")
+        if st.button("Ajustar Todas as Distribuições"):
+            chave = chave_tarefa("distribuicoes", chave_df_sessao(), DURACOES_PADRAO)
+            obter_gerenciador_tarefas().submeter(chave, tarefa_distribuicoes, df_sessao(), chave_df_sessao(),
+                                                 DURACOES_PADRAO,
+                                                 descricao="Comparação de distribuições",
+                                                 interessado=sessao_id())
+            st.session_state['tarefa_distribuicoes'] = chave
+
+        tarefa = acompanhar_tarefa('tarefa_distribuicoes')
+        if tarefa is not None and tarefa.estado == CONCLUIDA:
+            st.session_state['comparacao_distribuicoes'] = tarefa.resultado
+
+        comparacao = st.session_state.get('comparacao_distribuicoes')
+        if comparacao is not None:
+            if comparacao.empty:
+                st.warning("Série curta para ajuste estatístico (mínimo de 5 anos de dados).")
+            else:
+                melhores = comparacao[comparacao["melhor"]]
+                st.markdown("##### **Melhor modelo por duração**")
+                st.dataframe(
+                    melhores[["duracao", "distribuicao", "aic", "bic", "ks_p", "ad_stat"]].set_index("duracao"),
+                    use_container_width=True
+                )
+                st.markdown("##### **Todos os ajustes**")
+                st.dataframe(
+                    comparacao.drop(columns=["parametros"]).set_index(["duracao", "distribuicao"]),
+                    use_container_width=True
+                )
+
 # --- ABA 3: CHUVA DE PROJETO ---
 elif pagina_selecionada == "Chuva de Projeto":
     st.markdown("## <i class='fas fa-cloud-showers-heavy'></i> Cálculo de Chuva de Projeto", unsafe_allow_html=True)
@@ -340,7 +598,7 @@ elif pagina_selecionada == "Chuva de Projeto":
 # --- ABA 4: TEMPO DE CONCENTRAÇÃO ---
 elif pagina_selecionada == "Tempo de Concentração":
     st.markdown("## <i class='fas fa-stopwatch'></i> Tempo de Concentração", unsafe_allow_html=True)
-    metodo_tc = st.selectbox("Selecione o método de cálculo:", ["Kirpich", "Giandotti"])
+    metodo_tc = st.selectbox("Selecione o método de cálculo:", ["Kirpich", "Giandotti", "Lote (tabela de sub-bacias)"])
 
     if metodo_tc == "Kirpich":
         with st.container(border=True):
@@ -375,6 +633,24 @@ elif pagina_selecionada == "Tempo de Concentração":
             else:
                 st.warning("A cota máxima deve ser maior que a mínima.")
 
+    elif metodo_tc == "Lote (tabela de sub-bacias)":
+        st.info("Envie um CSV com uma linha por sub-bacia. Colunas reconhecidas: L_m, S_m_m, A_km2, deltaH_m, CN, n, i_mm_h. "
+                "Cada método é calculado para todas as sub-bacias que possuem as colunas necessárias.")
+        arquivo_sub_bacias = st.file_uploader("Tabela de sub-bacias (CSV)", type=["csv"], key="tc_lote_arquivo")
+        if arquivo_sub_bacias is not None:
+            try:
+                sub_bacias = pd.read_csv(arquivo_sub_bacias, sep=None, engine='python')
+                with st.spinner(f"Calculando Tc para {len(sub_bacias):,} sub-bacias..."):
+                    tabela_tc = calcular_tc_lote(sub_bacias)
+                if tabela_tc.shape[1] == 0:
+                    st.warning("Nenhum método pôde ser aplicado com as colunas fornecidas.")
+                else:
+                    st.dataframe(tabela_tc.style.format("{:.2f}"), use_container_width=True)
+                    st.download_button("Baixar Tabela de Tc (CSV)", data=tabela_tc.to_csv().encode("utf-8"),
+                                       file_name="tc_sub_bacias.csv", mime="text/csv")
+            except Exception as e:
+                st.error(f"Erro ao processar a tabela: {e}")
+
 # --- ABA 5: VAZÃO DE PROJETO ---
 elif pagina_selecionada == "Vazão de Projeto":
     st.markdown("## <i class='fas fa-calculator'></i> Vazão de Projeto – Método Racional", unsafe_allow_html=True)
@@ -427,6 +703,17 @@ elif pagina_selecionada == "Condutos Circulares":
                 c2.metric("Velocidade de escoamento", f"{V:.3f} m/s")
                 c1.metric("Área da seção cheia", f"{A:.3f} m²")
                 c2.metric("Tensão de arraste média", f"{tau:.2f} Pa")
+
+                st.markdown("##### **Verificação em lâmina parcial (vazão de projeto)**")
+                parcial = verificar_condutos_parciais(Q, d_rec, n, S).iloc[0]
+                c3, c4, c5 = st.columns(3)
+                c3.metric("Lâmina relativa (y/D)", f"{parcial['y/D']:.2f}",
+                          delta="Atende (≤ 0,75)" if parcial["Atende lâmina"] else "Acima de 0,75",
+                          delta_color="normal" if parcial["Atende lâmina"] else "inverse")
+                c4.metric("Velocidade real", f"{parcial['V (m/s)']:.3f} m/s",
+                          delta="Entre 0,6 e 5,0 m/s" if parcial["Atende velocidade"] else "Fora de 0,6–5,0 m/s",
+                          delta_color="normal" if parcial["Atende velocidade"] else "inverse")
+                c5.metric("Tensão de arraste (lâmina parcial)", f"{parcial['Tensão (Pa)']:.2f} Pa")
                 
                 st.session_state['conduto_d_rec'] = d_rec
                 st.session_state['conduto_Q_calc'] = Q_calc
@@ -515,18 +802,19 @@ elif pagina_selecionada == "Canais Abertos":
 
 # --- ABA 8: RELATÓRIO PDF ---
 elif pagina_selecionada == "Relatório PDF":
-    st.markdown("## <i class='fas fa-file-alt'></i> Relatório em PDF", unsafe_allow_html=True)
+    st.markdown("## <i class='fas fa-file-alt'></i> Relatório em PDF / HTML", unsafe_allow_html=True)
     
-    if st.session_state.get('df_idf') is not None and st.session_state.get('grafico_path') is not None:
+    if st.session_state.get('df_idf') is not None:
         st.info(f"Pronto para gerar o relatório com todos os dados calculados até o momento.")
         
         dados_para_relatorio = {
             "idf": {
                 "df_idf": st.session_state.get('df_idf'),
-                "fig_path": st.session_state.get('grafico_path'),
+                "fig_path": None,
                 "duracao": st.session_state.get('duracao_idf_calculada'),
                 "params_gumbel": st.session_state.get('params_gumbel'),
-                "params_lp3": st.session_state.get('params_lp3')
+                "params_lp3": st.session_state.get('params_lp3'),
+                "comparacao": st.session_state.get('comparacao_distribuicoes'),
             },
             "chuva_projeto": {
                 "intensidade": st.session_state.get('intensidade_proj_result'),
@@ -553,14 +841,76 @@ elif pagina_selecionada == "Relatório PDF":
             }
         }
 
-        pdf_bytes = gerar_pdf_bytes(dados_para_relatorio)
-        
+        # O HTML usa graficos SVG gerados dos dados e nao depende da imagem do Kaleido
         st.download_button(
-            label="Baixar Relatório Completo em PDF",
-            data=pdf_bytes,
-            file_name=f"Relatorio_PLUVIAH.pdf",
-            mime="application/pdf",
+            label="Baixar Relatório Completo em HTML",
+            data=gerar_html_bytes(dados_para_relatorio),
+            file_name="Relatorio_PLUVIAH.html",
+            mime="text/html",
             use_container_width=True
         )
+
+        if st.session_state.get('grafico_png') is not None:
+            pdf_bytes = pdf_persistente(dados_para_relatorio, st.session_state['grafico_png'])
+
+            st.download_button(
+                label="Baixar Relatório Completo em PDF",
+                data=pdf_bytes,
+                file_name=f"Relatorio_PLUVIAH.pdf",
+                mime="application/pdf",
+                use_container_width=True
+            )
+        else:
+            st.caption("O relatório PDF requer a imagem do gráfico, exportada pelo Kaleido, que não está disponível.")
     else:
         st.warning("Calcule uma curva IDF primeiro para poder gerar o relatório.")
+
+# ==============================================================================
+# 6. PAINEL DE DIAGNÓSTICO (OPCIONAL)
+# ==============================================================================
+with st.sidebar:
+    st.divider()
+    with st.expander("Diagnóstico de desempenho"):
+        if diagnostico.ativo():
+            st.caption("Coleta ligada para todo o servidor (todas as sessões).")
+        st.button("Desligar coleta" if diagnostico.ativo() else "Ligar coleta", on_click=alternar_diagnostico,
+                  help="Registra tempo, chamadas, linhas processadas e uso de cache de cada etapa, "
+                       "para todas as sessões do servidor.")
+        df_diag = diagnostico.resumo()
+        if df_diag.empty:
+            st.caption("Nenhuma medição registrada.")
+        else:
+            st.dataframe(
+                df_diag[["etapa", "chamadas", "tempo_total_s", "tempo_medio_s", "linhas", "acertos_cache", "falhas_cache"]],
+                use_container_width=True, hide_index=True
+            )
+        c1, c2 = st.columns(2)
+        c1.download_button("Exportar JSON", data=diagnostico.exportar_json(),
+                           file_name="diagnostico_pluviah.json", mime="application/json")
+        if c2.button("Limpar"):
+            diagnostico.limpar()
+            st.rerun()
+        st.caption("Memória da sessão (séries compartilhadas divididas entre as sessões)")
+        df_memoria = obter_registro_series().memoria_sessao(st.session_state)
+        st.dataframe(df_memoria[df_memoria["bytes"] > 0], use_container_width=True, hide_index=True)
+        df_series = obter_registro_series().uso()
+        if not df_series.empty:
+            st.caption("Séries carregadas no servidor")
+            st.dataframe(df_series, use_container_width=True, hide_index=True)
+        df_cache = cache_padrao().estatisticas()
+        if not df_cache.empty:
+            st.caption("Cache persistente (todas as sessões e processos)")
+            st.dataframe(df_cache, use_container_width=True, hide_index=True)
+            if st.button("Esvaziar cache persistente"):
+                cache_padrao().limpar()
+                st.rerun()
+        df_tarefas = obter_gerenciador_tarefas().tabela()
+        if not df_tarefas.empty:
+            st.caption("Tarefas em segundo plano")
+            st.dataframe(df_tarefas, use_container_width=True, hide_index=True)
+
+# Enquanto houver tarefas em execucao, a pagina se atualiza sozinha; os
+# widgets continuam respondendo porque cada interacao interrompe a espera.
+if st.session_state.pop('aguardando_tarefas', False):
+    time.sleep(0.5)
+    st.rerun()
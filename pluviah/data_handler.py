@@ -1,8 +1,12 @@
 import pandas as pd
+from diagnostico import etapa, medido, contar_linhas
 
+@medido("data_handler.load_data")
 def load_data(uploaded_file):
     """Lê e processa o arquivo CSV contendo a série temporal de precipitacao."""
-    df_raw = pd.read_csv(uploaded_file, sep=None, engine='python', encoding='utf-8')
+    with etapa("data_handler.leitura_csv"):
+        df_raw = pd.read_csv(uploaded_file, sep=None, engine='python', encoding='utf-8')
+    contar_linhas("data_handler.load_data", len(df_raw))
     df_raw.columns = [col.strip().lower() for col in df_raw.columns]
 
     if "precipitacao" in df_raw.columns:
@@ -12,17 +16,18 @@ def load_data(uploaded_file):
     else:
         raise ValueError("Coluna 'precipitacao' nao encontrada.")
 
-    if "datahora" in df_raw.columns:
-        df_raw["datahora"] = pd.to_datetime(df_raw["datahora"], errors='coerce')
-    elif "data" in df_raw.columns and "hora" in df_raw.columns:
-        df_raw["hora"] = df_raw["hora"].astype(str).str.zfill(4)
-        df_raw["datahora"] = pd.to_datetime(
-            df_raw["data"].astype(str) + " " + df_raw["hora"].str[:2] + ":" + df_raw["hora"].str[2:],
-            format="%Y-%m-%d %H:%M",
-            errors="coerce"
-        )
-    else:
-        raise ValueError("Colunas de data e hora nao reconhecidas. Use 'datahora' ou 'data' e 'hora'.")
+    with etapa("data_handler.conversao_datas"):
+        if "datahora" in df_raw.columns:
+            df_raw["datahora"] = pd.to_datetime(df_raw["datahora"], errors='coerce')
+        elif "data" in df_raw.columns and "hora" in df_raw.columns:
+            df_raw["hora"] = df_raw["hora"].astype(str).str.zfill(4)
+            df_raw["datahora"] = pd.to_datetime(
+                df_raw["data"].astype(str) + " " + df_raw["hora"].str[:2] + ":" + df_raw["hora"].str[2:],
+                format="%Y-%m-%d %H:%M",
+                errors="coerce"
+            )
+        else:
+            raise ValueError("Colunas de data e hora nao reconhecidas. Use 'datahora' ou 'data' e 'hora'.")
 
     df_raw = df_raw.dropna(subset=["datahora", "precipitacao"])
     df = df_raw[["datahora", "precipitacao"]].sort_values("datahora").set_index("datahora")
@@ -0,0 +1,132 @@
+# diagnostico.py
+
+import functools
+import json
+import threading
+import time
+
+import pandas as pd
+
+# Registro global de medicoes. Desativado por padrao: enquanto estiver
+# desligado, etapa() devolve um contexto nulo compartilhado e medido() chama a
+# funcao original diretamente, de modo que o custo e apenas um teste de flag.
+_ATIVO = False
+_TRAVA = threading.Lock()
+_REGISTRO = {}
+
+_CAMPOS = ("chamadas", "tempo_total_s", "tempo_max_s", "linhas", "consultas_cache", "falhas_cache")
+
+
+class _ContextoNulo:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULO = _ContextoNulo()
+
+
+class _Medicao:
+    def __init__(self, nome, linhas):
+        self.nome = nome
+        self.linhas = linhas
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        duracao = time.perf_counter() - self.inicio
+        with _TRAVA:
+            item = _item(self.nome)
+            item["chamadas"] += 1
+            item["tempo_total_s"] += duracao
+            item["tempo_max_s"] = max(item["tempo_max_s"], duracao)
+            item["linhas"] += int(self.linhas or 0)
+        return False
+
+
+def _item(nome):
+    if nome not in _REGISTRO:
+        _REGISTRO[nome] = dict.fromkeys(_CAMPOS, 0)
+        _REGISTRO[nome]["tempo_total_s"] = 0.0
+        _REGISTRO[nome]["tempo_max_s"] = 0.0
+    return _REGISTRO[nome]
+
+def ativar():
+    """Liga a coleta de medicoes."""
+    global _ATIVO
+    _ATIVO = True
+
+def desativar():
+    """Desliga a coleta de medicoes (os dados ja coletados sao mantidos)."""
+    global _ATIVO
+    _ATIVO = False
+
+def ativo():
+    return _ATIVO
+
+def limpar():
+    """Descarta todas as medicoes registradas."""
+    with _TRAVA:
+        _REGISTRO.clear()
+
+def etapa(nome, linhas=0):
+    """Contexto que mede o tempo de uma etapa: `with etapa('idf.gumbel_fit'): ...`."""
+    if not _ATIVO:
+        return _NULO
+    return _Medicao(nome, linhas)
+
+def medido(nome):
+    """Decorador que mede cada chamada da funcao decorada."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            if not _ATIVO:
+                return funcao(*args, **kwargs)
+            with _Medicao(nome, 0):
+                return funcao(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+def contar_linhas(nome, linhas):
+    """Acumula o numero de linhas processadas por uma etapa."""
+    if not _ATIVO:
+        return
+    with _TRAVA:
+        _item(nome)["linhas"] += int(linhas)
+
+def registrar_consulta_cache(nome):
+    """Registra uma consulta a uma funcao com cache."""
+    if not _ATIVO:
+        return
+    with _TRAVA:
+        _item(nome)["consultas_cache"] += 1
+
+def registrar_falha_cache(nome):
+    """Registra que a funcao com cache precisou ser executada (cache miss)."""
+    if not _ATIVO:
+        return
+    with _TRAVA:
+        _item(nome)["falhas_cache"] += 1
+
+def resumo():
+    """Retorna as medicoes como DataFrame, ordenado pelo tempo total."""
+    with _TRAVA:
+        linhas = [{"etapa": nome, **valores} for nome, valores in _REGISTRO.items()]
+    colunas = ["etapa", *_CAMPOS, "tempo_medio_s", "acertos_cache"]
+    if not linhas:
+        return pd.DataFrame(columns=colunas)
+    df = pd.DataFrame(linhas)
+    df["tempo_medio_s"] = df["tempo_total_s"] / df["chamadas"].where(df["chamadas"] > 0)
+    df["acertos_cache"] = (df["consultas_cache"] - df["falhas_cache"]).clip(lower=0)
+    return df[colunas].sort_values("tempo_total_s", ascending=False).reset_index(drop=True)
+
+def exportar_json():
+    """Exporta as medicoes em JSON (etapa -> contadores)."""
+    with _TRAVA:
+        conteudo = {nome: dict(valores) for nome, valores in _REGISTRO.items()}
+    for valores in conteudo.values():
+        valores["acertos_cache"] = max(valores["consultas_cache"] - valores["falhas_cache"], 0)
+    return json.dumps({"ativo": _ATIVO, "etapas": conteudo}, indent=2, ensure_ascii=False)
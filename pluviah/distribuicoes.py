@@ -0,0 +1,170 @@
+# distribuicoes.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import gumbel_r, pearson3, genextreme, gamma, lognorm, genpareto, kstest
+from diagnostico import etapa, medido
+
+
+class _Log10:
+    """Distribuicao de X quando log10(X) segue a distribuicao congelada `base`."""
+
+    def __init__(self, base):
+        self.base = base
+
+    def cdf(self, x):
+        x = np.asarray(x, dtype=float)
+        return self.base.cdf(np.log10(np.maximum(x, 1e-300)))
+
+    def ppf(self, p):
+        return 10 ** self.base.ppf(p)
+
+    def logpdf(self, x):
+        x = np.asarray(x, dtype=float)
+        return self.base.logpdf(np.log10(x)) - np.log(x * np.log(10))
+
+
+def _ajuste_lp3(x):
+    # Mesmo ajuste por momentos dos logaritmos usado em calculate_idf_curves
+    dados_log = np.log10(x[x > 0])
+    skew = pd.Series(dados_log).skew()
+    return (skew, np.mean(dados_log), np.std(dados_log, ddof=1))
+
+def _ajuste_lp3_mv(x):
+    # Maxima verossimilhanca de Pearson III nos log10, partindo dos momentos.
+    # O jacobiano da mudanca de variavel nao depende dos parametros, entao o
+    # maximo coincide com o da verossimilhanca na escala original.
+    skew, media, desvio = _ajuste_lp3(x)
+    return pearson3.fit(np.log10(x[x > 0]), skew, loc=media, scale=desvio)
+
+MAXIMA_VEROSSIMILHANCA = "MV"
+MOMENTOS = "momentos"
+
+# Registro de distribuicoes candidatas: nome -> (ajuste(x) -> parametros,
+# congelar(parametros) -> objeto com cdf/ppf/logpdf na escala original,
+# numero de parametros livres, metodo de ajuste). So os ajustes por maxima
+# verossimilhanca entram no ranking por AIC/BIC: o AIC de um ajuste por
+# momentos nao e comparavel ao dos demais.
+DISTRIBUICOES = {}
+
+def registrar_distribuicao(nome, ajuste, congelar, n_params, metodo=MAXIMA_VEROSSIMILHANCA):
+    """Adiciona (ou substitui) uma distribuicao candidata no registro."""
+    DISTRIBUICOES[nome] = (ajuste, congelar, n_params, metodo)
+
+registrar_distribuicao("Gumbel", gumbel_r.fit, lambda p: gumbel_r(*p), 2)
+registrar_distribuicao("Log-Pearson III", _ajuste_lp3, lambda p: _Log10(pearson3(*p)), 3, metodo=MOMENTOS)
+registrar_distribuicao("Log-Pearson III (MV)", _ajuste_lp3_mv, lambda p: _Log10(pearson3(*p)), 3)
+registrar_distribuicao("GEV", genextreme.fit, lambda p: genextreme(*p), 3)
+registrar_distribuicao("Gama", lambda x: gamma.fit(x, floc=0), lambda p: gamma(*p), 2)
+registrar_distribuicao("Log-Normal 2", lambda x: lognorm.fit(x, floc=0), lambda p: lognorm(*p), 2)
+registrar_distribuicao("Log-Normal 3", lognorm.fit, lambda p: lognorm(*p), 3)
+registrar_distribuicao("Pearson III", pearson3.fit, lambda p: pearson3(*p), 3)
+registrar_distribuicao("GPD", genpareto.fit, lambda p: genpareto(*p), 3)
+
+
+def estatistica_anderson_darling(x, cdf):
+    """Estatistica A² de Anderson-Darling para uma amostra e uma CDF ajustada."""
+    x = np.sort(np.asarray(x, dtype=float))
+    n = len(x)
+    F = np.clip(cdf(x), 1e-12, 1 - 1e-12)
+    i = np.arange(1, n + 1)
+    return -n - np.mean((2 * i - 1) * (np.log(F) + np.log(1 - F[::-1])))
+
+def ajustar_uma(nome, duracao, valores):
+    """Ajusta uma distribuicao do registro a uma serie e retorna uma linha de resultados."""
+    ajuste, congelar, k, metodo = DISTRIBUICOES[nome]
+    x = np.asarray(valores, dtype=float)
+    n = len(x)
+    linha = {"duracao": duracao, "distribuicao": nome, "metodo_ajuste": metodo, "n": n, "n_params": k}
+    try:
+        parametros = tuple(float(p) for p in ajuste(x))
+        dist = congelar(parametros)
+        log_v = float(np.sum(dist.logpdf(x)))
+        if not np.isfinite(log_v):
+            raise ValueError("verossimilhanca nao finita")
+        ks = kstest(x, dist.cdf)
+        linha.update({
+            "parametros": parametros,
+            "log_verossimilhanca": log_v,
+            "aic": 2 * k - 2 * log_v,
+            "bic": k * np.log(n) - 2 * log_v,
+            "ks_stat": ks.statistic,
+            "ks_p": ks.pvalue,
+            "ad_stat": estatistica_anderson_darling(x, dist.cdf),
+            "erro": None,
+        })
+    except Exception as e:
+        linha.update({"parametros": None, "log_verossimilhanca": np.nan, "aic": np.nan, "bic": np.nan,
+                      "ks_stat": np.nan, "ks_p": np.nan, "ad_stat": np.nan, "erro": str(e)})
+    return linha
+
+def _executor(tipo, max_workers):
+    if tipo == "processo":
+        return ProcessPoolExecutor(max_workers=max_workers)
+    if tipo == "thread":
+        return ThreadPoolExecutor(max_workers=max_workers)
+    raise ValueError(f"Executor '{tipo}' invalido. Use 'processo', 'thread' ou None.")
+
+@medido("distribuicoes.ajustar_distribuicoes")
+def ajustar_distribuicoes(maximas_por_duracao, distribuicoes=None, executor="processo", max_workers=None,
+                          alfa_ks=0.05):
+    """
+    Ajusta todas as distribuicoes candidatas a todas as duracoes em paralelo.
+
+    `maximas_por_duracao` e um dicionario {duracao: serie de maximas anuais}.
+    Retorna uma tabela tidy com uma linha por (duracao, distribuicao), com o
+    metodo de ajuste, AIC, BIC, KS e Anderson-Darling, a posicao no ranking por
+    AIC e BIC dentro de cada duracao e a indicacao do melhor modelo (menor AIC
+    entre os aceitos no teste KS; se nenhum for aceito, menor AIC). Ajustes
+    por momentos ficam fora do ranking (rank NaN, nunca o melhor).
+    """
+    nomes = list(DISTRIBUICOES) if distribuicoes is None else list(distribuicoes)
+    tarefas = [(nome, duracao, np.asarray(serie, dtype=float))
+               for duracao, serie in maximas_por_duracao.items() if len(serie) >= 5
+               for nome in nomes]
+
+    with etapa("distribuicoes.ajustes", linhas=len(tarefas)):
+        max_workers = max_workers or min(len(tarefas), os.cpu_count() or 1)
+        if executor is None or max_workers <= 1:
+            linhas = [ajustar_uma(*t) for t in tarefas]
+        else:
+            with _executor(executor, max_workers) as pool:
+                linhas = list(pool.map(ajustar_uma, *zip(*tarefas)))
+
+    colunas = ["duracao", "distribuicao", "metodo_ajuste", "n", "n_params", "parametros", "log_verossimilhanca",
+               "aic", "bic", "ks_stat", "ks_p", "ad_stat", "erro"]
+    df = pd.DataFrame(linhas, columns=colunas)
+    if df.empty:
+        return df.assign(rank_aic=[], rank_bic=[], aceita_ks=[], melhor=[])
+
+    comparavel = df["metodo_ajuste"] == MAXIMA_VEROSSIMILHANCA
+    df["rank_aic"] = df["aic"].where(comparavel).groupby(df["duracao"]).rank(method="min")
+    df["rank_bic"] = df["bic"].where(comparavel).groupby(df["duracao"]).rank(method="min")
+    df["aceita_ks"] = df["ks_p"] > alfa_ks
+    # Penaliza quem falhou no KS para que o melhor seja escolhido entre os aceitos
+    aic = df["aic"].where(comparavel)
+    aceito = df["aceita_ks"] & comparavel
+    criterio = aic + np.where(aceito, 0.0, np.inf)
+    criterio = criterio.where(aceito.groupby(df["duracao"]).transform("any"), aic)
+    df["melhor"] = criterio == criterio.groupby(df["duracao"]).transform("min")
+    return df.sort_values(["duracao", "rank_aic"]).reset_index(drop=True)
+
+def tabela_quantis(resultados, trs):
+    """
+    Converte uma tabela de ajustes em quantis tidy: uma linha por
+    (duracao, distribuicao, TR) com precipitacao (mm) e intensidade (mm/h).
+    """
+    trs = np.asarray(trs, dtype=float)
+    linhas = []
+    for _, r in resultados.dropna(subset=["aic"]).iterrows():
+        _, congelar, _, _ = DISTRIBUICOES[r["distribuicao"]]
+        alturas = congelar(r["parametros"]).ppf(1 - 1 / trs)
+        for tr, p in zip(trs, alturas):
+            linhas.append({"duracao": r["duracao"], "distribuicao": r["distribuicao"],
+                           "metodo_ajuste": r["metodo_ajuste"], "TR (anos)": tr,
+                           "precipitacao_mm": float(p), "intensidade_mm_h": float(p) / r["duracao"],
+                           "melhor": bool(r["melhor"])})
+    return pd.DataFrame(linhas)
@@ -0,0 +1,130 @@
+# escoamento_variado.py
+
+import numpy as np
+import pandas as pd
+from config import G
+from manning import geom_trapezio_vetor, y_normal_vetor, y_critico_vetor, bissecao_vetorial
+from diagnostico import etapa, medido
+
+# Perfis de linha d'agua em escoamento gradualmente variado para canais
+# prismaticos trapezoidais. Os parametros (Q, b, z, S0, n) podem ser escalares
+# ou arrays 1D com um valor por perfil; os resultados tem forma
+# (n_perfis, n_pontos).
+
+def _coluna(valor):
+    return np.asarray(valor, dtype=float).reshape(-1, 1)
+
+def _grandezas(Q, b, z, n, y):
+    """Energia especifica (m) e declividade da linha de energia Sf para arrays de y."""
+    A, P, _ = geom_trapezio_vetor(b, z, y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        V = Q / A
+        R = A / P
+        Sf = (n * V) ** 2 / R ** (4.0 / 3.0)
+    return y + V**2 / (2.0 * G), Sf
+
+def classificar_perfil(y, yn, yc, S0, tol=1e-3):
+    """
+    Classifica o tipo de perfil (M1, M2, M3, S1, S2, S3, C1, C3, H2, H3, A2, A3)
+    pela posicao de y em relacao a yn e yc e pela declividade do fundo. Aceita arrays.
+    """
+    y, yn, yc, S0 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (y, yn, yc, S0)))
+    critico = np.abs(yn - yc) <= tol * np.maximum(yc, 1e-12)
+    fraco = (S0 > 0) & (yn > yc) & ~critico
+    forte = (S0 > 0) & (yn < yc) & ~critico
+
+    tipo = np.full(y.shape, "", dtype=object)
+    tipo[fraco] = np.where(y[fraco] > yn[fraco], "M1", np.where(y[fraco] > yc[fraco], "M2", "M3"))
+    tipo[forte] = np.where(y[forte] > yc[forte], "S1", np.where(y[forte] > yn[forte], "S2", "S3"))
+    c = (S0 > 0) & critico
+    tipo[c] = np.where(y[c] > yc[c], "C1", "C3")
+    h = S0 == 0
+    tipo[h] = np.where(y[h] > yc[h], "H2", "H3")
+    a = S0 < 0
+    tipo[a] = np.where(y[a] > yc[a], "A2", "A3")
+    return tipo if tipo.ndim else tipo.item()
+
+@medido("escoamento_variado.passo_direto")
+def perfil_passo_direto(Q, b, z, S0, n, y_inicio, y_fim, n_pontos=100):
+    """
+    Metodo do passo direto: fixa as profundidades entre y_inicio e y_fim e
+    calcula a distancia entre elas por dx = dE / (S0 - Sf_medio). Todas as
+    estacoes e todos os perfis sao calculados de uma vez (sem laco).
+    Retorna (x, y, tipos): x em metros a partir da secao de y_inicio,
+    positivo para jusante.
+    """
+    Q, b, z, S0, n, y_inicio, y_fim = np.broadcast_arrays(
+        *(_coluna(v) for v in (Q, b, z, S0, n, y_inicio, y_fim)))
+    y = y_inicio + (y_fim - y_inicio) * np.linspace(0.0, 1.0, n_pontos)
+
+    with etapa("escoamento_variado.passo_direto", linhas=y.size):
+        E, Sf = _grandezas(Q, b, z, n, y)
+        Sf_medio = 0.5 * (Sf[:, 1:] + Sf[:, :-1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dx = np.diff(E, axis=-1) / (S0 - Sf_medio)
+        x = np.concatenate([np.zeros((y.shape[0], 1)), np.cumsum(dx, axis=-1)], axis=-1)
+
+    yn = y_normal_vetor(Q, b, z, np.where(S0 > 0, S0, np.nan), n)
+    yc = y_critico_vetor(Q, b, z)
+    return x, y, classificar_perfil(y, yn, yc, S0)
+
+@medido("escoamento_variado.passo_padrao")
+def perfil_passo_padrao(Q, b, z, S0, n, x, y_controle, sentido="montante", y_max=50.0):
+    """
+    Metodo do passo padrao em estacoes x fixas (m, crescentes para jusante),
+    resolvendo a equacao de energia entre estacoes consecutivas:
+    z1 + E1 = z2 + E2 + dx * (Sf1 + Sf2) / 2.
+
+    sentido="montante": controle na ultima estacao (jusante), calculo para
+    montante no ramo subcritico (remanso de bueiros, por exemplo).
+    sentido="jusante": controle na primeira estacao, calculo para jusante no
+    ramo supercritico.
+
+    O avanco entre estacoes e sequencial, mas cada passo resolve todos os
+    perfis simultaneamente. Retorna (y, tipos) com forma (n_perfis, n_estacoes);
+    NaN indica que nao ha solucao no ramo (escoamento passaria pelo critico).
+    """
+    Q, b, z, S0, n = np.broadcast_arrays(*(_coluna(v) for v in (Q, b, z, S0, n)))
+    x = np.asarray(x, dtype=float)
+    n_perfis, n_estacoes = Q.shape[0], len(x)
+    cota_fundo = -S0 * (x - x[0])
+    yc = y_critico_vetor(Q, b, z)
+
+    y = np.full((n_perfis, n_estacoes), np.nan)
+    if sentido == "montante":
+        ordem = range(n_estacoes - 1, -1, -1)
+        sinal = 1.0
+    elif sentido == "jusante":
+        ordem = range(n_estacoes)
+        sinal = -1.0
+    else:
+        raise ValueError("sentido deve ser 'montante' ou 'jusante'.")
+    ordem = list(ordem)
+
+    y[:, ordem[0]] = np.broadcast_to(np.asarray(y_controle, dtype=float).ravel(), (n_perfis,))
+    with etapa("escoamento_variado.passo_padrao", linhas=n_perfis * n_estacoes):
+        for k, j in zip(ordem[:-1], ordem[1:]):
+            E_k, Sf_k = _grandezas(Q, b, z, n, y[:, [k]])
+            H_k = cota_fundo[:, [k]] + E_k
+            dx = abs(x[j] - x[k])
+
+            def residuo(yj):
+                E_j, Sf_j = _grandezas(Q, b, z, n, yj)
+                return cota_fundo[:, [j]] + E_j - H_k - sinal * dx * 0.5 * (Sf_k + Sf_j)
+
+            if sentido == "montante":
+                y[:, [j]] = bissecao_vetorial(residuo, yc, np.full(yc.shape, y_max))
+            else:
+                y[:, [j]] = bissecao_vetorial(residuo, np.full(yc.shape, 1e-4), yc)
+
+    yn = y_normal_vetor(Q, b, z, np.where(S0 > 0, S0, np.nan), n)
+    return y, classificar_perfil(y, yn, yc, S0)
+
+def tabela_perfil(x, y, tipos, perfil=0):
+    """Monta um DataFrame (estacao, profundidade, tipo) para um dos perfis calculados."""
+    x = np.broadcast_to(x, np.shape(y))
+    return pd.DataFrame({
+        "Estação (m)": x[perfil],
+        "Profundidade (m)": y[perfil],
+        "Tipo": tipos[perfil],
+    })
@@ -0,0 +1,141 @@
+# espacial.py
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from idf import intensidade_equacao_idf
+from diagnostico import etapa, medido
+
+# Interpolacao espacial de parametros IDF (ou quantis) por estacao para
+# coordenadas de projeto. As estacoes ficam em uma arvore KD e cada consulta
+# busca apenas os k vizinhos mais proximos, de modo que lotes de centenas de
+# milhares de pontos sao respondidos sem varrer todas as distancias.
+#
+# Com geograficas=True as coordenadas sao (lon, lat) em graus e os pontos sao
+# levados para a esfera (x, y, z) em km; as distancias informadas sao as do
+# circulo maximo. Com geograficas=False usa-se (x, y) planas (ex.: UTM em m).
+
+RAIO_TERRA_KM = 6371.0088
+
+
+def _cartesianas(coordenadas, geograficas):
+    xy = np.atleast_2d(np.asarray(coordenadas, dtype=float))
+    if xy.shape[-1] != 2:
+        raise ValueError("As coordenadas devem ter duas colunas (lon, lat) ou (x, y).")
+    if not geograficas:
+        return xy
+    lon, lat = np.radians(xy[:, 0]), np.radians(xy[:, 1])
+    return RAIO_TERRA_KM * np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+class IndiceEspacial:
+    """
+    Indice KD das estacoes com uma tabela de valores por estacao (uma linha por
+    estacao, na mesma ordem das coordenadas). Qualquer coluna numerica pode ser
+    interpolada: parametros da equacao IDF (K, a, b, c), parametros Gumbel/LP3
+    ou quantis de chuva.
+    """
+
+    def __init__(self, coordenadas, valores, geograficas=True):
+        self.geograficas = geograficas
+        self.valores = pd.DataFrame(valores).reset_index(drop=True)
+        self._pontos = _cartesianas(coordenadas, geograficas)
+        if len(self._pontos) != len(self.valores):
+            raise ValueError("Numero de coordenadas diferente do numero de linhas de valores.")
+        self._arvore = cKDTree(self._pontos)
+        self._matriz = self.valores.to_numpy(dtype=float)
+
+    def __len__(self):
+        return len(self._pontos)
+
+    def _distancia_busca(self, distancia):
+        # Distancia no circulo maximo (km) -> corda na esfera
+        if distancia is None:
+            return np.inf
+        if self.geograficas:
+            return 2 * RAIO_TERRA_KM * np.sin(min(distancia / (2 * RAIO_TERRA_KM), np.pi / 2))
+        return distancia
+
+    def _distancia_real(self, corda):
+        if not self.geograficas:
+            return corda
+        with np.errstate(invalid='ignore'):
+            return 2 * RAIO_TERRA_KM * np.arcsin(np.clip(corda / (2 * RAIO_TERRA_KM), 0.0, 1.0))
+
+    def vizinhos(self, pontos, k=4, distancia_max=None):
+        """
+        Indices e distancias dos k vizinhos de cada ponto (matrizes pontos x k).
+        Vizinhos alem de distancia_max ficam com indice -1 e distancia inf.
+        """
+        k = min(k, len(self))
+        alvo = _cartesianas(pontos, self.geograficas)
+        with etapa("espacial.consulta_kdtree", linhas=len(alvo)):
+            d, idx = self._arvore.query(alvo, k=k, distance_upper_bound=self._distancia_busca(distancia_max),
+                                        workers=-1)
+        d, idx = d.reshape(len(alvo), k), idx.reshape(len(alvo), k)
+        idx = np.where(idx >= len(self), -1, idx)
+        return idx, np.where(idx >= 0, self._distancia_real(d), np.inf)
+
+    @medido("espacial.interpolar")
+    def interpolar(self, pontos, k=4, metodo="idw", potencia=2.0, distancia_max=None, colunas=None):
+        """
+        Valores interpolados em cada ponto por IDW (peso 1/d^potencia) ou pela
+        media simples dos k vizinhos ("vizinhos"). Pontos sobre uma estacao
+        recebem o valor da estacao; pontos sem vizinho dentro de distancia_max
+        ficam com NaN. Retorna um DataFrame com uma linha por ponto.
+        """
+        if metodo not in ("idw", "vizinhos"):
+            raise ValueError(f"Metodo de interpolacao '{metodo}' invalido.")
+        colunas = list(self.valores.columns) if colunas is None else list(colunas)
+        matriz = self._matriz[:, [self.valores.columns.get_loc(c) for c in colunas]]
+        idx, d = self.vizinhos(pontos, k, distancia_max)
+        valido = idx >= 0
+
+        with etapa("espacial.pesos", linhas=idx.size):
+            if metodo == "idw":
+                with np.errstate(divide='ignore'):
+                    pesos = np.where(valido, 1.0 / np.maximum(d, 1e-300) ** potencia, 0.0)
+                # Ponto coincidente com uma estacao: usa so ela
+                exato = valido & (d <= 1e-9)
+                pesos = np.where(exato.any(axis=1, keepdims=True), exato.astype(float), pesos)
+            else:
+                pesos = valido.astype(float)
+            soma = pesos.sum(axis=1, keepdims=True)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                pesos = pesos / soma
+            # (pontos x k) . (pontos x k x colunas) -> pontos x colunas
+            resultado = np.einsum("pk,pkc->pc", pesos, matriz[np.where(valido, idx, 0)])
+
+        df = pd.DataFrame(resultado, columns=colunas)
+        df["distancia_vizinho"] = d[:, 0]
+        df["n_vizinhos"] = valido.sum(axis=1)
+        return df
+
+    def intensidade(self, pontos, tr, duracao_min, **kwargs):
+        """Intensidade (mm/h) da equacao IDF interpolada (colunas K, a, b, c) em cada ponto."""
+        p = self.interpolar(pontos, colunas=["K", "a", "b", "c"], **kwargs)
+        return intensidade_equacao_idf({c: p[c].to_numpy() for c in "Kabc"}, tr, duracao_min)
+
+    @medido("espacial.grade_intensidade")
+    def grade_intensidade(self, limites, resolucao, tr, duracao_min, **kwargs):
+        """
+        Raster de i(T, t) em mm/h sobre limites = (x_min, y_min, x_max, y_max),
+        com celulas de tamanho `resolucao` (graus ou unidades planas). Retorna
+        (eixo_x, eixo_y, grade) com grade[linha, coluna] nos centros das
+        celulas e linhas de norte para sul, como em um raster.
+        """
+        x_min, y_min, x_max, y_max = limites
+        eixo_x = np.arange(x_min + resolucao / 2, x_max, resolucao)
+        eixo_y = np.arange(y_max - resolucao / 2, y_min, -resolucao)
+        xx, yy = np.meshgrid(eixo_x, eixo_y)
+        i = self.intensidade(np.column_stack([xx.ravel(), yy.ravel()]), tr, duracao_min, **kwargs)
+        return eixo_x, eixo_y, np.asarray(i).reshape(xx.shape)
+
+
+def salvar_ascii_grid(caminho, eixo_x, eixo_y, grade, sem_dado=-9999.0):
+    """Grava a saida de grade_intensidade no formato ESRI ASCII Grid (.asc)."""
+    resolucao = abs(eixo_x[1] - eixo_x[0]) if len(eixo_x) > 1 else abs(eixo_y[0] - eixo_y[1])
+    cabecalho = (f"ncols {len(eixo_x)}\nnrows {len(eixo_y)}\n"
+                 f"xllcorner {eixo_x[0] - resolucao / 2:.10g}\nyllcorner {eixo_y[-1] - resolucao / 2:.10g}\n"
+                 f"cellsize {resolucao:.10g}\nNODATA_value {sem_dado:g}")
+    np.savetxt(caminho, np.where(np.isnan(grade), sem_dado, grade), fmt="%.4f", header=cabecalho, comments="")
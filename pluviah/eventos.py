@@ -0,0 +1,120 @@
+# eventos.py
+
+import numpy as np
+import pandas as pd
+from diagnostico import etapa, medido
+
+# Catalogo de eventos de chuva independentes a partir da serie de load_data.
+# Um evento e uma sequencia de registros chuvosos (precipitacao > limiar)
+# separada da seguinte por pelo menos `intervalo_seco_h` horas sem chuva.
+# Toda a segmentacao e vetorizada sobre os registros chuvosos: o intervalo
+# entre registros consecutivos (diff) marca o inicio de cada evento, o cumsum
+# dessas marcas numera os eventos e as estatisticas saem de reducoes por
+# grupo (reduceat), sem laco sobre os registros.
+#
+# Cada registro representa o intervalo de `passo_h` horas que comeca no seu
+# instante. Registros ausentes (falhas removidas por load_data) contam como
+# tempo seco.
+
+COLUNAS = ["inicio", "fim", "duracao (h)", "altura (mm)", "intensidade_media (mm/h)", "intensidade_pico (mm/h)",
+           "tempo_pico (h)", "seco_antecedente (h)", "registros_chuvosos"]
+
+
+def inferir_passo_h(indice):
+    """Passo de tempo (h) mais frequente de um DatetimeIndex ordenado."""
+    if len(indice) < 2:
+        return 1.0
+    dt = np.diff(indice.as_unit("ns").asi8)
+    valores, contagens = np.unique(dt[dt > 0], return_counts=True)
+    if not len(valores):
+        return 1.0
+    return float(pd.Timedelta(int(valores[np.argmax(contagens)]), unit="ns") / pd.Timedelta(hours=1))
+
+@medido("eventos.segmentar_eventos")
+def segmentar_eventos(df, intervalo_seco_h=6.0, limiar_mm=0.0, altura_min_mm=0.0, passo_h=None):
+    """
+    Eventos de chuva da serie `df` (indice datahora, coluna precipitacao).
+
+    intervalo_seco_h: tempo seco minimo (h) entre eventos independentes.
+    limiar_mm: registros com precipitacao <= limiar contam como secos.
+    altura_min_mm: eventos com altura total menor sao descartados (o tempo
+    seco antecedente dos seguintes continua medido a partir deles).
+    passo_h: duracao de cada registro; se None, o passo mais frequente.
+    Retorna um DataFrame com uma linha por evento (colunas COLUNAS).
+    """
+    indice = pd.DatetimeIndex(df.index)
+    if not indice.is_monotonic_increasing:
+        ordem = np.argsort(indice.asi8, kind="stable")
+        indice = indice[ordem]
+        valores = df["precipitacao"].to_numpy(dtype=float)[ordem]
+    else:
+        valores = df["precipitacao"].to_numpy(dtype=float)
+    passo_h = inferir_passo_h(indice) if passo_h is None else float(passo_h)
+
+    with etapa("eventos.segmentacao", linhas=len(valores)):
+        chuvoso = valores > limiar_mm
+        t = indice.as_unit("ns").asi8[chuvoso].astype(float) / 3.6e12  # horas
+        p = valores[chuvoso]
+        if not len(p):
+            return pd.DataFrame(columns=COLUNAS).rename_axis("evento")
+        # Tempo seco entre o fim de um registro chuvoso e o inicio do seguinte
+        seco = np.diff(t) - passo_h
+        novo = np.concatenate([[True], seco >= intervalo_seco_h - 1e-9])
+        inicios = np.flatnonzero(novo)
+        numero = np.cumsum(novo) - 1
+
+    with etapa("eventos.estatisticas", linhas=len(p)):
+        altura = np.add.reduceat(p, inicios)
+        pico = np.maximum.reduceat(p, inicios)
+        # Primeiro registro de cada evento em que ocorre o pico
+        posicoes = np.where(p == pico[numero], np.arange(len(p)), len(p))
+        i_pico = np.minimum.reduceat(posicoes, inicios)
+        fins = np.append(inicios[1:], len(p)) - 1
+
+        t_inicio = t[inicios]
+        t_fim = t[fins] + passo_h
+        duracao = t_fim - t_inicio
+        seco_antecedente = np.concatenate([[np.nan], t_inicio[1:] - t_fim[:-1]])
+
+    instantes = indice[chuvoso]
+    eventos = pd.DataFrame({
+        "inicio": instantes[inicios],
+        "fim": instantes[fins] + pd.Timedelta(hours=passo_h),
+        "duracao (h)": duracao,
+        "altura (mm)": altura,
+        "intensidade_media (mm/h)": altura / duracao,
+        "intensidade_pico (mm/h)": pico / passo_h,
+        "tempo_pico (h)": t[i_pico] - t_inicio,
+        "seco_antecedente (h)": seco_antecedente,
+        "registros_chuvosos": np.diff(np.append(inicios, len(p))),
+    }, columns=COLUNAS)
+    eventos = eventos[eventos["altura (mm)"] >= altura_min_mm].reset_index(drop=True)
+    eventos.index.name = "evento"
+    return eventos
+
+def estatisticas_eventos(eventos):
+    """
+    Resumo do catalogo de eventos: media, mediana, P90 e maximo do numero de
+    eventos por ano e de cada grandeza dos eventos.
+    """
+    grandezas = ["duracao (h)", "altura (mm)", "intensidade_media (mm/h)", "intensidade_pico (mm/h)",
+                 "tempo_pico (h)", "seco_antecedente (h)"]
+    valores = eventos[grandezas]
+    resumo = pd.DataFrame({
+        "média": valores.mean(),
+        "mediana": valores.median(),
+        "P90": valores.quantile(0.9),
+        "máximo": valores.max(),
+    })
+    # Anos sem nenhum evento dentro do periodo contam como zero
+    por_ano = eventos_por_ano(eventos)["eventos"]
+    if len(por_ano):
+        por_ano = por_ano.reindex(range(por_ano.index.min(), por_ano.index.max() + 1), fill_value=0)
+    contagem = pd.DataFrame({"média": por_ano.mean(), "mediana": por_ano.median(),
+                             "P90": por_ano.quantile(0.9), "máximo": por_ano.max()}, index=["eventos por ano"])
+    return pd.concat([contagem, resumo])
+
+def eventos_por_ano(eventos):
+    """Numero de eventos e altura total dos eventos por ano de inicio."""
+    anos = pd.DatetimeIndex(eventos["inicio"]).year.rename("ano")
+    return eventos.groupby(anos).agg(eventos=("altura (mm)", "size"), altura_total_mm=("altura (mm)", "sum"))
@@ -0,0 +1,175 @@
+# gerador.py
+
+import numpy as np
+import pandas as pd
+from diagnostico import etapa
+
+# Parametros mensais padrao para passo horario (jan..dez). Probabilidades de
+# transicao seco->chuvoso (p01) e chuvoso->chuvoso (p11), e alturas por hora
+# chuvosa com distribuicao gama (forma, escala em mm). A sazonalidade suave
+# concentra mais chuva no verao.
+_MESES = np.arange(12)
+_SAZONAL = np.cos(2 * np.pi * _MESES / 12.0)
+PARAMETROS_PADRAO = {
+    "p01": 0.030 + 0.010 * _SAZONAL,
+    "p11": 0.550 + 0.050 * _SAZONAL,
+    "forma": np.full(12, 0.65),
+    "escala": 2.8 + 1.2 * _SAZONAL,
+    # Exponencial mista: com probabilidade alfa usa media1, senao media2
+    "alfa": np.full(12, 0.75),
+    "media1": 0.9 + 0.3 * _SAZONAL,
+    "media2": 6.0 + 2.0 * _SAZONAL,
+}
+
+MODELOS = ("gama", "exponencial_mista")
+
+
+def _ocorrencia_markov(u, p01, p11):
+    """
+    Estados chuvoso/seco de uma cadeia de Markov de 2 estados, sem laco no tempo.
+
+    Com u ~ U(0,1), o proximo estado e (u < p11) se o anterior era chuvoso e
+    (u < p01) se era seco. Quando as duas comparacoes concordam, o estado nao
+    depende do anterior; quando discordam, ele repete o anterior (p11 > p01)
+    ou o inverte (p01 > p11). Basta propagar o ultimo estado determinado e
+    aplicar a paridade das inversoes. Opera no ultimo eixo (tempo).
+    """
+    a = u < p11
+    b = u < p01
+    determinado = a == b
+    inverte = ~determinado & b
+
+    n = u.shape[-1]
+    posicoes = np.where(determinado, np.arange(n), -1)
+    ultimo = np.maximum.accumulate(posicoes, axis=-1)
+    inversoes = np.cumsum(inverte, axis=-1)
+
+    seguro = np.maximum(ultimo, 0)
+    base = np.where(ultimo >= 0, np.take_along_axis(a, seguro, axis=-1), False)
+    inversoes_base = np.where(ultimo >= 0, np.take_along_axis(inversoes, seguro, axis=-1), 0)
+    return base ^ ((inversoes - inversoes_base) % 2 == 1)
+
+def _alturas(rng, meses, modelo, parametros):
+    """Sorteia as alturas de chuva para os instantes chuvosos (array de indices de mes)."""
+    if modelo == "gama":
+        forma = np.asarray(parametros["forma"])[meses]
+        escala = np.asarray(parametros["escala"])[meses]
+        return rng.gamma(forma, escala)
+    if modelo == "exponencial_mista":
+        alfa = np.asarray(parametros["alfa"])[meses]
+        media = np.where(rng.random(len(meses)) < alfa,
+                         np.asarray(parametros["media1"])[meses],
+                         np.asarray(parametros["media2"])[meses])
+        return rng.exponential(media)
+    raise ValueError(f"Modelo de alturas '{modelo}' invalido. Use um de {MODELOS}.")
+
+def _simular(n_series, datas, parametros, modelo, rng):
+    """Simula uma matriz (n_series x n_passos) de precipitacao."""
+    meses = datas.month.values - 1
+    p01 = np.asarray(parametros["p01"])[meses]
+    p11 = np.asarray(parametros["p11"])[meses]
+
+    u = rng.random((n_series, len(datas)))
+    chuvoso = _ocorrencia_markov(u, p01, p11)
+    del u
+
+    valores = np.zeros((n_series, len(datas)), dtype=float)
+    _, colunas = np.nonzero(chuvoso)
+    valores[chuvoso] = _alturas(rng, meses[colunas], modelo, parametros)
+    return valores
+
+def gerar_serie(anos, parametros=None, inicio="2000-01-01", freq="h", modelo="gama", semente=None):
+    """Gera uma serie sintetica de precipitacao no formato retornado por load_data."""
+    parametros = PARAMETROS_PADRAO if parametros is None else parametros
+    rng = np.random.default_rng(semente)
+    datas = pd.date_range(inicio, pd.Timestamp(inicio) + pd.DateOffset(years=anos), freq=freq, inclusive="left")
+    with etapa("gerador.simulacao", linhas=len(datas)):
+        valores = _simular(1, datas, parametros, modelo, rng)[0]
+    return pd.DataFrame({"precipitacao": valores}, index=pd.DatetimeIndex(datas, name="datahora"))
+
+def gerar_estacoes(n_estacoes, anos, parametros=None, inicio="2000-01-01", freq="h", modelo="gama",
+                   semente=None, estacoes_por_bloco=50):
+    """
+    Gera series para varias estacoes em formato longo (station_id, datahora, precipitacao).
+    As estacoes sao simuladas em blocos para limitar o uso de memoria.
+    """
+    parametros = PARAMETROS_PADRAO if parametros is None else parametros
+    rng = np.random.default_rng(semente)
+    datas = pd.date_range(inicio, pd.Timestamp(inicio) + pd.DateOffset(years=anos), freq=freq, inclusive="left")
+
+    blocos = []
+    for primeira in range(0, n_estacoes, estacoes_por_bloco):
+        n_bloco = min(estacoes_por_bloco, n_estacoes - primeira)
+        with etapa("gerador.simulacao", linhas=n_bloco * len(datas)):
+            valores = _simular(n_bloco, datas, parametros, modelo, rng)
+        blocos.append(pd.DataFrame({
+            "station_id": np.repeat(np.arange(primeira, primeira + n_bloco), len(datas)),
+            "datahora": np.tile(datas.values, n_bloco),
+            "precipitacao": valores.ravel(),
+        }))
+    return pd.concat(blocos, ignore_index=True)
+
+def calibrar(df, limiar=0.1, iteracoes_em=30):
+    """
+    Estima os parametros mensais do gerador a partir de uma serie de load_data.
+    Assume passo regular; instantes com chuva >= limiar sao considerados chuvosos.
+    """
+    valores = df["precipitacao"].to_numpy(dtype=float)
+    meses = df.index.month.values - 1
+    chuvoso = valores >= limiar
+
+    # Transicoes entre passos consecutivos, contadas pelo mes do passo de destino
+    anterior, atual, mes = chuvoso[:-1], chuvoso[1:], meses[1:]
+    n01 = np.bincount(mes, weights=~anterior & atual, minlength=12)
+    n0 = np.bincount(mes, weights=~anterior, minlength=12)
+    n11 = np.bincount(mes, weights=anterior & atual, minlength=12)
+    n1 = np.bincount(mes, weights=anterior, minlength=12)
+
+    padrao = PARAMETROS_PADRAO
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p01 = np.where(n0 > 0, n01 / n0, padrao["p01"])
+        p11 = np.where(n1 > 0, n11 / n1, padrao["p11"])
+
+        # Gama pelo metodo dos momentos
+        alturas, mes_chuva = valores[chuvoso], meses[chuvoso]
+        contagem = np.bincount(mes_chuva, minlength=12)
+        media = np.bincount(mes_chuva, weights=alturas, minlength=12) / contagem
+        variancia = np.bincount(mes_chuva, weights=alturas**2, minlength=12) / contagem - media**2
+        valido = (contagem >= 2) & (variancia > 0)
+        forma = np.where(valido, media**2 / variancia, padrao["forma"])
+        escala = np.where(valido, variancia / media, padrao["escala"])
+
+        # Exponencial mista por EM, vetorizado entre os meses
+        alfa = np.full(12, 0.7)
+        media1 = np.where(valido, 0.5 * media, padrao["media1"])
+        media2 = np.where(valido, 2.0 * media, padrao["media2"])
+        for _ in range(iteracoes_em):
+            a, m1, m2 = alfa[mes_chuva], media1[mes_chuva], media2[mes_chuva]
+            f1 = a / m1 * np.exp(-alturas / m1)
+            f2 = (1 - a) / m2 * np.exp(-alturas / m2)
+            r = f1 / (f1 + f2)
+            soma_r = np.bincount(mes_chuva, weights=r, minlength=12)
+            alfa = np.where(valido, soma_r / contagem, alfa)
+            media1 = np.where(valido, np.bincount(mes_chuva, weights=r * alturas, minlength=12) / soma_r, media1)
+            media2 = np.where(valido, np.bincount(mes_chuva, weights=(1 - r) * alturas, minlength=12)
+                              / (contagem - soma_r), media2)
+
+    return {
+        "p01": p01, "p11": p11, "forma": forma, "escala": escala,
+        "alfa": np.clip(alfa, 0.0, 1.0), "media1": media1, "media2": media2,
+    }
+
+def salvar_csv(df, caminho):
+    """Grava uma serie (saida de gerar_serie) no esquema CSV aceito por load_data."""
+    saida = df.reset_index() if "datahora" not in df.columns else df
+    saida[["datahora", "precipitacao"]].to_csv(
+        caminho, index=False, date_format="%Y-%m-%d %H:%M:%S", float_format="%.2f"
+    )
+
+def salvar_parquet(df_estacoes, caminho, linhas_por_grupo=8784):
+    """
+    Grava series de varias estacoes (saida de gerar_estacoes) em Parquet
+    particionado por station_id. Requer pyarrow.
+    """
+    df_estacoes.to_parquet(caminho, partition_cols=["station_id"], index=False,
+                           row_group_size=linhas_por_grupo)
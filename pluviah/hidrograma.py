@@ -0,0 +1,163 @@
+# hidrograma.py
+
+import numpy as np
+import pandas as pd
+from scipy.signal import fftconvolve
+from idf import intensidade_equacao_idf
+from diagnostico import etapa, medido
+
+# Todas as funcoes trabalham em lote: cada linha dos arrays 2D e uma bacia
+# (ou cenario) e o ultimo eixo e o tempo. Parametros escalares valem para
+# todas as linhas; arrays 1D sao aplicados linha a linha.
+
+def _coluna(valor):
+    return np.asarray(valor, dtype=float).reshape(-1, 1)
+
+def _params_coluna(params_idf):
+    return {chave: _coluna(valor) for chave, valor in params_idf.items()}
+
+def _altura_idf(params_idf, tr, t_min):
+    """Altura de chuva (mm) de duracao t pela equacao IDF."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(t_min > 0, intensidade_equacao_idf(params_idf, tr, t_min) * t_min / 60.0, 0.0)
+
+# --- Hietogramas de Projeto ---
+
+@medido("hidrograma.hietograma_blocos_alternados")
+def hietograma_blocos_alternados(params_idf, tr, duracao_min, dt_min, posicao_pico=0.5):
+    """
+    Hietograma pelo metodo dos blocos alternados. Retorna alturas (mm) por
+    intervalo, com forma (n_bacias, n_intervalos).
+    """
+    params = _params_coluna(params_idf)
+    n_blocos = int(round(duracao_min / dt_min))
+    t = np.arange(1, n_blocos + 1) * dt_min
+    incrementos = np.diff(_altura_idf(params, _coluna(tr), t), prepend=0.0, axis=-1)
+
+    # Maior bloco na posicao do pico, os seguintes alternando a direita e a esquerda
+    ordem = -np.sort(-incrementos, axis=-1)
+    pico = min(int(posicao_pico * n_blocos), n_blocos - 1)
+    posicoes = [pico]
+    esquerda, direita = pico - 1, pico + 1
+    while len(posicoes) < n_blocos:
+        if direita < n_blocos:
+            posicoes.append(direita)
+            direita += 1
+        if esquerda >= 0 and len(posicoes) < n_blocos:
+            posicoes.append(esquerda)
+            esquerda -= 1
+    hietograma = np.empty_like(ordem)
+    hietograma[:, posicoes] = ordem
+    return hietograma
+
+@medido("hidrograma.hietograma_chicago")
+def hietograma_chicago(params_idf, tr, duracao_min, dt_min, r=0.5):
+    """
+    Hietograma de Chicago (Keifer e Chu). Para qualquer duracao t centrada no
+    pico (fracao r antes dele), a altura acumulada reproduz a altura IDF P(t).
+    Retorna alturas (mm) por intervalo, com forma (n_bacias, n_intervalos).
+    """
+    params = _params_coluna(params_idf)
+    tr = _coluna(tr)
+    n_blocos = int(round(duracao_min / dt_min))
+    x = np.arange(n_blocos + 1) * dt_min
+    t_pico = r * duracao_min
+
+    total_antes = r * _altura_idf(params, tr, duracao_min)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        antes = total_antes - r * _altura_idf(params, tr, np.maximum(t_pico - x, 0.0) / max(r, 1e-12))
+        depois = total_antes + (1 - r) * _altura_idf(params, tr, np.maximum(x - t_pico, 0.0) / max(1 - r, 1e-12))
+    acumulada = np.where(x < t_pico, antes, depois)
+    return np.diff(acumulada, axis=-1)
+
+# --- Chuva Efetiva ---
+
+@medido("hidrograma.chuva_efetiva_scs")
+def chuva_efetiva_scs(hietograma_mm, CN, lambda_ia=0.2):
+    """
+    Chuva efetiva por intervalo (mm) pelo metodo SCS-CN:
+    Pe = (P - Ia)² / (P - Ia + S), com S = 25400/CN - 254 e Ia = lambda * S,
+    aplicado a chuva acumulada.
+    """
+    P = np.cumsum(np.atleast_2d(hietograma_mm), axis=-1)
+    S = 25400.0 / _coluna(CN) - 254.0
+    Ia = lambda_ia * S
+    excesso = np.maximum(P - Ia, 0.0)
+    # Com CN = 100, S = Ia = 0 e o quociente seria 0/0 enquanto nao chove
+    Pe = np.divide(excesso ** 2, excesso + S, out=np.zeros_like(excesso), where=excesso > 0)
+    return np.diff(Pe, prepend=0.0, axis=-1)
+
+# --- Hidrograma Unitario e Convolucao ---
+
+def hidrograma_unitario_scs(A_km2, tc_min, dt_min):
+    """
+    Hidrograma unitario triangular do SCS (m³/s por mm de chuva efetiva):
+    tp = dt/2 + 0.6 tc, tb = 2.67 tp. As ordenadas sao normalizadas para que o
+    volume seja exatamente 1 mm sobre a area. Retorna (n_bacias, n_ordenadas).
+    """
+    A = _coluna(A_km2)
+    tc = _coluna(tc_min)
+    A, tc = np.broadcast_arrays(A, tc)
+    tp = dt_min / 2.0 + 0.6 * tc
+    tb = 2.67 * tp
+    n = int(np.ceil(tb.max() / dt_min)) + 1
+    t = np.arange(n) * dt_min
+    forma = np.where(t <= tp, t / tp, np.maximum((tb - t) / (tb - tp), 0.0))
+    volume = 1000.0 * A  # 1 mm sobre A km² em m³
+    return forma * volume / (forma.sum(axis=-1, keepdims=True) * dt_min * 60.0)
+
+@medido("hidrograma.convoluir")
+def convoluir(chuva_efetiva_mm, hidrograma_unitario):
+    """
+    Convolucao discreta linha a linha (chuva efetiva x hidrograma unitario)
+    feita por FFT, O(n log n) por bacia. Retorna vazoes (m³/s).
+    """
+    pe = np.atleast_2d(chuva_efetiva_mm)
+    uh = np.atleast_2d(hidrograma_unitario)
+    with etapa("hidrograma.fft", linhas=pe.size):
+        q = fftconvolve(pe, uh, axes=-1)
+    # Remove o ruido numerico da FFT em torno de zero
+    return np.maximum(q, 0.0)
+
+def hidrograma_projeto(params_idf, tr, duracao_min, dt_min, A_km2, tc_min, CN, metodo="blocos_alternados",
+                       posicao_pico=0.5, lambda_ia=0.2):
+    """
+    Encadeia hietograma de projeto, chuva efetiva SCS-CN e hidrograma unitario
+    SCS para uma ou varias bacias. Retorna um dicionario com o tempo (min), a
+    chuva, a chuva efetiva, as vazoes (n_bacias, n_passos) e a vazao de pico.
+    """
+    if metodo == "blocos_alternados":
+        chuva = hietograma_blocos_alternados(params_idf, tr, duracao_min, dt_min, posicao_pico)
+    elif metodo == "chicago":
+        chuva = hietograma_chicago(params_idf, tr, duracao_min, dt_min, posicao_pico)
+    else:
+        raise ValueError(f"Metodo de hietograma '{metodo}' invalido. Use 'blocos_alternados' ou 'chicago'.")
+
+    n_bacias = max(np.size(A_km2), np.size(tc_min), np.size(CN), chuva.shape[0])
+    chuva = np.broadcast_to(chuva, (n_bacias, chuva.shape[1]))
+    efetiva = chuva_efetiva_scs(chuva, np.broadcast_to(_coluna(CN), (n_bacias, 1)), lambda_ia)
+    uh = hidrograma_unitario_scs(np.broadcast_to(_coluna(A_km2), (n_bacias, 1)),
+                                 np.broadcast_to(_coluna(tc_min), (n_bacias, 1)), dt_min)
+    vazao = convoluir(efetiva, uh)
+    return {
+        "tempo_min": np.arange(vazao.shape[1]) * dt_min,
+        "chuva_mm": chuva,
+        "chuva_efetiva_mm": efetiva,
+        "vazao_m3s": vazao,
+        "vazao_pico_m3s": vazao.max(axis=-1),
+    }
+
+def tabela_hidrograma(resultado, bacia=0):
+    """Monta um DataFrame (tempo, chuva, chuva efetiva, vazao) para uma bacia de hidrograma_projeto."""
+    n = len(resultado["tempo_min"])
+    chuva = np.zeros(n)
+    efetiva = np.zeros(n)
+    m = resultado["chuva_mm"].shape[1]
+    chuva[:m] = resultado["chuva_mm"][bacia]
+    efetiva[:m] = resultado["chuva_efetiva_mm"][bacia]
+    return pd.DataFrame({
+        "Tempo (min)": resultado["tempo_min"],
+        "Chuva (mm)": chuva,
+        "Chuva Efetiva (mm)": efetiva,
+        "Vazão (m³/s)": resultado["vazao_m3s"][bacia],
+    })
@@ -3,33 +3,46 @@
 import pandas as pd
 import numpy as np
 from scipy.stats import gumbel_r, pearson3, kstest, anderson
+from scipy.optimize import minimize_scalar
+from diagnostico import etapa, medido
+import acelerado
 
+@medido("idf.calculate_annual_maxima")
 def calculate_annual_maxima(df, duration):
     """Calcula as maximas anuais para uma dada duracao."""
-    accumulated = df["precipitacao"].rolling(window=duration, min_periods=1).sum()
-    annual_maxima = accumulated.groupby(df.index.year).max().dropna()
+    if acelerado.ativo() and df.index.is_monotonic_increasing:
+        with etapa("idf.maximas_compilado", linhas=len(df)):
+            return acelerado.maximas_anuais(df, duration)
+    with etapa("idf.soma_movel", linhas=len(df)):
+        accumulated = df["precipitacao"].rolling(window=duration, min_periods=1).sum()
+    with etapa("idf.maximas_por_ano", linhas=len(df)):
+        annual_maxima = accumulated.groupby(df.index.year).max().dropna()
     return annual_maxima
 
+@medido("idf.calculate_idf_curves")
 def calculate_idf_curves(series, duration, trs_np):
     """Ajusta as distribuicoes Gumbel e Log-Pearson III e retorna os parametros."""
     if len(series) < 5:
         return None, None, None, series, None, None
 
     # --- Gumbel ---
-    mu_g, beta_g = gumbel_r.fit(series.values)
-    _, ks_p = kstest(series.values, 'gumbel_r', args=(mu_g, beta_g))
-    # Teste Anderson-Darling é mais sensível nas caudas da distribuição
-    ad_result = anderson((series.values - mu_g) / beta_g, dist='gumbel_r')
+    with etapa("idf.gumbel_fit", linhas=len(series)):
+        mu_g, beta_g = gumbel_r.fit(series.values)
+    with etapa("idf.testes_aderencia", linhas=len(series)):
+        _, ks_p = kstest(series.values, 'gumbel_r', args=(mu_g, beta_g))
+        # Teste Anderson-Darling é mais sensível nas caudas da distribuição
+        ad_result = anderson((series.values - mu_g) / beta_g, dist='gumbel_r')
     intensities_gumbel = [gumbel_r.ppf(1 - 1/tr, loc=mu_g, scale=beta_g) for tr in trs_np]
     
     # --- Log-Pearson III ---
-    # Garante que nao haja valores <= 0 para o log
-    dados_log = np.log10(series.values[series.values > 0])
-    skew = pd.Series(dados_log).skew()
-    mean_log = np.mean(dados_log)
-    std_log = np.std(dados_log, ddof=1)
-    lp3_dist = pearson3(skew, loc=mean_log, scale=std_log)
-    intensities_lp3 = [10 ** lp3_dist.ppf(1 - 1/tr) for tr in trs_np]
+    with etapa("idf.lp3_fit", linhas=len(series)):
+        # Garante que nao haja valores <= 0 para o log
+        dados_log = np.log10(series.values[series.values > 0])
+        skew = pd.Series(dados_log).skew()
+        mean_log = np.mean(dados_log)
+        std_log = np.std(dados_log, ddof=1)
+        lp3_dist = pearson3(skew, loc=mean_log, scale=std_log)
+        intensities_lp3 = [10 ** lp3_dist.ppf(1 - 1/tr) for tr in trs_np]
 
     df_idf = pd.DataFrame({
         "TR (anos)": trs_np,
@@ -50,6 +63,7 @@ def calculate_idf_curves(series, duration, trs_np):
 
     return df_idf, params_gumbel, params_lp3, series, gumbel_params_tuple, lp3_params_tuple
 
+@medido("idf.calcular_chuva_projeto")
 def calcular_chuva_projeto(tr, metodo, gumbel_params, lp3_params):
     """Calcula a precipitacao de projeto a partir dos parametros ajustados."""
     if metodo == "Gumbel":
@@ -66,3 +80,28 @@ def calcular_chuva_projeto(tr, metodo, gumbel_params, lp3_params):
         return 10 ** dist_lp3.ppf(1 - 1 / float(tr))
     
     raise ValueError(f"Metodo de calculo '{metodo}' invalido.")
+
+def ajustar_equacao_idf(duracoes_min, trs, intensidades_mm_h, b_max=120.0):
+    """
+    Ajusta a equacao IDF i = K * T^a / (t + b)^c (i em mm/h, t em minutos) a pares
+    (duracao, TR, intensidade), por exemplo os quantis de varias duracoes.
+    Para cada b o problema em log e linear; b e escolhido por busca escalar.
+    """
+    t = np.asarray(duracoes_min, dtype=float)
+    T = np.asarray(trs, dtype=float)
+    y = np.log(np.asarray(intensidades_mm_h, dtype=float))
+
+    def resolver(b):
+        X = np.column_stack([np.ones_like(t), np.log(T), -np.log(t + b)])
+        coef, *_ = np.linalg.lstsq(X, y, rcond=None)
+        return coef, np.sum((X @ coef - y) ** 2)
+
+    b = minimize_scalar(lambda b: resolver(b)[1], bounds=(0.0, b_max), method="bounded").x
+    (lnK, a, c), _ = resolver(b)
+    return {"K": float(np.exp(lnK)), "a": float(a), "b": float(b), "c": float(c)}
+
+def intensidade_equacao_idf(params_idf, tr, duracao_min):
+    """Intensidade (mm/h) pela equacao IDF ajustada; aceita arrays."""
+    tr = np.asarray(tr, dtype=float)
+    duracao_min = np.asarray(duracao_min, dtype=float)
+    return params_idf["K"] * tr ** params_idf["a"] / (duracao_min + params_idf["b"]) ** params_idf["c"]
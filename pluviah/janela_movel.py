@@ -0,0 +1,166 @@
+# janela_movel.py
+
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm, pearson3
+from diagnostico import etapa, medido
+
+# Analise IDF nao estacionaria por janelas moveis de anos (ex.: 1970-1999,
+# 1971-2000, ...). Em vez de reajustar cada janela do zero, as estatisticas
+# suficientes sao atualizadas quando a janela desliza:
+#   - momentos dos log10 (Log-Pearson III) por somas acumuladas, com o mesmo
+#     metodo dos momentos de calculate_idf_curves;
+#   - momentos-L (Gumbel) a partir de uma lista ordenada da janela, mantida
+#     com insercao/remocao por bisseccao.
+# O Gumbel e ajustado por momentos-L (beta = l2 / ln 2), e nao por maxima
+# verossimilhanca como em calculate_idf_curves, para permitir a atualizacao
+# incremental; os quantis diferem pouco para janelas de 30 anos.
+
+EULER = 0.5772156649
+
+
+def _pesos_pwm(n):
+    i = np.arange(1, n + 1, dtype=float)
+    w1 = (i - 1) / max(n - 1, 1)
+    w2 = w1 * (i - 2) / max(n - 2, 1)
+    return np.vstack([np.ones(n), w1, w2]) / n
+
+def _momentos_l_deslizantes(x, largura, passo, min_anos):
+    """l1, l2 e t3 de cada janela de uma linha de maximas (NaN = ano sem dado)."""
+    n_janelas = (len(x) - largura) // passo + 1
+    saida = np.full((n_janelas, 3), np.nan)
+    janela = []
+    pesos = {}
+    for fim in range(len(x)):
+        if not np.isnan(x[fim]):
+            insort(janela, x[fim])
+        saiu = fim - largura
+        if saiu >= 0 and not np.isnan(x[saiu]):
+            del janela[bisect_left(janela, x[saiu])]
+        inicio = fim - largura + 1
+        if inicio < 0 or inicio % passo or len(janela) < min_anos:
+            continue
+        n = len(janela)
+        if n not in pesos:
+            pesos[n] = _pesos_pwm(n)
+        b0, b1, b2 = pesos[n] @ np.asarray(janela)
+        l2 = 2 * b1 - b0
+        saida[inicio // passo] = (b0, l2, (6 * b2 - 6 * b1 + b0) / l2 if l2 > 0 else np.nan)
+    return saida
+
+def _somas_deslizantes(a, largura, passo):
+    # a: linhas x anos -> linhas x janelas
+    acumulado = np.concatenate([np.zeros((a.shape[0], 1)), np.cumsum(a, axis=1)], axis=1)
+    return (acumulado[:, largura:] - acumulado[:, :-largura])[:, ::passo]
+
+def _momentos_log_deslizantes(x, largura, passo):
+    """Media, desvio (ddof=1) e assimetria ajustada dos log10 por janela, para todas as linhas."""
+    valido = ~np.isnan(x) & (np.nan_to_num(x) > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.where(valido, np.log10(np.where(valido, x, 1.0)), 0.0)
+        # Deslocamento pela media da linha reduz o cancelamento nas somas de potencias
+        centro = np.nan_to_num(y.sum(axis=1, keepdims=True) / valido.sum(axis=1, keepdims=True))
+        d = np.where(valido, y - centro, 0.0)
+        n = _somas_deslizantes(valido.astype(float), largura, passo)
+        s1, s2, s3 = (_somas_deslizantes(d**k, largura, passo) for k in (1, 2, 3))
+        m = s1 / n
+        m2 = s2 / n - m**2
+        m3 = s3 / n - 3 * m * s2 / n + 2 * m**3
+        desvio = np.sqrt(m2 * n / (n - 1))
+        assimetria = m3 / m2**1.5 * np.sqrt(n * (n - 1)) / (n - 2)
+    return n, m + centro, desvio, assimetria
+
+@medido("janela_movel.idf_janela_movel")
+def idf_janela_movel(maximas, largura=30, trs=(2, 5, 10, 25, 50, 100), passo=1, min_anos=None, tendencia=False):
+    """
+    Parametros e quantis Gumbel/LP3 em janelas moveis de `largura` anos.
+
+    maximas: Series indexada por ano (uma serie) ou DataFrame series x anos
+    (ex.: regional.matriz_maximas ou acervo.maximas_anuais de uma duracao).
+    Anos ausentes contam como janela de calendario sem dado; janelas com menos
+    de `min_anos` valores (padrao: 2/3 da largura, no minimo 5) ficam NaN.
+    Com tendencia=True inclui Mann-Kendall e Sen das maximas de cada janela.
+    Retorna uma tabela indexada pelo ano final da janela (e pela serie, se
+    `maximas` for um DataFrame).
+    """
+    serie_unica = isinstance(maximas, pd.Series)
+    matriz = maximas.to_frame().T if serie_unica else maximas
+    anos = np.arange(int(min(matriz.columns)), int(max(matriz.columns)) + 1)
+    matriz = matriz.reindex(columns=anos)
+    x = matriz.to_numpy(dtype=float)
+    if len(anos) < largura:
+        raise ValueError(f"Sao necessarios pelo menos {largura} anos para a janela.")
+    min_anos = max(5, int(np.ceil(2 * largura / 3))) if min_anos is None else min_anos
+    fins = anos[largura - 1::passo]
+    trs = np.asarray(trs, dtype=float)
+
+    with etapa("janela_movel.momentos_log", linhas=x.size):
+        n, media_log, desvio_log, assimetria_log = _momentos_log_deslizantes(x, largura, passo)
+    with etapa("janela_movel.momentos_l", linhas=x.size):
+        lm = np.stack([_momentos_l_deslizantes(linha, largura, passo, min_anos) for linha in x])
+    n_validos = _somas_deslizantes((~np.isnan(x)).astype(float), largura, passo)
+    insuficiente = n_validos < min_anos
+    for a in (media_log, desvio_log, assimetria_log):
+        a[insuficiente] = np.nan
+
+    beta = lm[..., 1] / np.log(2)
+    mu = lm[..., 0] - EULER * beta
+    tabela = {
+        "inicio": np.broadcast_to(fins - largura + 1, n_validos.shape), "n": n_validos.astype(int),
+        "l1": lm[..., 0], "l2": lm[..., 1], "t3": lm[..., 2],
+        "gumbel_mu": mu, "gumbel_beta": beta,
+        "mean_log": media_log, "std_log": desvio_log, "skew_log": assimetria_log,
+    }
+    with etapa("janela_movel.quantis", linhas=mu.size * len(trs)):
+        for tr in trs:
+            p = 1 - 1 / tr
+            tabela[f"Gumbel_TR{tr:g} (mm)"] = mu - beta * np.log(-np.log(p))
+            tabela[f"LP3_TR{tr:g} (mm)"] = 10 ** pearson3.ppf(p, assimetria_log, loc=media_log, scale=desvio_log)
+    if tendencia:
+        with etapa("janela_movel.tendencia", linhas=x.size):
+            janelas = np.lib.stride_tricks.sliding_window_view(x, largura, axis=1)[:, ::passo]
+            janelas = janelas.reshape(-1, largura)
+            # Todas as janelas de todas as series de uma vez, em blocos para limitar a memoria
+            mk = pd.concat([mann_kendall_sen(janelas[k:k + 2000]) for k in range(0, len(janelas), 2000)])
+        for coluna in ("mk_S", "mk_Z", "mk_p", "sen_inclinacao"):
+            tabela[coluna] = mk[coluna].to_numpy(dtype=float).reshape(n_validos.shape).copy()
+            tabela[coluna][insuficiente] = np.nan
+
+    indice = pd.MultiIndex.from_product([matriz.index, fins], names=[matriz.index.name or "serie", "fim"])
+    df = pd.DataFrame({k: np.asarray(v).ravel() for k, v in tabela.items()}, index=indice)
+    return df.droplevel(0) if serie_unica else df
+
+def mann_kendall_sen(matriz, alfa=0.05):
+    """
+    Teste de Mann-Kendall (com correcao de empates) e inclinacao de Sen para
+    cada linha de `matriz` (ultimo eixo = anos consecutivos; NaN = sem dado),
+    calculados para todas as linhas de uma vez. Inclinacao em unidades por ano.
+    """
+    x = np.atleast_2d(np.asarray(matriz, dtype=float))
+    n_anos = x.shape[-1]
+    i, j = np.triu_indices(n_anos, k=1)
+    diferencas = x[:, j] - x[:, i]  # pares i < j
+    par_valido = ~np.isnan(diferencas)
+
+    S = np.sum(np.sign(np.where(par_valido, diferencas, 0.0)), axis=1)
+    valido = ~np.isnan(x)
+    n = valido.sum(axis=1).astype(float)
+    # Cada grupo de t empates contribui t(t-1)(2t+5) = soma de (t_k-1)(2t_k+5) sobre seus t elementos
+    iguais = (x[:, :, None] == x[:, None, :]).sum(axis=2).astype(float)
+    empates = np.sum(np.where(valido, (iguais - 1) * (2 * iguais + 5), 0.0), axis=1)
+    variancia = (n * (n - 1) * (2 * n + 5) - empates) / 18
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Z = np.where(S > 0, (S - 1) / np.sqrt(variancia), np.where(S < 0, (S + 1) / np.sqrt(variancia), 0.0))
+        Z = np.where(n >= 3, Z, np.nan)
+        inclinacoes = diferencas / (j - i)
+        if not inclinacoes.shape[1]:
+            sen = np.full(len(x), np.nan)
+        else:
+            # np.median e bem mais rapida; nanmedian so quando ha anos sem dado
+            sen = np.median(inclinacoes, axis=1) if par_valido.all() else np.nanmedian(inclinacoes, axis=1)
+    p = 2 * norm.sf(np.abs(Z))
+    resultado = np.where(p < alfa, np.where(Z > 0, "crescente", "decrescente"), "sem tendencia")
+    return pd.DataFrame({"n": n.astype(int), "mk_S": S, "mk_var_S": variancia, "mk_Z": Z, "mk_p": p,
+                         "sen_inclinacao": sen, "tendencia": np.where(np.isnan(Z), None, resultado)})
@@ -1,7 +1,11 @@
 # manning.py
 
 import math
+import numpy as np
+import pandas as pd
 from config import G, RHO
+from diagnostico import etapa, medido
+import acelerado
 
 # --- Funcoes para Condutos Circulares ---
 
@@ -13,6 +17,7 @@ def q_manning_circular_cheia(d, n, S):
     A = (math.pi / 4.0) * d**2
     return (1.0 / n) * A * (R ** (2.0 / 3.0)) * (S ** 0.5)
 
+@medido("manning.dimensionar_conduto_circular")
 def dimensionar_conduto_circular(Q_projeto, n, S, d_min_m, d_max_m, passo_m):
     """Itera para encontrar o diametro mínimo que atende a vazao de projeto."""
     d = d_min_m
@@ -23,6 +28,121 @@ def dimensionar_conduto_circular(Q_projeto, n, S, d_min_m, d_max_m, passo_m):
         d += passo_m
     return None, None
 
+def dimensionar_conduto_circular_vetor(Q_projeto, n, S, d_min_m, d_max_m, passo_m):
+    """
+    Versao vetorizada de dimensionar_conduto_circular para arrays de vazoes,
+    rugosidades e declividades. Inverte a vazao a secao cheia,
+    D = (Q n 4^(5/3) / (pi S^0.5))^(3/8), e arredonda para cima na grade
+    d_min, d_min + passo, ... Retorna (diametros, vazoes a secao cheia), com
+    NaN onde nenhum diametro ate d_max atende.
+    """
+    Q, n, S = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (Q_projeto, n, S)))
+    valido = (n > 0) & (S > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fator = np.where(valido, math.pi * np.sqrt(S) / (n * 4.0 ** (5.0 / 3.0)), 0.0)
+        d_req = (np.maximum(Q, 0.0) / fator) ** (3.0 / 8.0)
+        k = np.ceil(np.round((d_req - d_min_m) / passo_m, 9))
+        k = np.where(np.isfinite(k), np.maximum(k, 0.0), np.inf)
+        d = d_min_m + k * passo_m
+        q_cheia = fator * d ** (8.0 / 3.0)
+        # O arredondamento pode cair no ponto da grade logo abaixo do necessario
+        abaixo = (q_cheia < Q) & np.isfinite(k)
+        if abaixo.any():
+            k = np.where(abaixo, k + 1.0, k)
+            d = d_min_m + k * passo_m
+            q_cheia = fator * d ** (8.0 / 3.0)
+    atende = (d <= d_max_m + 1e-9) & ((q_cheia >= Q) | (Q <= 0))
+    return np.where(atende, d, np.nan), np.where(atende, q_cheia, np.nan)
+
+# --- Condutos Circulares Parcialmente Cheios ---
+
+def geom_circular_parcial(d, y):
+    """
+    Retorna area (A), Perimetro Molhado (P) e Largura do Topo (T) de um conduto
+    circular com lamina y, a partir do angulo central theta = 2 acos(1 - 2y/D).
+    Aceita arrays.
+    """
+    d = np.asarray(d, dtype=float)
+    razao = np.clip(np.asarray(y, dtype=float) / d, 0.0, 1.0)
+    theta = 2.0 * np.arccos(1.0 - 2.0 * razao)
+    A = d**2 / 8.0 * (theta - np.sin(theta))
+    P = theta * d / 2.0
+    T = d * np.sin(theta / 2.0)
+    return A, P, T
+
+def _tabela_circular(n_pontos=20001):
+    """Relacoes adimensionais Q/Qcheia e V/Vcheia em funcao de y/D (Manning com n constante)."""
+    yd = np.linspace(0.0, 1.0, n_pontos)
+    A, P, _ = geom_circular_parcial(1.0, yd)
+    A_cheia, R_cheia = math.pi / 4.0, 0.25
+    with np.errstate(divide='ignore', invalid='ignore'):
+        R = np.where(P > 0, A / P, 0.0)
+    v_rel = (R / R_cheia) ** (2.0 / 3.0)
+    return yd, A / A_cheia * v_rel, v_rel
+
+# Tabela pre-calculada uma unica vez. Q/Qcheia cresce ate y/D ~ 0.938 (maximo
+# ~1.076) e depois decresce, por isso a inversao usa apenas o ramo crescente.
+_YD, _Q_REL, _V_REL = _tabela_circular()
+_I_QMAX = int(np.argmax(_Q_REL))
+Q_REL_MAX = float(_Q_REL[_I_QMAX])
+YD_Q_MAX = float(_YD[_I_QMAX])
+
+def tabela_adimensional_circular():
+    """Exporta a tabela adimensional de condutos circulares (y/D, Q/Qcheia, V/Vcheia)."""
+    return pd.DataFrame({"y/D": _YD, "Q/Qcheia": _Q_REL, "V/Vcheia": _V_REL})
+
+def y_circular_parcial(Q, d, n, S):
+    """
+    Lamina y (m) em um conduto circular para a vazao Q, por interpolacao na
+    tabela adimensional (sem busca de raiz por conduto). Aceita arrays; vazoes
+    acima da capacidade maxima em conduto livre retornam NaN.
+    """
+    Q, d, n, S = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (Q, d, n, S)))
+    with etapa("manning.y_circular_parcial", linhas=Q.size):
+        Q_cheia = (1.0 / n) * (math.pi / 4.0) * d**2 * (d / 4.0) ** (2.0 / 3.0) * np.sqrt(S)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            q_rel = Q / Q_cheia
+        yd = np.interp(q_rel, _Q_REL[:_I_QMAX + 1], _YD[:_I_QMAX + 1])
+        y = np.where((q_rel >= 0) & (q_rel <= Q_REL_MAX), yd * d, np.nan)
+    return float(y) if y.ndim == 0 else y
+
+def hidraulica_circular_parcial(Q, d, n, S):
+    """
+    Lamina relativa y/D, velocidade V (m/s) e raio hidraulico R (m) em
+    condutos circulares parcialmente cheios, por interpolacao na tabela
+    adimensional. Aceita arrays de qualquer forma (broadcast); NaN onde a
+    vazao excede a capacidade em conduto livre.
+    """
+    Q, d, n, S = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (Q, d, n, S)))
+    with etapa("manning.hidraulica_circular_parcial", linhas=Q.size):
+        V_cheia = (1.0 / n) * (d / 4.0) ** (2.0 / 3.0) * np.sqrt(S)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            q_rel = Q / (V_cheia * (math.pi / 4.0) * d**2)
+        livre = (q_rel >= 0) & (q_rel <= Q_REL_MAX)
+        ramo = slice(None, _I_QMAX + 1)
+        yd = np.where(livre, np.interp(q_rel, _Q_REL[ramo], _YD[ramo]), np.nan)
+        # V/Vcheia = (R/Rcheia)^(2/3), logo R = (D/4) (V/Vcheia)^(3/2)
+        v_rel = np.interp(q_rel, _Q_REL[ramo], _V_REL[ramo])
+        V = np.where(livre, v_rel * V_cheia, np.nan)
+        R = np.where(livre, d / 4.0 * v_rel * np.sqrt(v_rel), np.nan)
+    return yd, V, R
+
+def verificar_condutos_parciais(Q, d, n, S, yd_max=0.75, v_min=0.6, v_max=5.0):
+    """
+    Verifica muitos condutos de uma vez em lamina parcial: y/D, velocidade,
+    tensao de arraste e atendimento aos limites de lamina e velocidade.
+    """
+    Q, d, n, S = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (Q, d, n, S)))
+    yd, V, R = (np.atleast_1d(v) for v in hidraulica_circular_parcial(Q, d, n, S))
+    return pd.DataFrame({
+        "y/D": np.ravel(yd),
+        "y (m)": np.ravel(yd * d),
+        "V (m/s)": np.ravel(V),
+        "Tensão (Pa)": np.ravel(RHO * G * R * S),
+        "Atende lâmina": np.ravel(yd <= yd_max),
+        "Atende velocidade": np.ravel((V >= v_min) & (V <= v_max)),
+    })
+
 # --- Funções para Canais Abertos ---
 
 def geom_trapezio(b, z, y):
@@ -71,23 +191,201 @@ def bissecao(f, a, b, tol=1e-6, maxit=100):
         else: L, fa = m, fm
     return max(0.5 * (L + Rr), 0.0)
 
+@medido("manning.y_normal")
 def y_normal(Qd, b, z, S, n, y_min=1e-4, y_max=50.0):
     """Calcula a profundidade normal (y) para uma dada vazao (Qd)."""
+    if acelerado.ativo():
+        return acelerado.y_normal(Qd, b, z, S, n, y_min, y_max)
     def f(y):
         A, P, _ = geom_trapezio(b, z, y)
         return manning_Q(A, P, S, n) - Qd
     return bissecao(f, y_min, y_max)
 
+@medido("manning.y_critico")
 def y_critico(Qd, b, z, y_min=1e-4, y_max=50.0):
     """Calcula a profundidade critica (yc) para uma dada vazao (Qd)."""
+    if acelerado.ativo():
+        return acelerado.y_critico(Qd, b, z, y_min, y_max)
     def F(y):
         A, _, T = geom_trapezio(b, z, y)
         return froude(Qd, A, T) - 1.0
     return bissecao(F, y_min, y_max)
 
+@medido("manning.b_para_Q")
 def b_para_Q(Qd, z, y, S, n, b_min=0.01, b_max=50.0):
     """Calcula a largura da base (b) para uma dada vazao (Qd) e profundidade (y)."""
+    if acelerado.ativo():
+        return acelerado.b_para_Q(Qd, z, y, S, n, b_min, b_max)
     def f(b):
         A, P, _ = geom_trapezio(b, z, y)
         return manning_Q(A, P, S, n) - Qd
     return bissecao(f, b_min, b_max)
+
+# --- Versoes Vetorizadas (varias secoes de uma vez) ---
+
+def geom_trapezio_vetor(b, z, y):
+    """Versao vetorizada de geom_trapezio para arrays de profundidade."""
+    y = np.maximum(np.asarray(y, dtype=float), 0.0)
+    A = y * (b + z * y)
+    P = b + 2.0 * y * (1.0 + z**2) ** 0.5
+    T = b + 2.0 * z * y
+    return A, P, T
+
+def bissecao_vetorial(f, a, b, tol=1e-6, maxit=100):
+    """
+    Bissecao simultanea em arrays de intervalos [a, b]. Retorna NaN onde
+    f(a) e f(b) tem o mesmo sinal (sem raiz garantida no intervalo).
+    """
+    a, b = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+    a, b = a.copy(), b.copy()
+    fa, fb = f(a), f(b)
+    valido = fa * fb <= 0
+    for _ in range(maxit):
+        m = 0.5 * (a + b)
+        fm = f(m)
+        esquerda = fa * fm <= 0
+        b = np.where(esquerda, m, b)
+        a = np.where(esquerda, a, m)
+        fa = np.where(esquerda, fa, fm)
+        if np.all(b - a < tol):
+            break
+    return np.where(valido, np.maximum(0.5 * (a + b), 0.0), np.nan)
+
+def manning_Q_vetor(A, P, S, n):
+    """Versao vetorizada de manning_Q."""
+    A, P = np.asarray(A, dtype=float), np.asarray(P, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Q = (1.0 / n) * A * (A / P) ** (2.0 / 3.0) * np.sqrt(S)
+    return np.where((P > 0) & (A > 0), Q, 0.0)
+
+def y_normal_vetor(Qd, b, z, S, n, y_min=1e-4, y_max=50.0):
+    """Profundidade normal para arrays de vazoes e geometrias (NaN se nao houver solucao)."""
+    Qd, b, z, S, n = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (Qd, b, z, S, n)))
+    def f(y):
+        A, P, _ = geom_trapezio_vetor(b, z, y)
+        return manning_Q_vetor(A, P, S, n) - Qd
+    with etapa("manning.y_normal_vetor", linhas=Qd.size):
+        if acelerado.ativo():
+            return acelerado.y_normal_vetor(Qd, b, z, S, n, y_min, y_max)
+        return bissecao_vetorial(f, np.full(Qd.shape, y_min), np.full(Qd.shape, y_max))
+
+def y_critico_vetor(Qd, b, z, y_min=1e-4, y_max=50.0):
+    """Profundidade critica para arrays de vazoes e geometrias (NaN se nao houver solucao)."""
+    Qd, b, z = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (Qd, b, z)))
+    def F(y):
+        A, _, T = geom_trapezio_vetor(b, z, y)
+        return Qd / A / np.sqrt(G * A / T) - 1.0
+    with etapa("manning.y_critico_vetor", linhas=Qd.size):
+        if acelerado.ativo():
+            return acelerado.y_critico_vetor(Qd, b, z, y_min, y_max)
+        return bissecao_vetorial(F, np.full(Qd.shape, y_min), np.full(Qd.shape, y_max))
+
+# --- Curva-Chave Pre-calculada ---
+
+class CurvaChave:
+    """
+    Curva-chave (tabela cota-vazao) de uma secao trapezoidal com S e n fixos.
+
+    A tabela Q(y), A, P, T, V e Fr e montada uma unica vez em uma grade de
+    profundidades refinada adaptativamente, e as consultas de profundidade
+    normal passam a ser uma busca binaria seguida de interpolacao linear
+    (monotona) em vez de uma bissecao completa por chamada.
+
+    Como Q(y) e convexa para secoes trapezoidais, y(Q) e concava e o erro da
+    interpolacao linear em cada intervalo e limitado pelas tangentes nas
+    extremidades: e <= dQ * (s0 - m) * (m - s1) / (s0 - s1), com s = dy/dQ e
+    m a inclinacao da corda. A grade e subdividida ate que esse limite (ou a
+    propria largura do intervalo, o que for menor) fique abaixo de `tol`.
+    """
+
+    def __init__(self, b, z, S, n, y_min=1e-4, y_max=50.0, tol=1e-4, n_inicial=65, max_pontos=200000):
+        if S <= 0 or n <= 0 or y_max <= y_min or (b <= 0 and z <= 0):
+            raise ValueError("Parametros invalidos para a curva-chave.")
+        self.b, self.z, self.S, self.n = b, z, S, n
+        self.tol = tol
+
+        with etapa("manning.curva_chave_tabela"):
+            y = np.geomspace(y_min, y_max, n_inicial)
+            while True:
+                Q, dQdy = self._vazao_e_derivada(y)
+                erro = self._limite_intervalos(y, Q, dQdy)
+                refinar = erro > tol
+                if not refinar.any() or len(y) >= max_pontos:
+                    break
+                meios = 0.5 * (y[:-1][refinar] + y[1:][refinar])
+                y = np.sort(np.concatenate([y, meios]))
+
+        A, P, T = geom_trapezio_vetor(b, z, y)
+        self.y = y
+        self.Q = Q
+        self.A, self.P, self.T = A, P, T
+        self.V = Q / A
+        self.Fr = self.V / np.sqrt(G * A / T)
+        self._erro_intervalos = erro
+        self.erro_max = float(erro.max())
+
+    def _vazao_e_derivada(self, y):
+        A, P, T = geom_trapezio_vetor(self.b, self.z, y)
+        Q = (1.0 / self.n) * A * (A / P) ** (2.0 / 3.0) * self.S ** 0.5
+        # dQ/dy = Q * (5/3 * T/A - 2/3 * P'/P), com P' = 2 * sqrt(1 + z²)
+        dPdy = 2.0 * (1.0 + self.z**2) ** 0.5
+        dQdy = Q * ((5.0 / 3.0) * T / A - (2.0 / 3.0) * dPdy / P)
+        return Q, dQdy
+
+    @staticmethod
+    def _limite_intervalos(y, Q, dQdy):
+        """Limite superior do erro da interpolacao linear de y(Q) em cada intervalo."""
+        dy = np.diff(y)
+        dQ = np.diff(Q)
+        s0, s1 = 1.0 / dQdy[:-1], 1.0 / dQdy[1:]
+        m = dy / dQ
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tangentes = dQ * (s0 - m) * (m - s1) / (s0 - s1)
+        # Se a concavidade nao se confirmar no intervalo, vale apenas a largura dele
+        concavo = (s0 >= m) & (m >= s1) & (s0 > s1)
+        tangentes = np.where(concavo, tangentes, dy)
+        return np.minimum(np.abs(tangentes), dy)
+
+    @property
+    def Q_min(self):
+        return float(self.Q[0])
+
+    @property
+    def Q_max(self):
+        return float(self.Q[-1])
+
+    def profundidade(self, Qd):
+        """
+        Retorna a profundidade normal para uma vazao (escalar ou array).
+        Vazoes fora da faixa tabelada retornam None (escalar) ou NaN (array).
+        """
+        Qd_arr = np.asarray(Qd, dtype=float)
+        with etapa("manning.curva_chave_consulta", linhas=Qd_arr.size):
+            y = np.interp(Qd_arr, self.Q, self.y)
+        fora = (Qd_arr < self.Q[0]) | (Qd_arr > self.Q[-1]) | np.isnan(Qd_arr)
+        y = np.where(fora, np.nan, y)
+        if Qd_arr.ndim == 0:
+            return None if fora else float(y)
+        return y
+
+    def limite_erro(self, Qd):
+        """Limite garantido do erro em profundidade (m) para cada vazao consultada."""
+        Qd_arr = np.asarray(Qd, dtype=float)
+        idx = np.clip(np.searchsorted(self.Q, Qd_arr) - 1, 0, len(self._erro_intervalos) - 1)
+        return self._erro_intervalos[idx]
+
+    def tabela(self):
+        """Exporta a curva-chave como DataFrame."""
+        return pd.DataFrame({
+            "y (m)": self.y,
+            "Q (m³/s)": self.Q,
+            "A (m²)": self.A,
+            "P (m)": self.P,
+            "T (m)": self.T,
+            "V (m/s)": self.V,
+            "Froude": self.Fr,
+        })
+
+    def exportar_csv(self, caminho):
+        """Grava a tabela da curva-chave em CSV."""
+        self.tabela().to_csv(caminho, index=False)
@@ -0,0 +1,119 @@
+# otimizacao_condutos.py
+
+import numpy as np
+import pandas as pd
+from config import G, RHO, DIAMETROS_COMERCIAIS, LIMITES_CONDUTOS, CUSTOS_CONDUTOS
+from manning import hidraulica_circular_parcial
+from diagnostico import etapa, medido
+
+# Escolha de diametro e declividade de menor custo para muitos trechos de uma
+# vez. Para cada trecho sao avaliadas todas as combinacoes catalogo de
+# diametros x faixa de declividades (incluindo a declividade do terreno) em
+# uma unica operacao com broadcast (trechos x diametros x declividades); a
+# lamina vem da tabela adimensional de manning.py, sem busca de raiz.
+#
+# Cada trecho e otimizado de forma independente, a partir da profundidade da
+# soleira a montante (ou do recobrimento minimo, se nao informada). Para uma
+# rede em serie, a prof_jusante de um trecho pode alimentar o seguinte.
+
+DECLIVIDADES_PADRAO = np.geomspace(0.0005, 0.08, 50)
+
+COLUNAS = ["diametro (m)", "declividade (m/m)", "y/D", "V (m/s)", "Tensão (Pa)",
+           "prof_montante (m)", "prof_jusante (m)", "custo (R$)", "viavel", "opcoes_viaveis"]
+
+
+def custo_trechos(d, L, prof_montante, prof_jusante, custos=None):
+    """
+    Custo (R$) de implantacao pelo modelo de custos: tubo por metro (funcao
+    potencia de D ou tabela 'tubo_por_diametro' {D: R$/m}), escavacao da vala
+    pela profundidade media e escoramento quando a profundidade media excede
+    'prof_escoramento'. Aceita arrays (broadcast).
+    """
+    c = {**CUSTOS_CONDUTOS, **(custos or {})}
+    d = np.asarray(d, dtype=float)
+    if c.get("tubo_por_diametro"):
+        tabela = {round(float(k), 4): v for k, v in c["tubo_por_diametro"].items()}
+        unicos = np.unique(d)
+        precos = np.array([tabela.get(round(float(v), 4), np.nan) for v in unicos])
+        tubo = precos[np.searchsorted(unicos, d)]
+    else:
+        tubo = c["tubo_coef"] * d ** c["tubo_expoente"]
+    prof_media = (np.asarray(prof_montante) + np.asarray(prof_jusante)) / 2.0
+    escavacao = c["escavacao_m3"] * (d + 2.0 * c["folga_vala"]) * prof_media
+    escoramento = np.where(prof_media > c["prof_escoramento"], c["escoramento_m2"] * 2.0 * prof_media, 0.0)
+    return L * (tubo + escavacao + escoramento)
+
+def _avaliar_bloco(Q, L, S_terreno, prof_montante, n, diametros, declividades, lim, custos):
+    # Formas: trechos (t, 1, 1), diametros (1, d, 1), declividades (t, 1, s)
+    Q, L, St, pm, n = (v[:, None, None] for v in (Q, L, S_terreno, prof_montante, n))
+    D = diametros[None, :, None]
+    S = declividades
+
+    yd, V, R = hidraulica_circular_parcial(Q, D, n, S)
+    tau = RHO * G * R * S
+    h_min = lim["cobertura_min"] + D
+    h_mont = np.maximum(np.where(np.isnan(pm), -np.inf, pm), h_min)
+    h_jus = h_mont + L * (S - St)
+
+    viavel = (
+        (yd <= lim["yd_max"]) & (V >= lim["v_min"]) & (V <= lim["v_max"]) & (tau >= lim["tau_min"])
+        & (h_jus >= h_min - 1e-9) & (np.maximum(h_mont, h_jus) <= lim["prof_max"] + 1e-9)
+    )
+    custo = custo_trechos(D, L, h_mont, h_jus, custos)
+    custo = np.where(viavel & np.isfinite(custo), custo, np.inf)
+
+    plano = custo.reshape(len(Q), -1)
+    melhor = np.argmin(plano, axis=1)
+    linhas = np.arange(len(Q))
+
+    def escolher(a):
+        return np.broadcast_to(a, custo.shape).reshape(len(Q), -1)[linhas, melhor]
+
+    encontrou = np.isfinite(plano[linhas, melhor])
+    resultado = {
+        "diametro (m)": escolher(D), "declividade (m/m)": escolher(S), "y/D": escolher(yd),
+        "V (m/s)": escolher(V), "Tensão (Pa)": escolher(tau),
+        "prof_montante (m)": escolher(h_mont), "prof_jusante (m)": escolher(h_jus),
+        "custo (R$)": plano[linhas, melhor],
+    }
+    resultado = {k: np.where(encontrou, v, np.nan) for k, v in resultado.items()}
+    resultado["viavel"] = encontrou
+    resultado["opcoes_viaveis"] = np.isfinite(plano).sum(axis=1)
+    return resultado
+
+@medido("otimizacao_condutos.otimizar_condutos")
+def otimizar_condutos(trechos, diametros=None, declividades=None, n=0.013, limites=None, custos=None,
+                      trechos_por_bloco=2000):
+    """
+    Diametro e declividade de menor custo para cada trecho.
+
+    trechos: DataFrame (ou dicionario de arrays) com Q (m3/s), L (m) e
+    S_terreno (m/m); opcionalmente prof_montante (m, soleira a montante) e n.
+    diametros: catalogo (padrao DIAMETROS_COMERCIAIS); declividades: faixa
+    avaliada (padrao DECLIVIDADES_PADRAO), alem da declividade do terreno.
+    limites/custos: sobrescrevem LIMITES_CONDUTOS e CUSTOS_CONDUTOS.
+    Trechos sem opcao que atenda a todas as restricoes ficam com viavel=False
+    e NaN nos demais campos.
+    """
+    trechos = pd.DataFrame(trechos)
+    lim = {**LIMITES_CONDUTOS, **(limites or {})}
+    diametros = np.sort(np.asarray(DIAMETROS_COMERCIAIS if diametros is None else diametros, dtype=float))
+    grade = np.asarray(DECLIVIDADES_PADRAO if declividades is None else declividades, dtype=float)
+
+    Q = trechos["Q"].to_numpy(dtype=float)
+    L = trechos["L"].to_numpy(dtype=float)
+    St = trechos["S_terreno"].to_numpy(dtype=float)
+    pm = trechos["prof_montante"].to_numpy(dtype=float) if "prof_montante" in trechos else np.full(len(Q), np.nan)
+    rug = trechos["n"].to_numpy(dtype=float) if "n" in trechos else np.full(len(Q), float(n))
+    # A declividade do terreno (quando positiva) entra como candidata de cada trecho
+    candidatas = np.concatenate([np.broadcast_to(grade, (len(Q), len(grade))),
+                                 np.where(St > 0, St, grade[0])[:, None]], axis=1)[:, None, :]
+
+    partes = []
+    for inicio in range(0, len(Q), trechos_por_bloco):
+        fatia = slice(inicio, inicio + trechos_por_bloco)
+        with etapa("otimizacao_condutos.avaliacao", linhas=len(Q[fatia]) * len(diametros) * candidatas.shape[-1]):
+            partes.append(_avaliar_bloco(Q[fatia], L[fatia], St[fatia], pm[fatia], rug[fatia],
+                                         diametros, candidatas[fatia], lim, custos))
+    resultado = {c: np.concatenate([p[c] for p in partes]) if partes else np.array([]) for c in COLUNAS}
+    return pd.DataFrame(resultado, index=trechos.index, columns=COLUNAS)
@@ -1,6 +1,14 @@
+import numpy as np
+
 def calcular_vazao_racional(C, i_mm_h, A_ha):
     """Calcula a vazao de projeto pelo Metodo Racional. Retorna Q em m³/s."""
     if C <= 0 or i_mm_h <= 0 or A_ha <= 0:
         return 0.0
     # Fator de conversao 360 para (mm/h * ha) -> m³/s
     return (C * i_mm_h * A_ha) / 360.0
+
+def calcular_vazao_racional_vetor(C, i_mm_h, A_ha):
+    """Versao vetorizada de calcular_vazao_racional; entradas invalidas (<= 0) resultam em Q = 0."""
+    C, i, A = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (C, i_mm_h, A_ha)))
+    valido = (C > 0) & (i > 0) & (A > 0)
+    return np.where(valido, C * i * A / 360.0, 0.0)
@@ -0,0 +1,231 @@
+# regional.py
+
+import numpy as np
+import pandas as pd
+from scipy.special import gamma as fgama
+from diagnostico import etapa, medido
+import acelerado
+
+# Analise regional de frequencia pelo metodo index-flood com momentos-L
+# (Hosking e Wallis, 1997). As maximas anuais de todas as estacoes ficam em
+# uma matriz (estacoes x anos) completada com NaN, e as estatisticas sao
+# calculadas para todas as linhas de uma vez.
+
+# Valores criticos da medida de discordancia Di pelo numero de estacoes
+_D_CRITICO = {5: 1.333, 6: 1.648, 7: 1.917, 8: 2.140, 9: 2.329, 10: 2.491, 11: 2.632,
+              12: 2.757, 13: 2.869, 14: 2.971}
+
+EULER = 0.5772156649
+
+
+def momentos_l(x):
+    """
+    Momentos-L amostrais de cada linha de x (ultimo eixo = anos; NaN = sem dado),
+    pelos momentos ponderados por probabilidade nao enviesados b0..b3.
+    Retorna um dicionario com n, l1, l2, t (L-CV), t3 (L-assimetria) e t4
+    (L-curtose); razoes ficam NaN com menos de 4 valores.
+    """
+    x = np.sort(np.asarray(x, dtype=float), axis=-1)  # NaN vao para o fim
+    valido = ~np.isnan(x)
+    n = valido.sum(axis=-1, keepdims=True).astype(float)
+    xs = np.where(valido, x, 0.0)
+    i = np.arange(1, x.shape[-1] + 1, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w1 = (i - 1) / (n - 1)
+        w2 = w1 * (i - 2) / (n - 2)
+        w3 = w2 * (i - 3) / (n - 3)
+        b0 = xs.sum(axis=-1) / n[..., 0]
+        b1 = np.sum(np.where(valido, w1 * xs, 0.0), axis=-1) / n[..., 0]
+        b2 = np.sum(np.where(valido, w2 * xs, 0.0), axis=-1) / n[..., 0]
+        b3 = np.sum(np.where(valido, w3 * xs, 0.0), axis=-1) / n[..., 0]
+        l1 = b0
+        l2 = 2 * b1 - b0
+        l3 = 6 * b2 - 6 * b1 + b0
+        l4 = 20 * b3 - 30 * b2 + 12 * b1 - b0
+        suficiente = n[..., 0] >= 4
+        return {
+            "n": n[..., 0].astype(int),
+            "l1": np.where(n[..., 0] >= 1, l1, np.nan),
+            "l2": np.where(n[..., 0] >= 2, l2, np.nan),
+            "t": np.where(suficiente, l2 / l1, np.nan),
+            "t3": np.where(suficiente, l3 / l2, np.nan),
+            "t4": np.where(suficiente, l4 / l2, np.nan),
+        }
+
+def discordancia(t, t3, t4):
+    """
+    Medida de discordancia Di de cada estacao em relacao ao grupo (ultimo eixo =
+    estacoes; NaN sao ignoradas). Retorna NaN com menos de 4 estacoes validas.
+    """
+    u = np.stack([t, t3, t4], axis=-1)
+    valido = ~np.isnan(u).any(axis=-1)
+    N = valido.sum(axis=-1)
+    media = np.nansum(np.where(valido[..., None], u, 0.0), axis=-2) / np.maximum(N, 1)[..., None]
+    desvio = np.where(valido[..., None], u - media[..., None, :], 0.0)
+    A = np.einsum("...si,...sj->...ij", desvio, desvio)
+    D = np.full(valido.shape, np.nan)
+    inversivel = (N >= 4) & (np.abs(np.linalg.det(A)) > 1e-300)
+    if np.any(inversivel):
+        A_inv = np.linalg.inv(np.where(inversivel[..., None, None], A, np.eye(3)))
+        D = (N[..., None] / 3.0) * np.einsum("...si,...ij,...sj->...s", desvio, A_inv, desvio)
+        D = np.where(valido & inversivel[..., None], D, np.nan)
+    return D
+
+def d_critico(n_estacoes):
+    """Valor critico de Di (3 para 15 ou mais estacoes)."""
+    return _D_CRITICO.get(int(n_estacoes), 3.0 if n_estacoes >= 15 else np.nan)
+
+def gev_momentos_l(l1, l2, t3):
+    """
+    Parametros da GEV (xi, alpha, k; convencao de Hosking, k > 0 limitada
+    superiormente) pelos momentos-L, com a aproximacao de k em funcao de t3.
+    Aceita arrays; k ~ 0 recai na Gumbel.
+    """
+    l1, l2, t3 = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (l1, l2, t3)))
+    z = 2.0 / (3.0 + t3) - np.log(2.0) / np.log(3.0)
+    k = 7.8590 * z + 2.9554 * z**2
+    gumbel = np.abs(k) < 1e-6
+    k_seguro = np.where(gumbel, 1.0, k)
+    g = fgama(1.0 + k_seguro)
+    alpha = np.where(gumbel, l2 / np.log(2.0), l2 * k_seguro / ((1 - 2.0 ** (-k_seguro)) * g))
+    xi = np.where(gumbel, l1 - EULER * alpha, l1 - alpha * (1 - g) / k_seguro)
+    return xi, alpha, np.where(gumbel, 0.0, k)
+
+def quantil_gev(xi, alpha, k, F):
+    """Quantil da GEV (convencao de Hosking) para a probabilidade de nao excedencia F."""
+    xi, alpha, k, F = (np.asarray(v, dtype=float) for v in (xi, alpha, k, F))
+    y = -np.log(F)
+    gumbel = np.abs(k) < 1e-6
+    k_seguro = np.where(gumbel, 1.0, k)
+    return np.where(gumbel, xi - alpha * np.log(y), xi + alpha / k_seguro * (1 - y ** k_seguro))
+
+def _medias_regionais(n, t, t3, t4):
+    """Medias das razoes-L ponderadas pelo tamanho dos registros (estacoes com razoes validas)."""
+    peso = np.where(np.isnan(t) | np.isnan(t3) | np.isnan(t4), 0.0, n)
+    soma = peso.sum(axis=-1)
+
+    def media(r):
+        return np.nansum(np.where(peso > 0, r, 0.0) * peso, axis=-1) / soma
+
+    return peso, media(t), media(t3), media(t4)
+
+def _estatisticas_v(n_pesos, t, t3, t_R, t3_R):
+    """Estatisticas V1 (dispersao do L-CV) e V2 (distancia no plano L-CV x L-assimetria)."""
+    soma = n_pesos.sum(axis=-1)
+    dt = np.where(n_pesos > 0, t - t_R[..., None], 0.0)
+    dt3 = np.where(n_pesos > 0, t3 - t3_R[..., None], 0.0)
+    V1 = np.sqrt(np.sum(n_pesos * dt**2, axis=-1) / soma)
+    V2 = np.sum(n_pesos * np.sqrt(dt**2 + dt3**2), axis=-1) / soma
+    return V1, V2
+
+@medido("regional.heterogeneidade")
+def heterogeneidade(n, t, t3, t4, n_sim=500, semente=None, bloco=100):
+    """
+    Medidas de heterogeneidade H1 e H2 de Hosking e Wallis para uma regiao
+    (arrays por estacao). As n_sim regioes homogeneas, com os mesmos tamanhos
+    de registro, sao sorteadas de uma GEV ajustada as razoes-L regionais
+    (media 1) e processadas juntas, em blocos de `bloco` realizacoes.
+    Retorna (H1, H2, V1, V2).
+    """
+    n = np.asarray(n, dtype=int)
+    pesos, t_R, t3_R, _ = _medias_regionais(n, t, t3, t4)
+    usadas = pesos > 0
+    if usadas.sum() < 2:
+        return np.nan, np.nan, np.nan, np.nan
+    V1, V2 = _estatisticas_v(pesos[usadas], np.asarray(t)[usadas], np.asarray(t3)[usadas], t_R, t3_R)
+
+    xi, alpha, k = gev_momentos_l(1.0, t_R, t3_R)
+    n_usadas = n[usadas]
+    anos = np.arange(n_usadas.max())
+    rng = np.random.default_rng(semente)
+    v1_sim, v2_sim = [], []
+    with etapa("regional.simulacao", linhas=n_sim * n_usadas.sum()):
+        for inicio in range(0, n_sim, bloco):
+            m = min(bloco, n_sim - inicio)
+            u = rng.random((m, len(n_usadas), len(anos)))
+            amostra = np.where(anos < n_usadas[:, None], quantil_gev(xi, alpha, k, u), np.nan)
+            lm = momentos_l(amostra)
+            pesos_sim, ts_R, t3s_R, _ = _medias_regionais(n_usadas, lm["t"], lm["t3"], lm["t4"])
+            a, b = _estatisticas_v(pesos_sim, lm["t"], lm["t3"], ts_R, t3s_R)
+            v1_sim.append(a)
+            v2_sim.append(b)
+    v1_sim, v2_sim = np.concatenate(v1_sim), np.concatenate(v2_sim)
+    H1 = (V1 - v1_sim.mean()) / v1_sim.std(ddof=1)
+    H2 = (V2 - v2_sim.mean()) / v2_sim.std(ddof=1)
+    return float(H1), float(H2), float(V1), float(V2)
+
+def matriz_maximas(df_estacoes, duracoes):
+    """
+    Maximas anuais por estacao a partir de uma tabela longa (station_id,
+    datahora, precipitacao), como a de gerador.gerar_estacoes ou de um arquivo
+    multi-estacao. Retorna {duracao: DataFrame estacoes x anos}.
+    """
+    df = df_estacoes.sort_values(["station_id", "datahora"])
+    grupos = df.groupby("station_id", sort=False)["precipitacao"]
+    anos = df["datahora"].dt.year.to_numpy()
+    resultado = {}
+    for duracao in duracoes:
+        if acelerado.ativo():
+            with etapa("regional.matriz_maximas_compilado", linhas=len(df)):
+                maximas = acelerado.matriz_maximas(df["station_id"].to_numpy(), df["datahora"].to_numpy(),
+                                                   df["precipitacao"].to_numpy(), duracao)
+            resultado[duracao] = maximas.unstack("ano")
+            continue
+        with etapa("regional.matriz_maximas", linhas=len(df)):
+            soma = grupos.rolling(window=duracao, min_periods=1).sum().to_numpy()
+            maximas = pd.DataFrame({"station_id": df["station_id"].to_numpy(), "ano": anos, "valor": soma})
+            resultado[duracao] = maximas.groupby(["station_id", "ano"])["valor"].max().unstack("ano")
+    return resultado
+
+@medido("regional.analise_regional")
+def analise_regional(maximas_por_duracao, trs=(2, 5, 10, 25, 50, 100), n_sim=500, semente=None):
+    """
+    Analise index-flood para uma regiao, em cada duracao.
+
+    `maximas_por_duracao` e {duracao: DataFrame estacoes x anos (NaN = sem
+    dado)}. O fator de crescimento regional e uma GEV ajustada as razoes-L
+    medias ponderadas pelo tamanho dos registros; o quantil de cada estacao e o
+    fator vezes a media das suas maximas (indice), o que permite estimar
+    quantis mesmo em estacoes com poucos anos.
+
+    Retorna um dicionario de DataFrames:
+    - "estacoes": n, indice (l1), t, t3, t4, Di e discordante por (duracao, estacao);
+    - "regiao": N, razoes-L regionais, H1, H2 e parametros da curva por duracao;
+    - "quantis": precipitacao (mm) e intensidade (mm/h) por (duracao, estacao, TR).
+    """
+    trs = np.asarray(trs, dtype=float)
+    F = 1.0 - 1.0 / trs
+    tab_estacoes, tab_regiao, tab_quantis = [], [], []
+    for duracao, matriz in maximas_por_duracao.items():
+        matriz = pd.DataFrame(matriz)
+        with etapa("regional.momentos_l", linhas=matriz.size):
+            lm = momentos_l(matriz.to_numpy(dtype=float))
+        D = discordancia(lm["t"], lm["t3"], lm["t4"])
+        N = int(np.sum(~np.isnan(lm["t"]) & ~np.isnan(lm["t3"]) & ~np.isnan(lm["t4"])))
+        H1, H2, _, _ = heterogeneidade(lm["n"], lm["t"], lm["t3"], lm["t4"], n_sim, semente)
+        _, t_R, t3_R, t4_R = _medias_regionais(lm["n"], lm["t"], lm["t3"], lm["t4"])
+        xi, alpha, k = gev_momentos_l(1.0, t_R, t3_R)
+        crescimento = quantil_gev(xi, alpha, k, F)
+
+        tab_estacoes.append(pd.DataFrame({
+            "duracao": duracao, "estacao": matriz.index, "n": lm["n"], "indice": lm["l1"],
+            "t": lm["t"], "t3": lm["t3"], "t4": lm["t4"], "Di": D, "discordante": D > d_critico(N),
+        }))
+        tab_regiao.append({"duracao": duracao, "N": N, "t_R": float(t_R), "t3_R": float(t3_R),
+                           "t4_R": float(t4_R), "H1": H1, "H2": H2, "xi": float(xi),
+                           "alpha": float(alpha), "k": float(k)})
+        P = lm["l1"][:, None] * crescimento[None, :]
+        tab_quantis.append(pd.DataFrame({
+            "duracao": duracao,
+            "estacao": np.repeat(matriz.index.to_numpy(), len(trs)),
+            "TR (anos)": np.tile(trs, len(matriz)),
+            "fator_crescimento": np.tile(crescimento, len(matriz)),
+            "precipitacao_mm": P.ravel(),
+            "intensidade_mm_h": P.ravel() / float(duracao),
+        }))
+    return {
+        "estacoes": pd.concat(tab_estacoes, ignore_index=True),
+        "regiao": pd.DataFrame(tab_regiao),
+        "quantis": pd.concat(tab_quantis, ignore_index=True),
+    }
@@ -1,7 +1,14 @@
 # relatorio.py
 
+import html
+import os
+from string import Template
+
 from fpdf import FPDF
+import numpy as np
+import pandas as pd
 import streamlit as st
+from diagnostico import etapa, medido
 
 class PDF(FPDF):
     def header(self):
@@ -81,6 +88,19 @@ def _construir_pdf(dados_relatorio):
                 f"  - Coef. de Assimetria (log10): {params.get('skew', 0):.3f}"
             )
             pdf.chapter_body(texto_lp3)
+
+        comparacao = dados_idf.get('comparacao')
+        if comparacao is not None and not comparacao.empty:
+            melhores = comparacao[comparacao["melhor"]]
+            tabela = pd.DataFrame({
+                "Duração (h)": melhores["duracao"].astype(str),
+                "Distribuição": melhores["distribuicao"],
+                "AIC": melhores["aic"],
+                "BIC": melhores["bic"],
+                "K-S (p)": melhores["ks_p"],
+                "A²": melhores["ad_stat"],
+            })
+            pdf.create_table(tabela, "Melhor Distribuição por Duração (menor AIC)")
     
     pdf.add_page()
     
@@ -137,5 +157,220 @@ def _construir_pdf(dados_relatorio):
 
 @st.cache_data
 def gerar_pdf_bytes(dados_relatorio):
-    pdf = _construir_pdf(dados_relatorio)
-    return bytes(pdf.output(dest='S'))
+    with etapa("relatorio.construir_pdf"):
+        pdf = _construir_pdf(dados_relatorio)
+    with etapa("relatorio.saida_pdf"):
+        return bytes(pdf.output(dest='S'))
+
+
+# ==============================================================================
+# RELATORIO HTML
+# ==============================================================================
+# Mesmo conteudo do PDF a partir do mesmo dados_relatorio, em um unico arquivo
+# HTML com CSS embutido e graficos em SVG montados diretamente a partir dos
+# dados (sem Plotly/Kaleido nem navegador). Como nao ha rasterizacao, cada
+# relatorio sai em poucos milissegundos e lotes grandes ficam viaveis.
+
+_CSS = """
+body { font-family: Arial, Helvetica, sans-serif; color: #222; max-width: 860px; margin: 24px auto; padding: 0 16px; }
+h1 { font-size: 20px; text-align: center; border-bottom: 2px solid #0072B2; padding-bottom: 8px; }
+h2 { font-size: 17px; margin-top: 28px; }
+h3 { font-size: 14px; margin-bottom: 4px; }
+table { border-collapse: collapse; margin: 8px 0 16px; font-size: 12px; }
+th, td { border: 1px solid #999; padding: 4px 8px; text-align: center; }
+th { background: #dcdcdc; }
+ul { margin-top: 2px; }
+.vazio { color: #777; font-style: italic; }
+svg { display: block; margin: 8px auto; }
+svg text { font-family: Arial, Helvetica, sans-serif; font-size: 11px; fill: #222; }
+@media print { h2 { page-break-before: auto; } svg, table { page-break-inside: avoid; } }
+"""
+
+_PAGINA = Template("""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>$titulo</title>
+<style>$css</style>
+</head>
+<body>
+<h1>$titulo</h1>
+$corpo
+</body>
+</html>
+""")
+
+_CORES = {"Gumbel": "#D55E00", "Log-Pearson III": "#0072B2"}
+
+
+def _esc(valor):
+    return html.escape(str(valor))
+
+def _formatar(item):
+    return f"{item:.2f}" if isinstance(item, (float, np.floating)) else str(item)
+
+def _tabela_html(df, titulo):
+    cabecalho = "".join(f"<th>{_esc(c)}</th>" for c in df.columns)
+    linhas = "".join("<tr>" + "".join(f"<td>{_esc(_formatar(v))}</td>" for v in linha) + "</tr>"
+                     for linha in df.itertuples(index=False))
+    return f"<h3>{_esc(titulo)}</h3>\n<table><thead><tr>{cabecalho}</tr></thead><tbody>{linhas}</tbody></table>"
+
+def _lista_html(titulo, itens):
+    return f"<h3>{_esc(titulo)}</h3>\n<ul>" + "".join(f"<li>{_esc(i)}</li>" for i in itens) + "</ul>"
+
+def _passo_eixo(maximo, n_marcas=5):
+    bruto = maximo / n_marcas
+    potencia = 10 ** np.floor(np.log10(bruto))
+    return next(m * potencia for m in (1, 2, 2.5, 5, 10) if m * potencia >= bruto)
+
+def grafico_idf_svg(df_idf, duracao, largura=720, altura=380):
+    """Precipitacao x periodo de retorno (eixo x em log) das series Gumbel e LP3, em SVG."""
+    trs = df_idf["TR (anos)"].to_numpy(dtype=float)
+    series = {nome: df_idf[coluna].to_numpy(dtype=float) for nome, coluna in
+              (("Gumbel", f"Gumbel_{duracao}h (mm)"), ("Log-Pearson III", f"LP3_{duracao}h (mm)"))
+              if coluna in df_idf}
+    esq, dir_, topo, base = 60, 20, 40, 50
+    w, h = largura - esq - dir_, altura - topo - base
+    lx_min, lx_max = np.log10(trs.min()), np.log10(trs.max())
+    lx_max = lx_max if lx_max > lx_min else lx_min + 1
+    finitos = np.concatenate([v[np.isfinite(v)] for v in series.values()] or [np.array([1.0])])
+    passo = _passo_eixo(max(finitos.max(), 1e-9) * 1.05)
+    y_max = passo * np.ceil(finitos.max() * 1.05 / passo)
+
+    def px(tr):
+        return esq + (np.log10(tr) - lx_min) / (lx_max - lx_min) * w
+
+    def py(v):
+        return topo + h - v / y_max * h
+
+    partes = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{largura}" height="{altura}" '
+              f'viewBox="0 0 {largura} {altura}" role="img">',
+              f'<text x="{largura / 2:.0f}" y="20" text-anchor="middle" font-weight="bold">'
+              f'Precipitação Estimada vs. Período de Retorno (Duração: {_esc(duracao)}h)</text>']
+    for v in np.arange(0, y_max + passo / 2, passo):
+        y = py(v)
+        partes.append(f'<line x1="{esq}" y1="{y:.1f}" x2="{esq + w}" y2="{y:.1f}" stroke="#d3d3d3"/>'
+                      f'<text x="{esq - 6}" y="{y + 4:.1f}" text-anchor="end">{v:g}</text>')
+    for tr in trs:
+        x = px(tr)
+        partes.append(f'<line x1="{x:.1f}" y1="{topo}" x2="{x:.1f}" y2="{topo + h}" stroke="#d3d3d3"/>'
+                      f'<text x="{x:.1f}" y="{topo + h + 16}" text-anchor="middle">{tr:g}</text>')
+    partes.append(f'<rect x="{esq}" y="{topo}" width="{w}" height="{h}" fill="none" stroke="#000"/>')
+    partes.append(f'<text x="{esq + w / 2:.0f}" y="{altura - 10}" text-anchor="middle">Período de Retorno (anos)</text>')
+    partes.append(f'<text transform="translate(16 {topo + h / 2:.0f}) rotate(-90)" text-anchor="middle">'
+                  f'Precipitação (mm)</text>')
+    for k, (nome, valores) in enumerate(series.items()):
+        cor = _CORES[nome]
+        ok = np.isfinite(valores)
+        xs, ys = px(trs[ok]), py(valores[ok])
+        pontos = " ".join(f"{x:.1f},{y:.1f}" for x, y in zip(xs, ys))
+        partes.append(f'<polyline points="{pontos}" fill="none" stroke="{cor}" stroke-width="2"/>')
+        partes.append("".join(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="3.5" fill="{cor}"/>' for x, y in zip(xs, ys)))
+        ly = topo + 14 + 16 * k
+        partes.append(f'<line x1="{esq + 10}" y1="{ly - 4}" x2="{esq + 30}" y2="{ly - 4}" stroke="{cor}" stroke-width="2"/>'
+                      f'<text x="{esq + 36}" y="{ly}">{_esc(nome)}</text>')
+    partes.append("</svg>")
+    return "\n".join(partes)
+
+def _secao_idf_html(dados_idf):
+    partes = [f"<h2>1. Curvas IDF (Duração: {_esc(dados_idf['duracao'])} horas)</h2>"]
+    df_idf = dados_idf.get('df_idf')
+    if df_idf is not None:
+        partes.append(grafico_idf_svg(df_idf, dados_idf['duracao']))
+        partes.append(_tabela_html(df_idf, "Tabela de Precipitações e Intensidades"))
+    if dados_idf.get('params_gumbel'):
+        params = dados_idf['params_gumbel']
+        ks_p = params.get('ks_p', 0)
+        partes.append(_lista_html("Distribuição Gumbel", [
+            f"Parâmetro de Posição (mu): {params.get('mu', 0):.2f} mm",
+            f"Parâmetro de Escala (beta): {params.get('beta', 0):.2f} mm",
+            f"Teste K-S (p-valor): {ks_p:.4f} ({'Aceito' if ks_p > 0.05 else 'Rejeitado'} a 5% de significância)",
+        ]))
+    if dados_idf.get('params_lp3'):
+        params = dados_idf['params_lp3']
+        partes.append(_lista_html("Distribuição Log-Pearson III", [
+            f"Média (log10): {params.get('mean_log', 0):.3f}",
+            f"Desvio Padrão (log10): {params.get('std_log', 0):.3f}",
+            f"Coef. de Assimetria (log10): {params.get('skew', 0):.3f}",
+        ]))
+    comparacao = dados_idf.get('comparacao')
+    if comparacao is not None and not comparacao.empty:
+        melhores = comparacao[comparacao["melhor"]]
+        tabela = pd.DataFrame({
+            "Duração (h)": melhores["duracao"].astype(str),
+            "Distribuição": melhores["distribuicao"],
+            "AIC": melhores["aic"],
+            "BIC": melhores["bic"],
+            "K-S (p)": melhores["ks_p"],
+            "A²": melhores["ad_stat"],
+        })
+        partes.append(_tabela_html(tabela, "Melhor Distribuição por Duração (menor AIC)"))
+    return "\n".join(partes)
+
+def _secoes_projeto_html(dados_relatorio):
+    partes = ["<h2>2. Parâmetros de Projeto</h2>"]
+    blocos = []
+    if 'chuva_projeto' in dados_relatorio and dados_relatorio['chuva_projeto'].get('intensidade') is not None:
+        dados = dados_relatorio['chuva_projeto']
+        blocos.append(_lista_html("Chuva de Projeto", [
+            f"Intensidade (i): {dados['intensidade']:.2f} mm/h",
+            f"Chuva Total (P): {dados['chuva_total']:.2f} mm",
+        ]))
+    if 'tc' in dados_relatorio and dados_relatorio['tc'].get('tc_min') is not None:
+        blocos.append(f"<p>Tempo de Concentração (Tc): {dados_relatorio['tc']['tc_min']:.2f} minutos</p>")
+    if 'vazao' in dados_relatorio and dados_relatorio['vazao'].get('q_projeto') is not None:
+        dados = dados_relatorio['vazao']
+        blocos.append(_lista_html("Vazão de Projeto (Método Racional)", [
+            f"Coeficiente (C): {dados.get('C') or 0:.2f}",
+            f"Área (A): {dados.get('A') or 0:.2f} ha",
+            f"Vazão de Projeto (Q): {dados['q_projeto']:.3f} m³/s",
+        ]))
+    partes += blocos or ['<p class="vazio">Nenhum parâmetro de projeto foi calculado.</p>']
+
+    partes.append("<h2>3. Dimensionamento Hidráulico</h2>")
+    blocos = []
+    if 'conduto' in dados_relatorio and dados_relatorio['conduto'].get('diametro') is not None:
+        dados = dados_relatorio['conduto']
+        blocos.append(_lista_html("Conduto Circular", [
+            f"Diâmetro Recomendado: {dados['diametro']:.3f} m",
+            f"Vazão de Capacidade: {dados['vazao_calc']:.3f} m³/s",
+            f"Velocidade: {dados['velocidade']:.3f} m/s",
+        ]))
+    if 'canal' in dados_relatorio and dados_relatorio['canal'].get('yn') is not None:
+        dados = dados_relatorio['canal']
+        blocos.append(_lista_html(f"Canal Aberto ({dados.get('tipo', 'N/A')})", [
+            f"Profundidade Normal (yn): {dados['yn']:.3f} m",
+            f"Profundidade Crítica (yc): {dados['yc']:.3f} m",
+            f"Regime: {dados.get('regime', 'N/A')}",
+        ]))
+    partes += blocos or ['<p class="vazio">Nenhum dimensionamento hidráulico foi realizado.</p>']
+    return "\n".join(partes)
+
+@medido("relatorio.gerar_html")
+def gerar_html(dados_relatorio, titulo="Relatório de Análise Pluviométrica e Hidráulica - PLUVIAH"):
+    """Relatorio completo em HTML autocontido (CSS embutido, graficos SVG), como texto."""
+    with etapa("relatorio.construir_html"):
+        corpo = []
+        if 'idf' in dados_relatorio:
+            corpo.append(_secao_idf_html(dados_relatorio['idf']))
+        corpo.append(_secoes_projeto_html(dados_relatorio))
+        return _PAGINA.substitute(titulo=_esc(titulo), css=_CSS, corpo="\n".join(corpo))
+
+def gerar_html_bytes(dados_relatorio):
+    return gerar_html(dados_relatorio).encode("utf-8")
+
+def exportar_html_lote(relatorios, pasta, prefixo="Relatorio_PLUVIAH"):
+    """
+    Grava um HTML por relatorio. `relatorios` e um dicionario {nome: dados_relatorio}
+    ou uma lista (os arquivos sao numerados). Retorna os caminhos gravados.
+    """
+    itens = relatorios.items() if isinstance(relatorios, dict) else enumerate(relatorios, start=1)
+    os.makedirs(pasta, exist_ok=True)
+    caminhos = []
+    with etapa("relatorio.exportar_html_lote"):
+        for nome, dados in itens:
+            caminho = os.path.join(pasta, f"{prefixo}_{nome}.html")
+            with open(caminho, "w", encoding="utf-8") as f:
+                f.write(gerar_html(dados))
+            caminhos.append(caminho)
+    return caminhos
@@ -0,0 +1,222 @@
+# reservatorio.py
+
+import numpy as np
+import pandas as pd
+from config import G
+from diagnostico import etapa, medido
+
+# Propagacao de hidrogramas em reservatorios de detencao pelo metodo de Puls
+# modificado (indicacao de armazenamento):
+#     2S/dt + O (t+1) = I(t) + I(t+1) + 2S/dt - O (t)
+# A curva 2S/dt + O de cada lago e calculada uma unica vez como tabela
+# crescente (cota, volume, vazao de saida); a cada passo o novo valor de
+# indicacao e localizado na tabela por interpolacao linear. O passo no tempo
+# e sequencial, mas cada passo atende todas as combinacoes lago x chuva de
+# uma vez: as tabelas de todos os lagos ficam em um unico vetor normalizado,
+# e uma so busca (searchsorted) serve a todas as combinacoes.
+#
+# Lagos sao dicionarios {"cotas", "volumes", "estruturas"}, criados por
+# lago_prismatico ou lago_tabela; estruturas de saida por orificio e vertedor.
+
+
+# --- Estruturas de saida ---
+
+def orificio(diametro, cota, Cd=0.61, quantidade=1):
+    """Orificio circular com soleira na `cota` (m). Carga medida ate o centro."""
+    return {"tipo": "orificio", "diametro": diametro, "cota": cota, "Cd": Cd, "quantidade": quantidade}
+
+def vertedor(largura, cota, Cw=1.84):
+    """Vertedor retangular de soleira delgada com crista na `cota` (m); Cw em m^0.5/s."""
+    return {"tipo": "vertedor", "largura": largura, "cota": cota, "Cw": Cw}
+
+def vazao_estruturas(estruturas, cota):
+    """Vazao de saida total (m³/s) das estruturas para a(s) cota(s) do nivel d'agua."""
+    h = np.asarray(cota, dtype=float)
+    Q = np.zeros_like(h)
+    for e in estruturas:
+        if e["tipo"] == "orificio":
+            area = np.pi * e["diametro"] ** 2 / 4.0
+            carga = np.maximum(h - e["cota"] - e["diametro"] / 2.0, 0.0)
+            Q = Q + e["quantidade"] * e["Cd"] * area * np.sqrt(2 * G * carga)
+        elif e["tipo"] == "vertedor":
+            Q = Q + e["Cw"] * e["largura"] * np.maximum(h - e["cota"], 0.0) ** 1.5
+        else:
+            raise ValueError(f"Estrutura de saida '{e['tipo']}' invalida. Use 'orificio' ou 'vertedor'.")
+    return Q
+
+
+# --- Curvas cota-volume ---
+
+def lago_prismatico(comprimento, largura, profundidade, talude=0.0, estruturas=(), cota_fundo=0.0, n_cotas=100):
+    """
+    Lago de fundo retangular (comprimento x largura, m) com taludes laterais
+    `talude` (H:V). Volume exato do tronco de piramide ate cada cota.
+    """
+    h = np.linspace(0.0, profundidade, n_cotas)
+    z = talude
+    volumes = comprimento * largura * h + (comprimento + largura) * z * h**2 + 4.0 / 3.0 * z**2 * h**3
+    return {"cotas": cota_fundo + h, "volumes": volumes, "estruturas": list(estruturas)}
+
+def lago_tabela(cotas, areas=None, volumes=None, estruturas=()):
+    """
+    Lago definido por levantamento: cotas com areas do espelho d'agua (m²),
+    integradas pela media das areas, ou diretamente com os volumes (m³).
+    """
+    cotas = np.asarray(cotas, dtype=float)
+    if volumes is None:
+        if areas is None:
+            raise ValueError("Informe as areas ou os volumes de cada cota.")
+        areas = np.asarray(areas, dtype=float)
+        volumes = np.concatenate([[0.0], np.cumsum((areas[1:] + areas[:-1]) / 2.0 * np.diff(cotas))])
+    return {"cotas": cotas, "volumes": np.asarray(volumes, dtype=float), "estruturas": list(estruturas)}
+
+
+# --- Tabelas de indicacao de armazenamento ---
+
+def tabelas_indicacao(lagos, dt_s, n_cotas=200):
+    """
+    Tabelas (n_lagos, n_cotas) de cota, volume, saida e indicacao 2S/dt + O,
+    com as cotas de cada lago reamostradas em n_cotas pontos. A indicacao e
+    forcada a ser estritamente crescente para a busca inversa.
+    """
+    lagos = [lagos] if isinstance(lagos, dict) else list(lagos)
+    tabela = {c: np.empty((len(lagos), n_cotas)) for c in ("cota", "volume", "saida", "indicacao")}
+    for k, lago in enumerate(lagos):
+        cotas = np.linspace(lago["cotas"][0], lago["cotas"][-1], n_cotas)
+        volumes = np.interp(cotas, lago["cotas"], lago["volumes"])
+        saida = vazao_estruturas(lago["estruturas"], cotas)
+        indicacao = np.maximum.accumulate(2.0 * volumes / dt_s + saida)
+        indicacao = indicacao + np.arange(n_cotas) * 1e-12 * max(indicacao[-1], 1.0)
+        for c, v in zip(("cota", "volume", "saida", "indicacao"), (cotas, volumes, saida, indicacao)):
+            tabela[c][k] = v
+    return tabela
+
+class _Busca:
+    """Interpolacao inversa na indicacao de varios lagos com um unico searchsorted."""
+
+    def __init__(self, indicacao, linha):
+        n_lagos, self.m = indicacao.shape
+        self.minimo = indicacao[linha, 0]
+        self.escala = indicacao[linha, -1] - self.minimo
+        # Cada lago ocupa o intervalo [2k, 2k + 1] do vetor normalizado
+        normalizada = (indicacao - indicacao[:, :1]) / (indicacao[:, -1:] - indicacao[:, :1])
+        self.plano = (normalizada + 2.0 * np.arange(n_lagos)[:, None]).ravel()
+        self.deslocamento = 2.0 * linha
+        self.primeiro = linha * self.m
+
+    def localizar(self, valor):
+        u = np.clip((valor - self.minimo) / self.escala, 0.0, 1.0) + self.deslocamento
+        j = np.clip(np.searchsorted(self.plano, u, side="right") - 1, self.primeiro, self.primeiro + self.m - 2)
+        return j, (u - self.plano[j]) / (self.plano[j + 1] - self.plano[j])
+
+def _valor(tabela, j, w):
+    plano = tabela.ravel()
+    return plano[j] + w * (plano[j + 1] - plano[j])
+
+
+# --- Propagacao ---
+
+@medido("reservatorio.propagar_puls")
+def propagar_puls(entradas, lagos, dt_min, cota_inicial=None, duracao_extra_min=0.0, n_cotas=200):
+    """
+    Propaga os hidrogramas de entrada (m³/s; (n_chuvas, n_passos) ou 1D) em
+    cada lago pelo metodo de Puls modificado. Todas as combinacoes lago x
+    chuva sao propagadas juntas. cota_inicial: nivel no inicio (padrao: fundo);
+    duracao_extra_min: tempo acrescentado com entrada nula para o esvaziamento.
+
+    Retorna um dicionario com o tempo (min), as entradas e as series
+    (n_lagos, n_chuvas, n_passos) de saida (m³/s), cota (m) e volume (m³),
+    alem de `transbordou` (n_lagos, n_chuvas): a indicacao passou do topo da
+    tabela, o nivel ficou limitado a cota maxima e o excesso foi descartado.
+    """
+    entradas = np.atleast_2d(np.asarray(entradas, dtype=float))
+    extra = int(round(duracao_extra_min / dt_min))
+    if extra > 0:
+        entradas = np.pad(entradas, ((0, 0), (0, extra)))
+    lagos = [lagos] if isinstance(lagos, dict) else list(lagos)
+    n_lagos, (n_chuvas, n_passos) = len(lagos), entradas.shape
+    dt_s = dt_min * 60.0
+
+    with etapa("reservatorio.tabelas_indicacao", linhas=n_lagos * n_cotas):
+        tabela = tabelas_indicacao(lagos, dt_s, n_cotas)
+
+    # Combinacao s = lago * n_chuvas + chuva
+    linha = np.repeat(np.arange(n_lagos), n_chuvas)
+    busca = _Busca(tabela["indicacao"], linha)
+    afluencia = np.tile(entradas, (n_lagos, 1))
+    topo = tabela["indicacao"][linha, -1]
+
+    saida, cota, volume = (np.empty((n_lagos * n_chuvas, n_passos)) for _ in range(3))
+    h0 = tabela["cota"][:, 0] if cota_inicial is None else np.broadcast_to(np.asarray(cota_inicial, float), (n_lagos,))
+    v0 = np.array([np.interp(h0[k], tabela["cota"][k], tabela["volume"][k]) for k in range(n_lagos)])[linha]
+    o0 = np.array([np.interp(h0[k], tabela["cota"][k], tabela["saida"][k]) for k in range(n_lagos)])[linha]
+    saida[:, 0], volume[:, 0] = o0, v0
+    cota[:, 0] = np.asarray(h0, dtype=float)[linha]
+    psi = 2.0 * v0 / dt_s - o0
+    transbordou = np.zeros(len(linha), dtype=bool)
+
+    with etapa("reservatorio.passos", linhas=len(linha) * n_passos):
+        for t in range(n_passos - 1):
+            indicacao = afluencia[:, t] + afluencia[:, t + 1] + psi
+            transbordou |= indicacao > topo
+            indicacao = np.minimum(indicacao, topo)
+            j, w = busca.localizar(indicacao)
+            saida[:, t + 1] = _valor(tabela["saida"], j, w)
+            cota[:, t + 1] = _valor(tabela["cota"], j, w)
+            volume[:, t + 1] = _valor(tabela["volume"], j, w)
+            psi = indicacao - 2.0 * saida[:, t + 1]
+
+    forma = (n_lagos, n_chuvas, n_passos)
+    return {
+        "tempo_min": np.arange(n_passos) * dt_min,
+        "entrada_m3s": entradas,
+        "saida_m3s": saida.reshape(forma),
+        "cota_m": cota.reshape(forma),
+        "volume_m3": volume.reshape(forma),
+        "transbordou": transbordou.reshape(n_lagos, n_chuvas),
+    }
+
+def resumo_propagacao(resultado):
+    """Tabela com uma linha por lago x chuva: picos, amortecimento, nivel e volume maximos."""
+    n_lagos, n_chuvas, _ = resultado["saida_m3s"].shape
+    entrada = np.broadcast_to(resultado["entrada_m3s"], resultado["saida_m3s"].shape)
+    pico_entrada = entrada.max(axis=-1)
+    pico_saida = resultado["saida_m3s"].max(axis=-1)
+    dt = resultado["tempo_min"][1] - resultado["tempo_min"][0] if len(resultado["tempo_min"]) > 1 else 0.0
+    atraso = (resultado["saida_m3s"].argmax(axis=-1) - entrada.argmax(axis=-1)) * dt
+    with np.errstate(divide='ignore', invalid='ignore'):
+        amortecimento = np.where(pico_entrada > 0, 100.0 * (1 - pico_saida / pico_entrada), 0.0)
+    lago, chuva = np.meshgrid(np.arange(n_lagos), np.arange(n_chuvas), indexing="ij")
+    return pd.DataFrame({
+        "lago": lago.ravel(), "chuva": chuva.ravel(),
+        "Q_entrada_max (m³/s)": pico_entrada.ravel(), "Q_saida_max (m³/s)": pico_saida.ravel(),
+        "amortecimento (%)": amortecimento.ravel(), "atraso_pico (min)": atraso.ravel(),
+        "cota_max (m)": resultado["cota_m"].max(axis=-1).ravel(),
+        "volume_max (m³)": resultado["volume_m3"].max(axis=-1).ravel(),
+        "transbordou": resultado["transbordou"].ravel(),
+    })
+
+def menor_lago_viavel(resultado, vazao_max):
+    """
+    Primeiro lago (na ordem informada, ex.: do menor para o maior) em que
+    nenhuma chuva excede `vazao_max` na saida nem transborda. None se nenhum.
+    """
+    atende = (resultado["saida_m3s"].max(axis=-1) <= vazao_max) & ~resultado["transbordou"]
+    viaveis = np.flatnonzero(atende.all(axis=1))
+    return int(viaveis[0]) if len(viaveis) else None
+
+
+# --- Hidrograma de entrada pelo metodo racional ---
+
+def hidrograma_racional_modificado(Q_pico, tc_min, duracao_min, dt_min):
+    """
+    Hidrograma trapezoidal do metodo racional modificado: subida em tc,
+    patamar ate o fim da chuva e recessao em tc. Para duracao < tc o pico
+    fica reduzido a Q * duracao / tc. Q_pico (m³/s) pode ser um array
+    (uma linha por chuva); retorna (n_chuvas, n_passos).
+    """
+    Q = np.asarray(Q_pico, dtype=float).reshape(-1, 1)
+    t = np.arange(0.0, duracao_min + tc_min + dt_min / 2, dt_min)
+    forma = np.minimum.reduce([t / tc_min, np.full_like(t, duracao_min / tc_min),
+                               (duracao_min + tc_min - t) / tc_min, np.ones_like(t)])
+    return Q * np.clip(forma, 0.0, None)
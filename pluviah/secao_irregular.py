@@ -0,0 +1,151 @@
+# secao_irregular.py
+
+import numpy as np
+from config import G
+from manning import manning_Q_vetor, bissecao_vetorial
+from diagnostico import etapa
+
+
+class _Subsecao:
+    """
+    Tabelas de somas acumuladas de uma parte da secao (pontos x-z ordenados).
+
+    Cada segmento do levantamento contribui para a largura T(h) e o perimetro
+    P(h) com taxas constantes entre as cotas de suas extremidades (e com saltos
+    nos segmentos horizontais). Essas contribuicoes sao agregadas nas cotas
+    distintas e acumuladas uma unica vez; entre duas cotas consecutivas T e P
+    sao lineares e A = integral de T e quadratica.
+    """
+
+    def __init__(self, x, z, parede_esquerda, parede_direita):
+        x0, x1, z0, z1 = x[:-1], x[1:], z[:-1], z[1:]
+        z_min, z_max = np.minimum(z0, z1), np.maximum(z0, z1)
+        dx, dz = np.abs(x1 - x0), z_max - z_min
+        comprimento = np.hypot(dx, dz)
+        inclinado = dz > 0
+
+        # Eventos: (cota, taxa dT/dh, salto em T, taxa dP/dh, salto em P)
+        taxa_T = np.where(inclinado, dx / np.where(inclinado, dz, 1.0), 0.0)
+        taxa_P = np.where(inclinado, comprimento / np.where(inclinado, dz, 1.0), 0.0)
+        cotas = [z_min, z_max[inclinado], z_min[~inclinado]]
+        d_taxa_T = [taxa_T, -taxa_T[inclinado], np.zeros((~inclinado).sum())]
+        d_taxa_P = [taxa_P, -taxa_P[inclinado], np.zeros((~inclinado).sum())]
+        saltos = [np.zeros_like(z_min), np.zeros(inclinado.sum()), dx[~inclinado]]
+        # Paredes verticais acima das extremidades: so acrescentam perimetro
+        for ativa, cota in ((parede_esquerda, z[0]), (parede_direita, z[-1])):
+            if ativa:
+                cotas.append([cota])
+                d_taxa_T.append([0.0])
+                d_taxa_P.append([1.0])
+                saltos.append([0.0])
+
+        cotas = np.concatenate(cotas)
+        self.e, idx = np.unique(cotas, return_inverse=True)
+
+        def soma(v):
+            return np.bincount(idx, weights=np.concatenate(v), minlength=len(self.e))
+
+        self.taxa_T = np.cumsum(soma(d_taxa_T))
+        self.taxa_P = np.cumsum(soma(d_taxa_P))
+        saltos = np.cumsum(soma(saltos))
+
+        de = np.diff(self.e)
+        # Valores no inicio de cada faixa de cotas (limite a direita, com saltos)
+        self.T0 = saltos + np.concatenate([[0.0], np.cumsum(self.taxa_T[:-1] * de)])
+        self.P0 = saltos + np.concatenate([[0.0], np.cumsum(self.taxa_P[:-1] * de)])
+        area_faixa = self.T0[:-1] * de + 0.5 * self.taxa_T[:-1] * de**2
+        self.A0 = np.concatenate([[0.0], np.cumsum(area_faixa)])
+
+    def geometria(self, h):
+        """A, P e T para um array de cotas do nivel d'agua h."""
+        k = np.searchsorted(self.e, h, side="right") - 1
+        seco = k < 0
+        k = np.maximum(k, 0)
+        dh = np.where(seco, 0.0, h - self.e[k])
+        T = np.where(seco, 0.0, self.T0[k] + self.taxa_T[k] * dh)
+        A = np.where(seco, 0.0, self.A0[k] + self.T0[k] * dh + 0.5 * self.taxa_T[k] * dh**2)
+        P = np.where(seco, 0.0, self.P0[k] + self.taxa_P[k] * dh)
+        return A, P, T
+
+
+class SecaoIrregular:
+    """
+    Secao transversal levantada (pares estacao-cota), com subdivisao opcional
+    em canal principal e planicies por verticais nas estacoes `divisoes` e um
+    coeficiente de Manning por subsecao. As extremidades sao prolongadas por
+    paredes verticais; as verticais de divisao nao contam no perimetro molhado.
+    Profundidades y sao medidas a partir do ponto mais baixo (talvegue).
+    """
+
+    def __init__(self, estacoes, cotas, n, divisoes=()):
+        x = np.asarray(estacoes, dtype=float)
+        z = np.asarray(cotas, dtype=float)
+        if len(x) < 2 or len(x) != len(z) or np.any(np.diff(x) < 0):
+            raise ValueError("Informe ao menos 2 pontos com estacoes em ordem crescente.")
+        divisoes = sorted(float(d) for d in divisoes)
+        if any(d <= x[0] or d >= x[-1] for d in divisoes):
+            raise ValueError("As divisoes devem estar dentro da secao.")
+        n = np.broadcast_to(np.asarray(n, dtype=float), (len(divisoes) + 1,))
+        self.n = n
+        self.cota_fundo = float(z.min())
+
+        # Corta a poligonal em cada divisao; um trecho vertical exatamente
+        # sobre a divisao fica na subsecao da esquerda
+        partes = []
+        for d in divisoes:
+            i = int(np.searchsorted(x, d, side="right"))
+            if x[i - 1] < d:
+                z_d = z[i - 1] + (z[i] - z[i - 1]) * (d - x[i - 1]) / (x[i] - x[i - 1])
+                partes.append((np.append(x[:i], d), np.append(z[:i], z_d)))
+            else:
+                z_d = z[i - 1]
+                partes.append((x[:i], z[:i]))
+            x, z = np.insert(x[i:], 0, d), np.insert(z[i:], 0, z_d)
+        partes.append((x, z))
+        self.subsecoes = [
+            _Subsecao(xp, zp, i == 0, i == len(partes) - 1) for i, (xp, zp) in enumerate(partes)
+        ]
+
+    def _cota(self, y):
+        return self.cota_fundo + np.asarray(y, dtype=float)
+
+    def geometria(self, y):
+        """Area (A), Perimetro Molhado (P) e Largura do Topo (T) totais para arrays de profundidade."""
+        h = self._cota(y)
+        with etapa("secao_irregular.geometria", linhas=h.size):
+            partes = [s.geometria(h) for s in self.subsecoes]
+        A = sum(p[0] for p in partes)
+        P = sum(p[1] for p in partes)
+        T = sum(p[2] for p in partes)
+        return A, P, T
+
+    def vazao(self, y, S):
+        """Vazao por Manning somando as subsecoes, cada uma com seu n."""
+        h = self._cota(y)
+        Q = 0.0
+        for subsecao, n in zip(self.subsecoes, self.n):
+            A, P, _ = subsecao.geometria(h)
+            Q = Q + manning_Q_vetor(A, P, S, n)
+        return Q
+
+    def y_normal(self, Qd, S, y_max=50.0):
+        """Profundidade normal (escalar ou array). None/NaN se nao houver solucao."""
+        Qd = np.asarray(Qd, dtype=float)
+        y = bissecao_vetorial(lambda y: self.vazao(y, S) - Qd, np.full(Qd.shape, 1e-4), np.full(Qd.shape, y_max))
+        return _saida(y)
+
+    def y_critico(self, Qd, y_max=50.0):
+        """Profundidade critica (Fr = 1 com A e T totais). None/NaN se nao houver solucao."""
+        Qd = np.asarray(Qd, dtype=float)
+        def F(y):
+            A, _, T = self.geometria(y)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(A > 0, Qd / A / np.sqrt(G * A / T), np.inf) - 1.0
+        y = bissecao_vetorial(F, np.full(Qd.shape, 1e-4), np.full(Qd.shape, y_max))
+        return _saida(y)
+
+
+def _saida(y):
+    if np.ndim(y) == 0:
+        return None if np.isnan(y) else float(y)
+    return y
@@ -0,0 +1,213 @@
+# serie_compacta.py
+
+import hashlib
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Representacao compacta das series de precipitacao mantidas pelo dashboard.
+# Os valores ficam em float32 e o tempo fica implicito (inicio + passo) quando
+# a serie e regular; caso contrario guarda-se um indice int64 (ns). Sessoes que
+# carregam o mesmo conteudo compartilham uma unica copia somente leitura no
+# RegistroSeries, com contagem de referencias por sessao.
+
+
+def _somente_leitura(array):
+    array.flags.writeable = False
+    return array
+
+
+class SerieCompacta:
+    """Serie imutavel de precipitacao (mm) com tempo regular implicito ou indice int64."""
+
+    __slots__ = ("valores", "inicio", "passo", "tempos", "chave")
+
+    def __init__(self, valores, inicio=None, passo=None, tempos=None):
+        self.valores = _somente_leitura(np.asarray(valores, dtype=np.float32))
+        self.inicio = inicio
+        self.passo = passo
+        self.tempos = None if tempos is None else _somente_leitura(np.asarray(tempos, dtype=np.int64))
+        h = hashlib.sha256(self.valores.tobytes())
+        h.update(self.tempos.tobytes() if self.tempos is not None else repr((inicio, passo)).encode())
+        self.chave = h.hexdigest()
+
+    def __getstate__(self):
+        return (np.asarray(self.valores), self.inicio, self.passo, self.tempos)
+
+    def __setstate__(self, estado):
+        valores, inicio, passo, tempos = estado
+        self.__init__(valores, inicio, passo, tempos)
+
+    @classmethod
+    def de_dataframe(cls, df, coluna="precipitacao"):
+        """Converte o DataFrame de load_data (indice datahora ordenado)."""
+        tempos = df.index.to_numpy(dtype="datetime64[ns]").view(np.int64)
+        valores = df[coluna].to_numpy()
+        if len(tempos) >= 2:
+            passos = np.diff(tempos)
+            if passos[0] > 0 and np.all(passos == passos[0]):
+                return cls(valores, inicio=int(tempos[0]), passo=int(passos[0]))
+        elif len(tempos) == 1:
+            return cls(valores, inicio=int(tempos[0]), passo=0)
+        return cls(valores, tempos=tempos)
+
+    @property
+    def regular(self):
+        return self.tempos is None
+
+    def __len__(self):
+        return len(self.valores)
+
+    @property
+    def nbytes(self):
+        return self.valores.nbytes + (0 if self.tempos is None else self.tempos.nbytes)
+
+    def indice(self):
+        """DatetimeIndex reconstruido (datahora)."""
+        if self.tempos is None:
+            ns = self.inicio + self.passo * np.arange(len(self.valores), dtype=np.int64)
+        else:
+            ns = self.tempos
+        return pd.DatetimeIndex(ns.view("datetime64[ns]"), name="datahora")
+
+    def para_dataframe(self):
+        """DataFrame no formato de load_data (precipitacao em float64 para os calculos)."""
+        valores = _somente_leitura(self.valores.astype(np.float64))
+        return pd.DataFrame({"precipitacao": valores}, index=self.indice(), copy=False)
+
+
+class Referencia:
+    """
+    Referencia de uma sessao a uma serie do registro. A referencia e liberada
+    com liberar() ou automaticamente quando o objeto e coletado (fim da sessao).
+    """
+
+    def __init__(self, registro, serie, sessao):
+        self.registro = registro
+        self.serie = serie
+        self.chave = serie.chave
+        self.sessao = sessao
+        self._finalizador = weakref.finalize(self, registro.liberar, serie.chave, sessao)
+
+    def dataframe(self):
+        return self.registro.dataframe(self.chave)
+
+    def liberar(self):
+        self._finalizador()
+
+
+class RegistroSeries:
+    """
+    Copias unicas de series, compartilhadas entre sessoes. Mantem tambem os
+    DataFrames materializados das `max_materializadas` series usadas mais
+    recentemente, que tambem sao compartilhados (somente leitura).
+    """
+
+    def __init__(self, max_materializadas=2):
+        self.max_materializadas = max_materializadas
+        self._trava = threading.RLock()
+        self._series = {}
+        self._sessoes = {}
+        self._materializadas = OrderedDict()
+
+    def adquirir(self, dados, sessao):
+        """Registra a serie (DataFrame ou SerieCompacta) para a sessao e devolve uma Referencia."""
+        serie = dados if isinstance(dados, SerieCompacta) else SerieCompacta.de_dataframe(dados)
+        with self._trava:
+            # Conteudo identico ja registrado: descarta a copia nova
+            serie = self._series.setdefault(serie.chave, serie)
+            sessoes = self._sessoes.setdefault(serie.chave, {})
+            sessoes[sessao] = sessoes.get(sessao, 0) + 1
+        return Referencia(self, serie, sessao)
+
+    def liberar(self, chave, sessao):
+        with self._trava:
+            sessoes = self._sessoes.get(chave)
+            if not sessoes or sessao not in sessoes:
+                return
+            sessoes[sessao] -= 1
+            if sessoes[sessao] <= 0:
+                del sessoes[sessao]
+            if not sessoes:
+                del self._sessoes[chave]
+                del self._series[chave]
+                self._materializadas.pop(chave, None)
+
+    def dataframe(self, chave):
+        """DataFrame compartilhado da serie (materializado sob demanda)."""
+        with self._trava:
+            if chave in self._materializadas:
+                self._materializadas.move_to_end(chave)
+                return self._materializadas[chave]
+            serie = self._series[chave]
+        df = serie.para_dataframe()
+        with self._trava:
+            if chave in self._series:
+                self._materializadas[chave] = df
+                while len(self._materializadas) > self.max_materializadas:
+                    self._materializadas.popitem(last=False)
+        return df
+
+    def referencias(self, chave):
+        with self._trava:
+            return sum(self._sessoes.get(chave, {}).values())
+
+    def uso(self):
+        """Uma linha por serie: registros, bytes compactos e materializados, sessoes que a usam."""
+        with self._trava:
+            linhas = [{
+                "chave": chave[:12],
+                "registros": len(serie),
+                "regular": serie.regular,
+                "bytes_compactos": serie.nbytes,
+                "bytes_materializados": estimar_bytes(self._materializadas[chave]) if chave in self._materializadas else 0,
+                "sessoes": len(self._sessoes.get(chave, {})),
+            } for chave, serie in self._series.items()]
+        return pd.DataFrame(linhas, columns=["chave", "registros", "regular", "bytes_compactos",
+                                             "bytes_materializados", "sessoes"])
+
+    def memoria_sessao(self, estado):
+        """
+        Contabilidade de memoria de uma sessao a partir do seu estado (dicionario
+        ou st.session_state). Series compartilhadas sao atribuidas em fracao
+        igual a cada sessao que as usa.
+        """
+        linhas = []
+        for nome, valor in dict(estado).items():
+            if isinstance(valor, Referencia):
+                with self._trava:
+                    n_sessoes = max(len(self._sessoes.get(valor.chave, {})), 1)
+                    materializada = self._materializadas.get(valor.chave)
+                total = valor.serie.nbytes + (estimar_bytes(materializada) if materializada is not None else 0)
+                linhas.append({"item": nome, "bytes": total, "compartilhado_com": n_sessoes,
+                               "bytes_atribuidos": total / n_sessoes})
+            else:
+                tamanho = estimar_bytes(valor)
+                linhas.append({"item": nome, "bytes": tamanho, "compartilhado_com": 1, "bytes_atribuidos": tamanho})
+        df = pd.DataFrame(linhas, columns=["item", "bytes", "compartilhado_com", "bytes_atribuidos"])
+        return df.sort_values("bytes_atribuidos", ascending=False).reset_index(drop=True)
+
+
+def estimar_bytes(valor, _vistos=None):
+    """Estimativa do tamanho em memoria de DataFrames, arrays e colecoes aninhadas."""
+    vistos = set() if _vistos is None else _vistos
+    if id(valor) in vistos:
+        return 0
+    vistos.add(id(valor))
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True, index=True).sum())
+    if isinstance(valor, (pd.Series, pd.Index)):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, SerieCompacta):
+        return valor.nbytes
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(estimar_bytes(v, vistos) for v in valor.values())
+    if isinstance(valor, (list, tuple, set)):
+        return sys.getsizeof(valor) + sum(estimar_bytes(v, vistos) for v in valor)
+    return sys.getsizeof(valor)
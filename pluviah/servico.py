@@ -0,0 +1,447 @@
+# servico.py
+"""
+Servico HTTP local (JSON) com os calculos do PLUVIAH, para integracao com
+outros sistemas (SIG, gestao de ativos) sem passar pelo dashboard.
+
+Uso (a partir da pasta pluviah/):
+    python servico.py --porta 8765 --processos 2
+
+Rotas POST (corpo JSON; campos numericos aceitam escalar ou lista):
+    /idf             {"maximas": {"1": [...], "24": [...]}, "trs": [...]}
+                     ou {"datahora": [...], "precipitacao": [...], "duracoes": [...], "trs": [...]}
+    /chuva_projeto   {"tr", "metodo", "gumbel_params" ou "lp3_params"}
+                     ou {"params_idf": {"K", "a", "b", "c"}, "tr", "duracao_min"}
+    /tc              {"sub_bacias": [{"L_m": ..., "S_m_m": ...}, ...], "metodos": [...]}
+    /vazao_racional  {"C", "i_mm_h", "A_ha"}
+    /conduto         {"Q", "n", "S", "d_min", "d_max", "passo"}
+    /y_normal        {"Q", "b", "z", "S", "n"}
+Rotas GET: /saude e /metricas (latencia, vazao de requisicoes e tamanho dos lotes).
+
+As rotas /vazao_racional, /conduto e /y_normal sao agrupadas: requisicoes
+concorrentes que chegam dentro de uma janela curta (alguns milissegundos) sao
+concatenadas e resolvidas por uma unica chamada vetorizada. Os ajustes de /idf
+rodam em um pool de processos.
+"""
+
+import argparse
+import json
+import math
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from diagnostico import etapa
+from idf import (calculate_annual_maxima, calculate_idf_curves, calcular_chuva_projeto,
+                 ajustar_equacao_idf, intensidade_equacao_idf)
+from manning import dimensionar_conduto_circular_vetor, y_normal_vetor, y_critico_vetor
+from racional import calcular_vazao_racional_vetor
+from tc import calcular_tc_lote, METODOS_TC
+
+TRS_PADRAO = [2, 5, 10, 25, 50, 100]
+
+
+class RotaDesconhecida(Exception):
+    """Rota POST inexistente (respondida com 404)."""
+
+
+def _exigir(corpo, *campos):
+    """Levanta ValueError (resposta 400) listando os campos obrigatorios ausentes."""
+    faltando = [c for c in campos if c not in corpo]
+    if faltando:
+        raise ValueError(f"Campos obrigatorios ausentes: {', '.join(faltando)}.")
+
+def _para_json(valor):
+    """Converte arrays e escalares NumPy em tipos JSON (NaN e infinito viram null)."""
+    if isinstance(valor, dict):
+        return {str(k): _para_json(v) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_para_json(v) for v in valor]
+    if isinstance(valor, np.ndarray):
+        return _para_json(valor.tolist())
+    if isinstance(valor, np.generic):
+        return _para_json(valor.item())
+    if isinstance(valor, float) and not math.isfinite(valor):
+        return None
+    return valor
+
+
+# --- Ajuste IDF (executado no pool de processos) ---
+
+def ajustar_idf(dados):
+    """
+    Ajusta Gumbel e Log-Pearson III por duracao e, com duas ou mais duracoes,
+    a equacao IDF sobre as intensidades Gumbel. Aceita maximas anuais prontas
+    ou a serie horaria (datahora, precipitacao) e as duracoes em horas.
+    """
+    trs = np.asarray(dados.get("trs", TRS_PADRAO), dtype=float)
+    if "maximas" in dados:
+        maximas = {d: pd.Series(v, dtype=float) for d, v in dados["maximas"].items()}
+    else:
+        df = pd.DataFrame({"datahora": pd.to_datetime(dados["datahora"]),
+                           "precipitacao": np.asarray(dados["precipitacao"], dtype=float)})
+        df = df.dropna().sort_values("datahora").set_index("datahora")
+        maximas = {d: calculate_annual_maxima(df, int(d)) for d in dados["duracoes"]}
+
+    resultado = {"duracoes": {}}
+    pares = []
+    for chave, serie in maximas.items():
+        duracao = float(chave)
+        df_idf, params_gumbel, params_lp3, _, _, _ = calculate_idf_curves(serie, duracao, trs)
+        if df_idf is None:
+            resultado["duracoes"][chave] = {"erro": "Menos de 5 anos de maximas."}
+            continue
+        gumbel = df_idf.iloc[:, 1].to_numpy()
+        resultado["duracoes"][chave] = {
+            "gumbel": params_gumbel,
+            "lp3": params_lp3,
+            "precipitacao_gumbel_mm": gumbel,
+            "precipitacao_lp3_mm": df_idf.iloc[:, 2].to_numpy(),
+        }
+        pares += [(duracao * 60.0, tr, p / duracao) for tr, p in zip(trs, gumbel)]
+    resultado["trs"] = trs
+    if len(pares) >= 2 * len(trs):
+        resultado["equacao_idf"] = ajustar_equacao_idf(*zip(*pares))
+    return resultado
+
+
+# --- Metricas ---
+
+class _Metricas:
+    """Contadores por rota: requisicoes, erros, latencias recentes e lotes."""
+
+    def __init__(self, janela=2000):
+        self.inicio = time.monotonic()
+        self.janela = janela
+        self.trava = threading.Lock()
+        self.rotas = {}
+
+    def _rota(self, rota):
+        if rota not in self.rotas:
+            self.rotas[rota] = {"requisicoes": 0, "erros": 0, "lotes": 0, "itens_em_lote": 0,
+                                "latencias": deque(maxlen=self.janela)}
+        return self.rotas[rota]
+
+    def registrar(self, rota, latencia_s, erro=False):
+        with self.trava:
+            item = self._rota(rota)
+            item["requisicoes"] += 1
+            item["erros"] += int(erro)
+            item["latencias"].append(latencia_s)
+
+    def registrar_lote(self, rota, itens):
+        with self.trava:
+            item = self._rota(rota)
+            item["lotes"] += 1
+            item["itens_em_lote"] += itens
+
+    def resumo(self):
+        with self.trava:
+            decorrido = time.monotonic() - self.inicio
+            rotas = {}
+            for rota, item in self.rotas.items():
+                lat = np.array(item["latencias"]) * 1000.0
+                p50, p95, p99 = np.percentile(lat, [50, 95, 99]) if lat.size else (np.nan,) * 3
+                rotas[rota] = {
+                    "requisicoes": item["requisicoes"],
+                    "erros": item["erros"],
+                    "requisicoes_por_s": item["requisicoes"] / decorrido,
+                    "latencia_media_ms": lat.mean() if lat.size else np.nan,
+                    "latencia_p50_ms": p50,
+                    "latencia_p95_ms": p95,
+                    "latencia_p99_ms": p99,
+                    "latencia_max_ms": lat.max() if lat.size else np.nan,
+                    "lotes": item["lotes"],
+                    "tamanho_medio_lote": item["itens_em_lote"] / item["lotes"] if item["lotes"] else np.nan,
+                }
+        return {"tempo_ativo_s": decorrido, "rotas": rotas}
+
+
+# --- Agrupamento de Requisicoes ---
+
+class _Agrupador:
+    """
+    Junta requisicoes concorrentes pequenas em lotes para uma funcao vetorizada.
+
+    Cada requisicao entra na fila com seus campos ja convertidos em arrays 1D
+    de mesmo tamanho. A thread do agrupador espera a primeira requisicao, coleta
+    as que chegarem ate `janela_s` depois (ou ate `max_lote` elementos),
+    concatena os campos, chama `funcao(**campos)` uma vez e devolve a cada
+    requisicao a sua fatia do resultado (dicionario de arrays).
+    """
+
+    def __init__(self, rota, funcao, metricas, janela_s=0.002, max_lote=8192):
+        self.rota = rota
+        self.funcao = funcao
+        self.metricas = metricas
+        self.janela_s = janela_s
+        self.max_lote = max_lote
+        self.fila = queue.Queue()
+        self.thread = threading.Thread(target=self._laco, name=f"agrupador-{rota}", daemon=True)
+        self.thread.start()
+
+    def submeter(self, campos):
+        futuro = Future()
+        self.fila.put((campos, futuro))
+        return futuro
+
+    def parar(self):
+        self.fila.put(None)
+        self.thread.join()
+
+    def _laco(self):
+        while True:
+            primeiro = self.fila.get()
+            if primeiro is None:
+                return
+            lote = [primeiro]
+            tamanho = len(next(iter(primeiro[0].values())))
+            limite = time.monotonic() + self.janela_s
+            parar = False
+            while tamanho < self.max_lote:
+                restante = limite - time.monotonic()
+                try:
+                    item = self.fila.get(timeout=restante) if restante > 0 else self.fila.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    parar = True
+                    break
+                lote.append(item)
+                tamanho += len(next(iter(item[0].values())))
+            self._resolver(lote)
+            if parar:
+                return
+
+    def _resolver(self, lote):
+        self.metricas.registrar_lote(self.rota, len(lote))
+        try:
+            campos = {k: np.concatenate([c[k] for c, _ in lote]) for k in lote[0][0]}
+            with etapa(f"servico.lote_{self.rota}", linhas=len(next(iter(campos.values())))):
+                saida = self.funcao(**campos)
+        except Exception:
+            # Uma requisicao invalida nao derruba as demais: refaz uma a uma
+            for c, futuro in lote:
+                try:
+                    futuro.set_result(self.funcao(**c))
+                except Exception as e:
+                    futuro.set_exception(e)
+            return
+        inicio = 0
+        for c, futuro in lote:
+            fim = inicio + len(next(iter(c.values())))
+            futuro.set_result({k: v[inicio:fim] for k, v in saida.items()})
+            inicio = fim
+
+
+def _conduto(Q, n, S, d_min, d_max, passo):
+    d, q = dimensionar_conduto_circular_vetor(Q, n, S, d_min, d_max, passo)
+    return {"diametro_m": d, "vazao_plena_m3s": q}
+
+def _y_normal(Q, b, z, S, n):
+    return {"y_normal_m": y_normal_vetor(Q, b, z, S, n), "y_critico_m": y_critico_vetor(Q, b, z)}
+
+def _vazao_racional(C, i_mm_h, A_ha):
+    return {"Q_m3s": calcular_vazao_racional_vetor(C, i_mm_h, A_ha)}
+
+# Rota agrupada -> (funcao vetorizada, campos obrigatorios, valores padrao)
+ROTAS_AGRUPADAS = {
+    "conduto": (_conduto, ("Q", "n", "S"), {"d_min": 0.05, "d_max": 3.0, "passo": 0.01}),
+    "y_normal": (_y_normal, ("Q", "b", "z", "S", "n"), {}),
+    "vazao_racional": (_vazao_racional, ("C", "i_mm_h", "A_ha"), {}),
+}
+
+
+# --- Servico ---
+
+class ServicoPluviah:
+    """
+    Servidor HTTP do PLUVIAH (ligado a 127.0.0.1 por padrao). `processos=None`
+    usa um processo por CPU para os ajustes IDF; 0 ou 1 executa os ajustes na
+    propria thread da requisicao.
+    """
+
+    def __init__(self, host="127.0.0.1", porta=8765, processos=None, janela_ms=2.0, max_lote=8192):
+        self.metricas = _Metricas()
+        processos = os.cpu_count() if processos is None else processos
+        self.pool = ProcessPoolExecutor(max_workers=processos) if processos > 1 else None
+        self.agrupadores = {
+            rota: _Agrupador(rota, funcao, self.metricas, janela_ms / 1000.0, max_lote)
+            for rota, (funcao, _, _) in ROTAS_AGRUPADAS.items()
+        }
+        self.servidor = _Servidor((host, porta), _Manipulador)
+        self.servidor.servico = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, porta = self.servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def iniciar(self):
+        """Atende requisicoes em uma thread de fundo e retorna o proprio servico."""
+        self._thread = threading.Thread(target=self.servidor.serve_forever, name="servico-pluviah", daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        if self._thread is not None:
+            self.servidor.shutdown()
+            self._thread.join()
+        self.servidor.server_close()
+        for agrupador in self.agrupadores.values():
+            agrupador.parar()
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+
+    def tratar(self, rota, corpo):
+        """
+        Processa uma requisicao ja decodificada. Retorna o dicionario de
+        resposta; RotaDesconhecida para rotas inexistentes e ValueError para
+        corpos invalidos. Qualquer outra excecao e um erro interno.
+        """
+        if rota not in ROTAS_AGRUPADAS and rota not in ("idf", "chuva_projeto", "tc"):
+            raise RotaDesconhecida(rota)
+        if not isinstance(corpo, dict):
+            raise ValueError("O corpo da requisicao deve ser um objeto JSON.")
+        if rota in ROTAS_AGRUPADAS:
+            return self._agrupada(rota, corpo)
+        if rota == "idf":
+            if "maximas" not in corpo:
+                _exigir(corpo, "datahora", "precipitacao", "duracoes")
+            elif not isinstance(corpo["maximas"], dict):
+                raise ValueError("maximas deve ser um objeto {duracao: [maximas anuais]}.")
+            if self.pool is None:
+                return ajustar_idf(corpo)
+            return self.pool.submit(ajustar_idf, corpo).result()
+        if rota == "chuva_projeto":
+            return self._chuva_projeto(corpo)
+        _exigir(corpo, "sub_bacias")
+        desconhecidos = [m for m in corpo.get("metodos") or [] if m not in METODOS_TC]
+        if desconhecidos:
+            raise ValueError(f"Metodos de Tc invalidos: {', '.join(map(str, desconhecidos))}.")
+        tabela = calcular_tc_lote(pd.DataFrame(corpo["sub_bacias"]), corpo.get("metodos"))
+        return {"tc_min": tabela.to_dict(orient="list")}
+
+    def _agrupada(self, rota, corpo):
+        _, obrigatorios, padroes = ROTAS_AGRUPADAS[rota]
+        _exigir(corpo, *obrigatorios)
+        valores = {c: corpo.get(c, padroes.get(c)) for c in (*obrigatorios, *padroes)}
+        escalar = all(np.ndim(v) == 0 for v in valores.values())
+        arrays = np.broadcast_arrays(*(np.atleast_1d(np.asarray(v, dtype=float)) for v in valores.values()))
+        campos = {c: np.ascontiguousarray(a) for c, a in zip(valores, arrays)}
+        saida = self.agrupadores[rota].submeter(campos).result()
+        return {k: (v[0] if escalar else v) for k, v in saida.items()}
+
+    @staticmethod
+    def _chuva_projeto(corpo):
+        if "params_idf" in corpo:
+            _exigir(corpo, "tr", "duracao_min")
+            if not isinstance(corpo["params_idf"], dict):
+                raise ValueError("params_idf deve ser um objeto com K, a, b e c.")
+            _exigir(corpo["params_idf"], "K", "a", "b", "c")
+            i = intensidade_equacao_idf(corpo["params_idf"], corpo["tr"], corpo["duracao_min"])
+            return {"intensidade_mm_h": i, "precipitacao_mm": i * np.asarray(corpo["duracao_min"], dtype=float) / 60.0}
+        _exigir(corpo, "tr", "metodo")
+        gumbel = corpo.get("gumbel_params")
+        lp3 = corpo.get("lp3_params")
+        return {"precipitacao_mm": calcular_chuva_projeto(corpo["tr"], corpo["metodo"], gumbel, lp3)}
+
+
+class _Servidor(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, status, conteudo):
+        corpo = json.dumps(_para_json(conteudo), ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _tamanho_corpo(self):
+        """
+        Content-Length da requisicao. Se invalido, o corpo nao e lido e a conexao
+        e fechada apos a resposta, para que o restante dele nao seja tomado como
+        a requisicao seguinte.
+        """
+        try:
+            tamanho = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            tamanho = -1
+        if tamanho < 0:
+            self.close_connection = True
+            raise ValueError("Content-Length invalido.")
+        return tamanho
+
+    def do_GET(self):
+        servico = self.server.servico
+        caminho = urlsplit(self.path).path
+        if caminho == "/saude":
+            self._responder(200, {"status": "ok"})
+        elif caminho == "/metricas":
+            self._responder(200, servico.metricas.resumo())
+        else:
+            self._responder(404, {"erro": f"Rota '{self.path}' nao encontrada."})
+
+    def do_POST(self):
+        servico = self.server.servico
+        rota = urlsplit(self.path).path.strip("/")
+        inicio = time.perf_counter()
+        status = 200
+        try:
+            corpo = json.loads(self.rfile.read(self._tamanho_corpo()) or b"{}")
+            with etapa(f"servico.{rota}"):
+                resposta = servico.tratar(rota, corpo)
+        except RotaDesconhecida:
+            status, resposta = 404, {"erro": f"Rota '{self.path}' nao encontrada."}
+        except (ValueError, TypeError) as e:
+            status, resposta = 400, {"erro": str(e)}
+        except Exception as e:
+            status, resposta = 500, {"erro": str(e)}
+        # Registra antes de responder: o cliente pode consultar /metricas logo em seguida
+        if status != 404:
+            servico.metricas.registrar(rota, time.perf_counter() - inicio, erro=status != 200)
+        self._responder(status, resposta)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servico HTTP local do PLUVIAH.")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereco de escuta (padrao 127.0.0.1).")
+    parser.add_argument("--porta", type=int, default=8765, help="Porta TCP (padrao 8765).")
+    parser.add_argument("--processos", type=int, default=None, help="Processos para ajustes IDF (padrao: CPUs).")
+    parser.add_argument("--janela-ms", type=float, default=2.0, help="Janela de agrupamento em ms (padrao 2).")
+    parser.add_argument("--max-lote", type=int, default=8192, help="Maximo de elementos por lote (padrao 8192).")
+    args = parser.parse_args(argv)
+
+    servico = ServicoPluviah(args.host, args.porta, args.processos, args.janela_ms, args.max_lote).iniciar()
+    print(f"PLUVIAH atendendo em {servico.url}")
+    try:
+        while servico._thread.is_alive():
+            servico._thread.join(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servico.parar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+# tarefas.py
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+import pandas as pd
+
+from cache_persistente import hash_conteudo
+
+# Execucao de calculos longos em segundo plano para o dashboard. Cada tarefa
+# e identificada por uma chave (hash dos dados e parametros): submeter de novo
+# a mesma chave enquanto ela nao falhou nem foi cancelada devolve a tarefa ja
+# existente, em vez de repetir o trabalho. As funcoes recebem a propria tarefa
+# como primeiro argumento para informar o progresso; o cancelamento e
+# cooperativo e acontece na proxima chamada de tarefa.reportar().
+#
+# Como uma tarefa pode ser compartilhada por varias sessoes, cada submissao
+# registra quem esta interessado no resultado. Cancelar em nome de um
+# interessado apenas retira o seu interesse; a tarefa so e interrompida
+# quando ninguem mais a aguarda.
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluida"
+CANCELADA = "cancelada"
+ERRO = "erro"
+
+
+class TarefaCancelada(Exception):
+    """Levantada dentro da tarefa quando o cancelamento foi solicitado."""
+
+
+class Tarefa:
+    """Estado, progresso (0 a 1) e resultado de um calculo em segundo plano."""
+
+    def __init__(self, chave, descricao=""):
+        self.chave = chave
+        self.descricao = descricao
+        self.estado = PENDENTE
+        self.progresso = 0.0
+        self.mensagem = "Aguardando execucao..."
+        self.resultado = None
+        self.erro = None
+        self.criada = time.time()
+        self.inicio = None
+        self.fim = None
+        self.interessados = set()
+        self._cancelar = threading.Event()
+        self._futuro = None
+
+    @property
+    def terminada(self):
+        return self.estado in (CONCLUIDA, CANCELADA, ERRO)
+
+    @property
+    def cancelamento_solicitado(self):
+        return self._cancelar.is_set()
+
+    def reportar(self, progresso, mensagem=None):
+        """Atualiza o progresso; levanta TarefaCancelada se o cancelamento foi pedido."""
+        if self._cancelar.is_set():
+            raise TarefaCancelada(self.chave)
+        self.progresso = float(min(max(progresso, 0.0), 1.0))
+        if mensagem is not None:
+            self.mensagem = mensagem
+
+    def aguardar(self, timeout=None):
+        """Bloqueia ate a tarefa terminar (util em testes e scripts)."""
+        try:
+            self._futuro.result(timeout)
+        except CancelledError:
+            pass
+        return self
+
+
+def chave_tarefa(*partes):
+    """Hash estavel de dados (DataFrame, Series, arrays) e parametros para identificar uma tarefa."""
+    return hash_conteudo(*partes)
+
+
+class GerenciadorTarefas:
+    """
+    Pool de threads com deduplicacao por chave. Mantem as tarefas ativas e
+    as `max_terminadas` ultimas terminadas para consulta do resultado.
+    """
+
+    def __init__(self, max_workers=2, max_terminadas=64):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pluviah-tarefa")
+        self._trava = threading.Lock()
+        self._tarefas = OrderedDict()
+        self.max_terminadas = max_terminadas
+
+    def submeter(self, chave, funcao, *args, descricao="", interessado=None, **kwargs):
+        """
+        Agenda funcao(tarefa, *args, **kwargs) ou devolve a tarefa identica ja
+        existente. `interessado` (ex.: id da sessao) passa a aguardar a tarefa;
+        sem ele a submissao e anonima e so um cancelamento forcado a interrompe.
+        """
+        interessado = object() if interessado is None else interessado
+        with self._trava:
+            existente = self._tarefas.get(chave)
+            if existente is not None and existente.estado not in (CANCELADA, ERRO) \
+                    and not existente.cancelamento_solicitado:
+                existente.interessados.add(interessado)
+                self._tarefas.move_to_end(chave)
+                return existente
+            tarefa = Tarefa(chave, descricao)
+            tarefa.interessados.add(interessado)
+            self._tarefas[chave] = tarefa
+            tarefa._futuro = self._pool.submit(self._executar, tarefa, funcao, args, kwargs)
+            self._descartar_antigas()
+        return tarefa
+
+    def _executar(self, tarefa, funcao, args, kwargs):
+        if tarefa.cancelamento_solicitado:
+            tarefa.estado = CANCELADA
+            return
+        tarefa.estado = EXECUTANDO
+        tarefa.inicio = time.time()
+        try:
+            tarefa.resultado = funcao(tarefa, *args, **kwargs)
+            tarefa.progresso = 1.0
+            tarefa.mensagem = "Concluida."
+            tarefa.estado = CONCLUIDA
+        except TarefaCancelada:
+            tarefa.mensagem = "Cancelada."
+            tarefa.estado = CANCELADA
+        except Exception as e:
+            tarefa.erro = e
+            tarefa.mensagem = f"Erro: {e}"
+            tarefa.estado = ERRO
+        finally:
+            tarefa.fim = time.time()
+
+    def _descartar_antigas(self):
+        terminadas = [c for c, t in self._tarefas.items() if t.terminada]
+        for chave in terminadas[:max(len(terminadas) - self.max_terminadas, 0)]:
+            del self._tarefas[chave]
+
+    def obter(self, chave):
+        with self._trava:
+            return self._tarefas.get(chave)
+
+    def cancelar(self, chave, interessado=None):
+        """
+        Retira o interesse de `interessado` e solicita o cancelamento se mais
+        ninguem aguarda a tarefa; sem `interessado` o cancelamento e forcado.
+        Retorna True se a tarefa foi interrompida. Tarefas ainda na fila nem
+        chegam a executar.
+        """
+        with self._trava:
+            tarefa = self._tarefas.get(chave)
+            if tarefa is None or tarefa.terminada:
+                return False
+            if interessado is not None:
+                tarefa.interessados.discard(interessado)
+                if tarefa.interessados:
+                    return False
+            tarefa.interessados.clear()
+            tarefa._cancelar.set()
+        if tarefa._futuro.cancel():
+            tarefa.estado = CANCELADA
+            tarefa.mensagem = "Cancelada."
+            tarefa.fim = time.time()
+        return True
+
+    def tabela(self):
+        """Resumo das tarefas conhecidas (chave, descricao, estado, progresso, duracao)."""
+        with self._trava:
+            tarefas = list(self._tarefas.values())
+        agora = time.time()
+        return pd.DataFrame([{
+            "chave": t.chave[:12],
+            "descricao": t.descricao,
+            "estado": t.estado,
+            "interessados": len(t.interessados),
+            "progresso": t.progresso,
+            "duracao_s": ((t.fim or agora) - t.inicio) if t.inicio else 0.0,
+        } for t in tarefas], columns=["chave", "descricao", "estado", "interessados", "progresso", "duracao_s"])
+
+    def encerrar(self, cancelar=True):
+        if cancelar:
+            for chave in list(self._tarefas):
+                self.cancelar(chave)
+        self._pool.shutdown(wait=True)
@@ -1,8 +1,23 @@
+import numpy as np
+import pandas as pd
+
+# Todas as funcoes aceitam escalares ou arrays NumPy (com broadcasting).
+# Entradas invalidas (<= 0) resultam em Tc = 0, como nas versoes escalares.
+
+def _como_arrays(*valores):
+    return [np.asarray(v, dtype=float) for v in valores]
+
+def _resultado(tc, valido):
+    tc = np.where(valido, tc, 0.0)
+    return float(tc) if tc.ndim == 0 else tc
+
 def calcular_tc_kirpich(L_m, i_m_per_m):
     """Calcula o Tempo de Concentracao pelo método de Kirpich. Retorna Tc em minutos."""
-    if L_m <= 0 or i_m_per_m <= 0:
-        return 0.0
-    return 0.0195 * (L_m ** 0.77) * (i_m_per_m ** -0.385)
+    L, i = _como_arrays(L_m, i_m_per_m)
+    valido = (L > 0) & (i > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tc = 0.0195 * (L ** 0.77) * (i ** -0.385)
+    return _resultado(tc, valido)
 
 def calcular_tc_giandotti(A_km2, L_km, deltaH_m):
     """
@@ -10,7 +25,105 @@ def calcular_tc_giandotti(A_km2, L_km, deltaH_m):
     NOTA: Existem variacoes desta formula. Esta implementacao usa (4 * A + 1.5 * L).
     Outra variacao comum: (4 * sqrt(A) + 1.5 * L).
     """
-    if A_km2 <= 0 or L_km <= 0 or deltaH_m <= 0:
-        return 0.0
-    tc_h = (4 * A_km2 + 1.5 * L_km) / (0.8 * deltaH_m)
-    return tc_h * 60.0
+    A, L, dH = _como_arrays(A_km2, L_km, deltaH_m)
+    valido = (A > 0) & (L > 0) & (dH > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tc_h = (4 * A + 1.5 * L) / (0.8 * dH)
+    return _resultado(tc_h * 60.0, valido)
+
+def calcular_tc_scs_lag(L_m, i_m_per_m, CN):
+    """
+    Calcula o Tc pelo metodo do lag do SCS (NRCS): lag = L^0.8 (S+1)^0.7 / (1900 Y^0.5),
+    com L em pes, S = 1000/CN - 10 (pol) e Y em %, e Tc = lag / 0.6. Retorna Tc em minutos.
+    """
+    L, i, cn = _como_arrays(L_m, i_m_per_m, CN)
+    valido = (L > 0) & (i > 0) & (cn > 0) & (cn <= 100)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        L_ft = L / 0.3048
+        S_pol = 1000.0 / cn - 10.0
+        lag_h = (L_ft ** 0.8) * ((S_pol + 1.0) ** 0.7) / (1900.0 * (100.0 * i) ** 0.5)
+    return _resultado(lag_h / 0.6 * 60.0, valido)
+
+def calcular_tc_ven_te_chow(L_km, i_m_per_m):
+    """Calcula o Tc pelo metodo de Ven Te Chow: tc = 0.1602 L^0.64 S^-0.32 (h). Retorna Tc em minutos."""
+    L, i = _como_arrays(L_km, i_m_per_m)
+    valido = (L > 0) & (i > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tc_h = 0.1602 * (L ** 0.64) * (i ** -0.32)
+    return _resultado(tc_h * 60.0, valido)
+
+def calcular_tc_dooge(A_km2, i_m_per_km):
+    """Calcula o Tc pelo metodo de Dooge: tc = 21.88 A^0.41 S^-0.17, com S em m/km. Retorna Tc em minutos."""
+    A, i = _como_arrays(A_km2, i_m_per_km)
+    valido = (A > 0) & (i > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tc = 21.88 * (A ** 0.41) * (i ** -0.17)
+    return _resultado(tc, valido)
+
+def calcular_tc_california(L_km, deltaH_m):
+    """Calcula o Tc pela California Culverts Practice: tc = 57 (L³/H)^0.385. Retorna Tc em minutos."""
+    L, dH = _como_arrays(L_km, deltaH_m)
+    valido = (L > 0) & (dH > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tc = 57.0 * (L ** 3 / dH) ** 0.385
+    return _resultado(tc, valido)
+
+def calcular_tc_onda_cinematica(L_m, n, i_mm_h, i_m_per_m):
+    """
+    Calcula o Tc do escoamento superficial pela onda cinematica:
+    tc = 6.99 (n L)^0.6 / (I^0.4 S^0.3), com I a intensidade da chuva em mm/h. Retorna Tc em minutos.
+    """
+    L, n_, I, i = _como_arrays(L_m, n, i_mm_h, i_m_per_m)
+    valido = (L > 0) & (n_ > 0) & (I > 0) & (i > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tc = 6.99 * (n_ * L) ** 0.6 / (I ** 0.4 * i ** 0.3)
+    return _resultado(tc, valido)
+
+# Metodo -> (funcao, colunas exigidas na tabela de sub-bacias, conversao das colunas em argumentos)
+METODOS_TC = {
+    "Kirpich": (calcular_tc_kirpich, ("L_m", "S_m_m"),
+                lambda d: (d["L_m"], d["S_m_m"])),
+    "Giandotti": (calcular_tc_giandotti, ("A_km2", "L_m", "deltaH_m"),
+                  lambda d: (d["A_km2"], d["L_m"] / 1000.0, d["deltaH_m"])),
+    "SCS Lag": (calcular_tc_scs_lag, ("L_m", "S_m_m", "CN"),
+                lambda d: (d["L_m"], d["S_m_m"], d["CN"])),
+    "Ven Te Chow": (calcular_tc_ven_te_chow, ("L_m", "S_m_m"),
+                    lambda d: (d["L_m"] / 1000.0, d["S_m_m"])),
+    "Dooge": (calcular_tc_dooge, ("A_km2", "S_m_m"),
+              lambda d: (d["A_km2"], d["S_m_m"] * 1000.0)),
+    "California Culverts Practice": (calcular_tc_california, ("L_m", "deltaH_m"),
+                                     lambda d: (d["L_m"] / 1000.0, d["deltaH_m"])),
+    "Onda Cinemática": (calcular_tc_onda_cinematica, ("L_m", "n", "i_mm_h", "S_m_m"),
+                        lambda d: (d["L_m"], d["n"], d["i_mm_h"], d["S_m_m"])),
+}
+
+def calcular_tc_lote(sub_bacias, metodos=None):
+    """
+    Calcula o Tc (minutos) de todas as sub-bacias por todos os metodos aplicaveis.
+
+    `sub_bacias` e um DataFrame (ou dicionario de arrays) com as colunas
+    L_m (comprimento do talvegue, m), S_m_m (declividade, m/m), A_km2,
+    deltaH_m, CN, n (Manning do escoamento superficial) e i_mm_h. Metodos cujas
+    colunas nao estejam presentes sao ignorados. Retorna uma tabela com uma
+    coluna por metodo e as estatisticas de comparacao entre metodos.
+    """
+    dados = pd.DataFrame(sub_bacias)
+    if "S_m_m" not in dados.columns and {"L_m", "deltaH_m"} <= set(dados.columns):
+        dados["S_m_m"] = dados["deltaH_m"] / dados["L_m"]
+    nomes = list(METODOS_TC) if metodos is None else list(metodos)
+
+    resultado = pd.DataFrame(index=dados.index)
+    for nome in nomes:
+        funcao, colunas, argumentos = METODOS_TC[nome]
+        if not set(colunas) <= set(dados.columns):
+            continue
+        args = [np.asarray(a, dtype=float) for a in argumentos(dados)]
+        resultado[nome] = funcao(*args)
+
+    if resultado.shape[1] > 0:
+        tc = resultado.where(resultado > 0)
+        resultado["Tc mínimo"] = tc.min(axis=1)
+        resultado["Tc médio"] = tc.mean(axis=1)
+        resultado["Tc máximo"] = tc.max(axis=1)
+        resultado["Dispersão (máx/mín)"] = resultado["Tc máximo"] / resultado["Tc mínimo"]
+    return resultado
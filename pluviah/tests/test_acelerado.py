@@ -0,0 +1,88 @@
+# tests/test_acelerado.py
+
+import numpy as np
+import pandas as pd
+import pytest
+import acelerado
+import manning
+from gerador import gerar_serie, gerar_estacoes
+from idf import calculate_annual_maxima
+from regional import matriz_maximas
+
+# Os testes comparam os nucleos de acelerado.py com o caminho original. Sem o
+# Numba instalado os nucleos rodam como Python puro, o que ainda verifica a
+# logica que seria compilada.
+
+@pytest.fixture
+def nucleos(monkeypatch):
+    """Liga o despacho para os nucleos de acelerado.py (compilados, se houver Numba)."""
+    monkeypatch.setattr(acelerado, "_BACKEND", acelerado.NUMBA)
+
+def _original(monkeypatch, funcao, *args):
+    with monkeypatch.context() as m:
+        m.setattr(acelerado, "_BACKEND", acelerado.NUMPY)
+        return funcao(*args)
+
+def test_maximas_anuais_iguais(monkeypatch, nucleos):
+    """
+    Soma movel e maxima anual devem coincidir com o caminho pandas, inclusive com falhas (NaN).
+    """
+    df = gerar_serie(4, semente=5)
+    df.iloc[200:3000] = np.nan
+    df.iloc[9000:9500] = np.nan
+
+    for duracao in (1, 6, 24):
+        esperado = _original(monkeypatch, calculate_annual_maxima, df, duracao)
+        pd.testing.assert_series_equal(calculate_annual_maxima(df, duracao), esperado, rtol=1e-12)
+
+def test_matriz_maximas_igual(monkeypatch, nucleos):
+    """
+    Com varias estacoes a soma movel reinicia em cada estacao, como no groupby().rolling().
+    """
+    df = gerar_estacoes(4, 3, semente=2)
+
+    esperado = _original(monkeypatch, matriz_maximas, df, [2, 24])
+    obtido = matriz_maximas(df, [2, 24])
+
+    for duracao in (2, 24):
+        pd.testing.assert_frame_equal(obtido[duracao], esperado[duracao], rtol=1e-12)
+
+def test_bissecoes_iguais(monkeypatch, nucleos):
+    """
+    y_normal, y_critico, b_para_Q e as versoes vetoriais devem dar o mesmo resultado, incluindo casos sem solucao.
+    """
+    rng = np.random.default_rng(7)
+    Q = np.append(rng.uniform(0.05, 30, 40), [0.0, -1.0, 1e6])
+    b = np.append(rng.uniform(0, 6, 40), [1.0, 1.0, 0.5])
+    z = np.append(rng.uniform(0, 2, 40), [1.0, 1.0, 0.0])
+
+    for k in range(len(Q)):
+        for funcao, args in ((manning.y_normal, (Q[k], b[k], z[k], 0.002, 0.015)),
+                             (manning.y_critico, (Q[k], b[k], z[k])),
+                             (manning.b_para_Q, (Q[k], z[k], 0.8, 0.002, 0.015))):
+            esperado = _original(monkeypatch, funcao, *args)
+            obtido = funcao(*args)
+            assert (obtido is None) == (esperado is None)
+            if esperado is not None:
+                assert obtido == pytest.approx(esperado, abs=1e-9)
+
+    for funcao, args in ((manning.y_normal_vetor, (Q, b, z, 0.002, 0.015)), (manning.y_critico_vetor, (Q, b, z))):
+        np.testing.assert_allclose(funcao(*args), _original(monkeypatch, funcao, *args), atol=1e-9)
+
+def test_selecao_do_backend():
+    """
+    A selecao automatica depende do Numba, e o caminho original pode ser forcado.
+    """
+    padrao = acelerado.backend()
+    try:
+        acelerado.definir_backend("numpy")
+        assert not acelerado.ativo()
+        acelerado.definir_backend("auto")
+        assert acelerado.ativo() == acelerado.disponivel()
+        if not acelerado.disponivel():
+            with pytest.raises(ImportError):
+                acelerado.definir_backend("numba")
+        with pytest.raises(ValueError):
+            acelerado.definir_backend("gpu")
+    finally:
+        acelerado._BACKEND = padrao
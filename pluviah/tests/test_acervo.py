@@ -0,0 +1,57 @@
+# tests/test_acervo.py
+
+import numpy as np
+import pytest
+from acervo import AcervoParquet
+from gerador import gerar_estacoes, salvar_parquet
+from idf import calculate_annual_maxima
+from regional import matriz_maximas
+
+pytest.importorskip("pyarrow")
+
+@pytest.fixture(scope="module")
+def acervo(tmp_path_factory):
+    df = gerar_estacoes(6, 4, semente=3)
+    caminho = tmp_path_factory.mktemp("acervo") / "chuva"
+    salvar_parquet(df, str(caminho), linhas_por_grupo=24 * 90)
+    return df, AcervoParquet(str(caminho))
+
+def test_estacoes_e_plano_de_leitura(acervo):
+    """
+    Estacoes vem das particoes, e filtros de estacao e ano reduzem os grupos de linhas lidos.
+    """
+    _, arq = acervo
+    total = arq.plano_leitura()
+    um_ano = arq.plano_leitura(estacoes=2, anos=2001)
+
+    assert arq.estacoes() == list(range(6))
+    assert um_ano["arquivo"].str.contains("station_id=2").all()
+    assert 4 <= len(um_ano) <= 6 and len(um_ano) < len(total) / 20
+
+def test_serie_no_formato_de_load_data(acervo):
+    """
+    A serie de uma estacao deve ser igual a original, com indice datahora, e respeitar o filtro de anos.
+    """
+    df, arq = acervo
+    original = df[df["station_id"] == 4]
+
+    serie = arq.serie(4)
+    parcial = arq.serie(4, anos=(2001, 2002))
+
+    assert serie.index.name == "datahora" and list(serie.columns) == ["precipitacao"]
+    np.testing.assert_allclose(serie["precipitacao"].to_numpy(), original["precipitacao"].to_numpy())
+    assert sorted(set(parcial.index.year)) == [2001, 2002]
+    assert serie.equals(arq.serie(4)) and len(parcial) < len(serie)
+
+def test_maximas_iguais_as_de_idf(acervo):
+    """
+    As maximas lidas do acervo coincidem com calculate_annual_maxima e com regional.matriz_maximas.
+    """
+    df, arq = acervo
+
+    maximas = arq.maximas_anuais([1, 24], estacoes_por_leitura=4)
+
+    assert maximas[24].shape == (6, 4)
+    np.testing.assert_allclose(maximas[24].to_numpy(), matriz_maximas(df, [24])[24].to_numpy())
+    np.testing.assert_allclose(maximas[1].loc[5].to_numpy(),
+                               calculate_annual_maxima(arq.serie(5), 1).to_numpy())
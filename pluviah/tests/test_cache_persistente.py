@@ -0,0 +1,99 @@
+# tests/test_cache_persistente.py
+
+import io
+import multiprocessing
+import sqlite3
+
+import numpy as np
+import pandas as pd
+from cache_persistente import CachePersistente, hash_conteudo
+
+def _serie(valor_extra=0.0):
+    idx = pd.date_range("2020-01-01", periods=72, freq="h")
+    return pd.DataFrame({"precipitacao": np.arange(72.0) + valor_extra}, index=idx)
+
+def test_segunda_chamada_vem_do_cache(tmp_path):
+    """
+    A funcao so executa na primeira chamada; a segunda (mesmo conteudo, outro objeto) e um acerto.
+    """
+    cache = CachePersistente(str(tmp_path / "cache.sqlite"))
+    chamadas = []
+
+    def soma_total(df, fator):
+        chamadas.append(1)
+        return df["precipitacao"].sum() * fator
+
+    soma = cache.memorizar(soma_total, "soma_total")
+
+    assert soma(_serie(), 2) == soma(_serie(), 2)
+    assert soma(_serie(1.0), 2) != soma(_serie(), 2)
+    assert len(chamadas) == 2
+    est = cache.estatisticas().set_index("funcao").loc["soma_total"]
+    assert (est["acertos"], est["falhas"], est["itens"]) == (2, 2, 2)
+
+def test_chave_usa_conteudo_de_arquivos_em_memoria():
+    """
+    Arquivos carregados com o mesmo conteudo geram a mesma chave, independente do objeto.
+    """
+    assert hash_conteudo(io.BytesIO(b"datahora;precipitacao")) == hash_conteudo(io.BytesIO(b"datahora;precipitacao"))
+    assert hash_conteudo(io.BytesIO(b"a")) != hash_conteudo(io.BytesIO(b"b"))
+    assert hash_conteudo({"a": 1, "b": [1, 2]}) == hash_conteudo({"b": [1, 2], "a": 1})
+
+def test_descarte_lru_respeita_limite(tmp_path):
+    """
+    Acima do limite de tamanho, o item acessado ha mais tempo e descartado primeiro.
+    """
+    cache = CachePersistente(str(tmp_path / "cache.sqlite"), limite_bytes=2500)
+    bloco = np.zeros(100)  # ~1 kB serializado
+
+    cache.gravar("a", bloco, "f")
+    cache.gravar("b", bloco, "f")
+    assert cache.obter("a", "f")[0]  # "a" passa a ser o mais recente
+    cache.gravar("c", bloco, "f")
+
+    assert cache.obter("a", "f")[0]
+    assert not cache.obter("b", "f")[0]
+    assert cache.obter("c", "f")[0]
+    assert cache.estatisticas().set_index("funcao").loc["f", "descartes"] == 1
+
+def _gravar_varios(args):
+    caminho, inicio = args
+    cache = CachePersistente(caminho)
+    for k in range(inicio, inicio + 25):
+        cache.gravar(f"item{k}", np.full(10, k), "processos")
+    return all(cache.obter(f"item{k}", "processos")[0] for k in range(inicio, inicio + 25))
+
+def test_varios_processos_no_mesmo_arquivo(tmp_path):
+    """
+    Processos concorrentes podem gravar e ler o mesmo banco sem erros de bloqueio.
+    """
+    caminho = str(tmp_path / "cache.sqlite")
+    CachePersistente(caminho)
+    with multiprocessing.get_context("spawn").Pool(3) as pool:
+        resultados = pool.map(_gravar_varios, [(caminho, 0), (caminho, 25), (caminho, 50)])
+
+    assert all(resultados)
+    assert CachePersistente(caminho).estatisticas().set_index("funcao").loc["processos", "itens"] == 75
+
+def test_leitura_nao_toma_a_trava_de_escrita(tmp_path):
+    """
+    Acertos sao lidos mesmo com outro processo segurando a escrita; contadores sao gravados em lote.
+    """
+    caminho = str(tmp_path / "cache.sqlite")
+    cache = CachePersistente(caminho, timeout_s=0.2, leituras_por_descarga=3)
+    cache.gravar("a", 42, "f")
+
+    escritor = sqlite3.connect(caminho, isolation_level=None)
+    escritor.execute("BEGIN IMMEDIATE")
+    try:
+        assert cache.obter("a", "f") == (True, 42)
+        assert cache.obter("x", "f") == (False, None)
+    finally:
+        escritor.execute("ROLLBACK")
+        escritor.close()
+
+    banco = sqlite3.connect(caminho)
+    assert banco.execute("SELECT COUNT(*) FROM estatisticas").fetchone()[0] == 0
+    cache.obter("a", "f")  # terceira leitura: descarga
+    assert banco.execute("SELECT acertos, falhas FROM estatisticas WHERE funcao = 'f'").fetchone() == (2, 1)
+    banco.close()
@@ -0,0 +1,51 @@
+# tests/test_desempenho.py
+
+import io
+
+from benchmarks import desempenho
+from benchmarks.desempenho import comparar, executar
+
+BASELINE = {"resultados": {
+    "y_normal[10s]": {"tempo_s": 1.0, "pico_mib": 10.0},
+    "y_critico[10s]": {"tempo_s": 0.0, "pico_mib": 0.0},
+}}
+
+def test_comparar_acusa_apenas_pioras_acima_do_limite():
+    """
+    Tempo ou memoria acima de base * (1 + limite) e regressao; melhoras, pioras dentro do limite,
+    bases nulas e casos ausentes do baseline nao sao.
+    """
+    resultados = {
+        "y_normal[10s]": {"tempo_s": 1.3, "pico_mib": 11.0},
+        "y_critico[10s]": {"tempo_s": 5.0, "pico_mib": 5.0},
+        "novo_caso[10s]": {"tempo_s": 100.0, "pico_mib": 100.0},
+    }
+
+    assert comparar(resultados, BASELINE, limite=0.25) == [("y_normal[10s]", "tempo_s", 1.0, 1.3)]
+    assert comparar(resultados, BASELINE, limite=0.35) == []
+    assert comparar(resultados, BASELINE, limite=0.35, limite_memoria=0.05) == \
+        [("y_normal[10s]", "pico_mib", 10.0, 11.0)]
+
+def test_main_retorna_1_com_regressao(tmp_path, monkeypatch):
+    """
+    O executor termina com codigo 1 quando alguma medicao piora acima do limite e 0 caso contrario.
+    """
+    caminho = tmp_path / "baseline.json"
+    desempenho.salvar_baseline(BASELINE["resultados"], caminho)
+    atual = {"y_normal[10s]": {"tempo_s": 2.0, "pico_mib": 10.0}}
+    monkeypatch.setattr(desempenho, "executar", lambda *args, **kwargs: atual)
+
+    assert desempenho.main(["--baseline", str(caminho), "--limite", "0.25"]) == 1
+    assert desempenho.main(["--baseline", str(caminho), "--limite", "1.5"]) == 0
+
+def test_filtro_nao_gera_dados_de_outros_casos(monkeypatch):
+    """
+    Com --filtro, apenas as escalas que tem casos selecionados geram dados sinteticos.
+    """
+    def sem_serie(anos):
+        raise AssertionError(f"serie de {anos} anos gerada sem caso selecionado")
+
+    monkeypatch.setattr(desempenho, "_casos_serie", sem_serie)
+    resultados = executar(anos=[100], secoes=[10], repeticoes=1, filtro="CurvaChave", saida=io.StringIO())
+
+    assert list(resultados) == ["CurvaChave.profundidade[10s]"]
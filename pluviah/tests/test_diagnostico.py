@@ -0,0 +1,55 @@
+# tests/test_diagnostico.py
+
+import json
+import pandas as pd
+import pytest
+import diagnostico
+from idf import calculate_annual_maxima
+
+@pytest.fixture
+def registro_ativo():
+    """
+    Liga o registro de medicoes durante o teste e restaura o estado original ao final.
+    """
+    diagnostico.limpar()
+    diagnostico.ativar()
+    yield
+    diagnostico.desativar()
+    diagnostico.limpar()
+
+def test_registro_desativado_nao_coleta():
+    """
+    Com o registro desligado, nenhuma etapa deve ser contabilizada.
+    """
+    diagnostico.desativar()
+    diagnostico.limpar()
+    with diagnostico.etapa("teste.etapa", linhas=10):
+        pass
+    assert diagnostico.resumo().empty
+
+def test_funcoes_centrais_reportam_etapas(registro_ativo):
+    """
+    calculate_annual_maxima deve registrar chamadas, tempo e linhas processadas.
+    """
+    datas = pd.date_range("2020-01-01", periods=48, freq="h")
+    df = pd.DataFrame({"precipitacao": range(48)}, index=datas)
+
+    calculate_annual_maxima(df, duration=2)
+    calculate_annual_maxima(df, duration=3)
+
+    resumo = diagnostico.resumo().set_index("etapa")
+    assert resumo.loc["idf.calculate_annual_maxima", "chamadas"] == 2
+    assert resumo.loc["idf.soma_movel", "linhas"] == 96
+    assert resumo.loc["idf.soma_movel", "tempo_total_s"] >= 0.0
+
+def test_contagem_cache_e_exportacao_json(registro_ativo):
+    """
+    Acertos de cache sao as consultas que nao resultaram em execucao.
+    """
+    for _ in range(3):
+        diagnostico.registrar_consulta_cache("cache.teste")
+    diagnostico.registrar_falha_cache("cache.teste")
+
+    dados = json.loads(diagnostico.exportar_json())
+    assert dados["etapas"]["cache.teste"]["acertos_cache"] == 2
+    assert dados["etapas"]["cache.teste"]["falhas_cache"] == 1
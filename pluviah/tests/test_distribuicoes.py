@@ -0,0 +1,68 @@
+# tests/test_distribuicoes.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import gumbel_r, genextreme
+from distribuicoes import DISTRIBUICOES, ajustar_distribuicoes, tabela_quantis
+from idf import calculate_idf_curves
+
+@pytest.fixture
+def maximas_por_duracao():
+    """
+    Series sinteticas de maximas anuais (40 anos) para duas duracoes.
+    """
+    rng = np.random.default_rng(7)
+    return {
+        1: pd.Series(gumbel_r.rvs(loc=30, scale=8, size=40, random_state=rng)),
+        24: pd.Series(genextreme.rvs(-0.1, loc=80, scale=20, size=40, random_state=rng)),
+    }
+
+def test_tabela_tidy_com_todas_as_distribuicoes(maximas_por_duracao):
+    """
+    Deve haver uma linha por (duracao, distribuicao) e exatamente um melhor modelo por duracao.
+    """
+    resultados = ajustar_distribuicoes(maximas_por_duracao, executor=None)
+
+    assert len(resultados) == 2 * len(DISTRIBUICOES)
+    assert resultados.groupby("duracao")["melhor"].sum().tolist() == [1, 1]
+    assert resultados["aic"].notna().all()
+    melhor_1h = resultados[(resultados["duracao"] == 1) & resultados["melhor"]].iloc[0]
+    assert melhor_1h["aceita_ks"]
+
+def test_execucao_paralela_igual_a_serial(maximas_por_duracao):
+    """
+    O pool de processos deve produzir exatamente os mesmos ajustes que a execucao serial.
+    """
+    serial = ajustar_distribuicoes(maximas_por_duracao, distribuicoes=["Gumbel", "GEV"], executor=None)
+    paralelo = ajustar_distribuicoes(maximas_por_duracao, distribuicoes=["Gumbel", "GEV"],
+                                     executor="processo", max_workers=2)
+
+    pd.testing.assert_series_equal(serial["aic"], paralelo["aic"])
+
+def test_quantis_coincidem_com_calculate_idf_curves(maximas_por_duracao):
+    """
+    Gumbel e Log-Pearson III do registro devem reproduzir os quantis de calculate_idf_curves.
+    """
+    trs = np.array([2, 10, 100])
+    resultados = ajustar_distribuicoes({24: maximas_por_duracao[24]},
+                                       distribuicoes=["Gumbel", "Log-Pearson III"], executor=None)
+    quantis = tabela_quantis(resultados, trs).set_index(["distribuicao", "TR (anos)"])
+    df_idf = calculate_idf_curves(maximas_por_duracao[24], 24, trs)[0]
+
+    assert quantis.loc["Gumbel", "precipitacao_mm"].values == pytest.approx(df_idf["Gumbel_24h (mm)"].values)
+    assert quantis.loc["Log-Pearson III", "precipitacao_mm"].values == pytest.approx(df_idf["LP3_24h (mm)"].values)
+
+def test_lp3_por_momentos_fica_fora_do_ranking(maximas_por_duracao):
+    """
+    O LP3 por momentos e marcado como tal e nao concorre no AIC; o LP3 por maxima verossimilhanca concorre.
+    """
+    resultados = ajustar_distribuicoes(maximas_por_duracao, executor=None).set_index(["duracao", "distribuicao"])
+
+    momentos = resultados.xs("Log-Pearson III", level="distribuicao")
+    mv = resultados.xs("Log-Pearson III (MV)", level="distribuicao")
+    assert (momentos["metodo_ajuste"] == "momentos").all()
+    assert momentos["rank_aic"].isna().all() and not momentos["melhor"].any()
+    assert (mv["metodo_ajuste"] == "MV").all() and mv["rank_aic"].notna().all()
+    # A maxima verossimilhanca nao pode ficar abaixo do ajuste por momentos
+    assert (mv["log_verossimilhanca"] >= momentos["log_verossimilhanca"] - 1e-6).all()
@@ -0,0 +1,63 @@
+# tests/test_escoamento_variado.py
+
+import numpy as np
+import pytest
+from manning import y_normal, y_critico
+from escoamento_variado import classificar_perfil, perfil_passo_direto, perfil_passo_padrao
+
+# Canal trapezoidal de declividade fraca (yn > yc)
+Q, B, Z, S0, N = 10.0, 3.0, 1.5, 0.0005, 0.015
+
+def test_classificacao_de_perfis():
+    """
+    Verifica a classificacao pelas posicoes relativas de y, yn e yc e pela declividade.
+    """
+    assert classificar_perfil(2.0, 1.4, 0.9, 0.001) == "M1"
+    assert classificar_perfil(1.0, 1.4, 0.9, 0.001) == "M2"
+    assert classificar_perfil(0.5, 1.4, 0.9, 0.001) == "M3"
+    assert classificar_perfil(0.8, 0.6, 1.0, 0.02) == "S2"
+    assert classificar_perfil(1.2, np.nan, 1.0, 0.0) == "H2"
+    assert classificar_perfil(0.5, np.nan, 1.0, -0.01) == "A3"
+
+def test_remanso_m1_tende_a_profundidade_normal():
+    """
+    Um perfil M1 calculado para montante a partir de um controle elevado deve tender a yn.
+    """
+    yn = y_normal(Q, B, Z, S0, N)
+    x = np.linspace(-8000.0, 0.0, 161)
+
+    y, tipos = perfil_passo_padrao(Q, B, Z, S0, N, x, y_controle=2.5)
+
+    assert y[0, -1] == pytest.approx(2.5)
+    assert np.all(np.diff(y[0]) > 0)  # profundidade cresce para jusante no M1
+    assert y[0, 0] == pytest.approx(yn, rel=0.02)
+    assert set(tipos[0]) == {"M1"}
+
+def test_passo_direto_concorda_com_passo_padrao():
+    """
+    A profundidade obtida pelo passo padrao na distancia calculada pelo passo direto deve coincidir.
+    """
+    yn = y_normal(Q, B, Z, S0, N)
+    x_direto, y_direto, _ = perfil_passo_direto(Q, B, Z, S0, N, 2.5, 1.05 * yn, n_pontos=60)
+    estacoes = np.linspace(x_direto[0, -1], 0.0, 400)
+
+    y_padrao, _ = perfil_passo_padrao(Q, B, Z, S0, N, estacoes, y_controle=2.5)
+
+    for k in (10, 30, 50):
+        assert np.interp(x_direto[0, k], estacoes, y_padrao[0]) == pytest.approx(y_direto[0, k], rel=1e-3)
+
+def test_varios_perfis_supercriticos_simultaneos():
+    """
+    Perfis S2 calculados para jusante a partir do critico devem tender a yn de cada vazao.
+    """
+    vazoes = np.array([5.0, 10.0, 20.0])
+    S = 0.02
+    yc = np.array([y_critico(q, 3.0, 0.0) for q in vazoes])
+    yn = np.array([y_normal(q, 3.0, 0.0, S, 0.013) for q in vazoes])
+
+    y, tipos = perfil_passo_padrao(vazoes, 3.0, 0.0, S, 0.013, np.linspace(0, 300, 121),
+                                   y_controle=0.999 * yc, sentido="jusante")
+
+    assert y.shape == (3, 121)
+    assert y[:, -1] == pytest.approx(yn, rel=0.01)
+    assert np.all(tipos[:, 1:] == "S2")
@@ -0,0 +1,71 @@
+# tests/test_espacial.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from espacial import IndiceEspacial, RAIO_TERRA_KM
+from idf import intensidade_equacao_idf
+
+def _estacoes(n=50, semente=0):
+    rng = np.random.default_rng(semente)
+    coords = np.column_stack([rng.uniform(-54, -48, n), rng.uniform(-30, -24, n)])
+    params = pd.DataFrame({"K": rng.uniform(600, 1200, n), "a": rng.uniform(0.1, 0.2, n),
+                           "b": rng.uniform(5, 20, n), "c": rng.uniform(0.7, 0.9, n)})
+    return coords, params
+
+def test_idw_igual_a_calculo_direto():
+    """
+    A interpolacao IDW pela arvore deve coincidir com a varredura de todas as distancias.
+    """
+    coords, params = _estacoes()
+    indice = IndiceEspacial(coords, params)
+    pontos = np.array([[-51.2, -27.3], [-49.0, -25.1]])
+
+    resultado = indice.interpolar(pontos, k=len(coords), potencia=2)
+
+    lon, lat = np.radians(coords[:, 0]), np.radians(coords[:, 1])
+    for linha, (plon, plat) in zip(resultado.itertuples(), np.radians(pontos)):
+        cos_d = np.sin(lat) * np.sin(plat) + np.cos(lat) * np.cos(plat) * np.cos(lon - plon)
+        d = RAIO_TERRA_KM * np.arccos(np.clip(cos_d, -1, 1))
+        w = 1 / d**2
+        assert linha.K == pytest.approx(np.sum(w * params["K"]) / w.sum())
+        assert linha.distancia_vizinho == pytest.approx(d.min(), rel=1e-6)
+
+def test_ponto_sobre_estacao_e_fora_do_raio():
+    """
+    Pontos sobre uma estacao recebem o valor dela; sem vizinhos no raio, NaN.
+    """
+    coords, params = _estacoes()
+    indice = IndiceEspacial(coords, params)
+
+    sobre = indice.interpolar(coords[:5])
+    longe = indice.interpolar([[-40.0, -10.0]], distancia_max=100.0)
+
+    assert sobre["K"].to_numpy() == pytest.approx(params["K"].to_numpy()[:5])
+    assert np.isnan(longe.loc[0, "K"]) and longe.loc[0, "n_vizinhos"] == 0
+
+def test_vizinhos_em_coordenadas_planas():
+    """
+    Com coordenadas planas, o metodo 'vizinhos' faz a media simples dos k mais proximos.
+    """
+    coords = np.array([[0.0, 0.0], [10.0, 0.0], [0.0, 10.0], [100.0, 100.0]])
+    indice = IndiceEspacial(coords, {"P": [10.0, 20.0, 30.0, 1000.0]}, geograficas=False)
+
+    resultado = indice.interpolar([[1.0, 1.0]], k=3, metodo="vizinhos")
+
+    assert resultado.loc[0, "P"] == pytest.approx(20.0)
+    assert resultado.loc[0, "distancia_vizinho"] == pytest.approx(np.sqrt(2))
+
+def test_grade_intensidade():
+    """
+    Com parametros iguais em todas as estacoes, o raster reproduz a equacao IDF.
+    """
+    coords, _ = _estacoes()
+    params = pd.DataFrame({"K": 900.0, "a": 0.15, "b": 12.0, "c": 0.8}, index=range(len(coords)))
+    indice = IndiceEspacial(coords, params)
+
+    eixo_x, eixo_y, grade = indice.grade_intensidade((-54, -30, -48, -24), 0.5, tr=25, duracao_min=60)
+
+    assert grade.shape == (12, 12)
+    assert eixo_y[0] > eixo_y[-1]
+    assert grade == pytest.approx(intensidade_equacao_idf(params.iloc[0], 25, 60))
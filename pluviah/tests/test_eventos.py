@@ -0,0 +1,81 @@
+# tests/test_eventos.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from eventos import segmentar_eventos, estatisticas_eventos, inferir_passo_h
+from gerador import gerar_serie
+
+def _serie(valores, freq="h", inicio="2020-01-01"):
+    indice = pd.date_range(inicio, periods=len(valores), freq=freq, name="datahora")
+    return pd.DataFrame({"precipitacao": np.asarray(valores, dtype=float)}, index=indice)
+
+def test_segmentacao_por_tempo_seco():
+    """
+    Dois blocos separados por 3 h secas formam um evento com intervalo de 6 h e dois com intervalo de 3 h.
+    """
+    df = _serie([0, 2, 5, 1, 0, 0, 0, 4, 0, 0, 0, 0, 0, 0, 0, 3])
+
+    eventos = segmentar_eventos(df, intervalo_seco_h=6)
+    assert len(eventos) == 2
+    primeiro = eventos.iloc[0]
+    assert primeiro["altura (mm)"] == pytest.approx(12.0)
+    assert primeiro["duracao (h)"] == pytest.approx(7.0)
+    assert primeiro["intensidade_pico (mm/h)"] == pytest.approx(5.0)
+    assert primeiro["tempo_pico (h)"] == pytest.approx(1.0)
+    assert primeiro["inicio"] == pd.Timestamp("2020-01-01 01:00")
+    assert primeiro["fim"] == pd.Timestamp("2020-01-01 08:00")
+    assert np.isnan(primeiro["seco_antecedente (h)"])
+    assert eventos.iloc[1]["seco_antecedente (h)"] == pytest.approx(7.0)
+
+    assert len(segmentar_eventos(df, intervalo_seco_h=3)) == 3
+
+def test_passo_subhorario_e_falhas():
+    """
+    Em registros de 10 min a intensidade de pico e altura / passo; registros ausentes contam como tempo seco.
+    """
+    df = _serie([1, 0, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 3], freq="10min")
+    assert inferir_passo_h(df.index) == pytest.approx(1 / 6)
+
+    eventos = segmentar_eventos(df, intervalo_seco_h=1)
+    assert len(eventos) == 2
+    assert eventos["intensidade_pico (mm/h)"].tolist() == pytest.approx([12.0, 18.0])
+    assert eventos.iloc[0]["duracao (h)"] == pytest.approx(0.5)
+
+    # Falha de 2 h no meio da serie horaria separa os eventos
+    df = _serie([1, 1, 1, 1])
+    df.index = df.index + pd.to_timedelta([0, 1, 4, 5], unit="h")
+    assert len(segmentar_eventos(df, intervalo_seco_h=2, passo_h=1)) == 2
+
+def test_equivale_a_varredura_sequencial():
+    """
+    Catalogo vetorizado deve coincidir com a segmentacao registro a registro em uma serie longa.
+    """
+    df = gerar_serie(5, semente=3)
+    eventos = segmentar_eventos(df, intervalo_seco_h=4, limiar_mm=0.2)
+
+    esperados, atual, seco = [], None, np.inf
+    for i, x in enumerate(df["precipitacao"].to_numpy()):
+        if x > 0.2:
+            if atual is None or seco >= 4:
+                atual = [i, i, 0.0]
+                esperados.append(atual)
+            atual[1], atual[2], seco = i, atual[2] + x, 0
+        else:
+            seco += 1
+
+    assert len(eventos) == len(esperados)
+    assert eventos["altura (mm)"].to_numpy() == pytest.approx([e[2] for e in esperados])
+    assert eventos["registros_chuvosos"].sum() == (df["precipitacao"] > 0.2).sum()
+
+def test_estatisticas_eventos():
+    """
+    Resumo traz eventos por ano (anos sem evento contam como zero) e as grandezas dos eventos.
+    """
+    df = _serie([5, 0, 0, 0, 0, 0, 0, 0, 3], freq="180D", inicio="2020-01-01")
+    resumo = estatisticas_eventos(segmentar_eventos(df, passo_h=1))
+
+    assert resumo.loc["eventos por ano", "máximo"] == 1
+    assert resumo.loc["altura (mm)", "média"] == pytest.approx(4.0)
+    assert resumo.loc["altura (mm)", "máximo"] == pytest.approx(5.0)
+    assert segmentar_eventos(_serie([0, 0, 0])).empty
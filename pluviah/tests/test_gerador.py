@@ -0,0 +1,59 @@
+# tests/test_gerador.py
+
+import numpy as np
+import pytest
+from gerador import _ocorrencia_markov, gerar_serie, gerar_estacoes, calibrar, salvar_csv, PARAMETROS_PADRAO
+from data_handler import load_data
+
+def _markov_sequencial(u, p01, p11):
+    """Referencia: cadeia de Markov simulada passo a passo."""
+    estados = np.zeros(u.shape, dtype=bool)
+    anterior = np.zeros(u.shape[0], dtype=bool)
+    for t in range(u.shape[1]):
+        anterior = np.where(anterior, u[:, t] < p11[t], u[:, t] < p01[t])
+        estados[:, t] = anterior
+    return estados
+
+@pytest.mark.parametrize("p01, p11", [(0.1, 0.7), (0.6, 0.3)])
+def test_ocorrencia_vetorizada_igual_a_sequencial(p01, p11):
+    """
+    A versao vetorizada deve reproduzir exatamente a simulacao passo a passo,
+    tanto com persistencia positiva (p11 > p01) quanto negativa.
+    """
+    u = np.random.default_rng(0).random((4, 500))
+    p01_t = np.full(500, p01)
+    p11_t = np.full(500, p11)
+
+    assert np.array_equal(_ocorrencia_markov(u, p01_t, p11_t), _markov_sequencial(u, p01_t, p11_t))
+
+def test_calibracao_recupera_probabilidades_de_transicao():
+    """
+    Calibrar uma serie longa gerada com parametros conhecidos deve recuperar p01 e p11.
+    """
+    serie = gerar_serie(100, semente=1)
+    parametros = calibrar(serie, limiar=1e-9)
+
+    assert parametros["p01"] == pytest.approx(PARAMETROS_PADRAO["p01"], rel=0.1)
+    assert parametros["p11"] == pytest.approx(PARAMETROS_PADRAO["p11"], rel=0.1)
+
+def test_saida_no_esquema_de_load_data(tmp_path):
+    """
+    O CSV gerado deve ser lido por load_data sem perdas de registros.
+    """
+    serie = gerar_serie(1, modelo="exponencial_mista", semente=2)
+    caminho = tmp_path / "sintetica.csv"
+    salvar_csv(serie, caminho)
+
+    df = load_data(caminho)
+    assert len(df) == len(serie)
+    assert df["precipitacao"].sum() == pytest.approx(serie["precipitacao"].sum(), rel=1e-3)
+
+def test_gerar_estacoes_formato_longo():
+    """
+    Cada estacao deve ter a serie completa no formato (station_id, datahora, precipitacao).
+    """
+    df = gerar_estacoes(3, 1, semente=3, estacoes_por_bloco=2)
+
+    assert list(df.columns) == ["station_id", "datahora", "precipitacao"]
+    assert df.groupby("station_id").size().tolist() == [8784, 8784, 8784]
+    assert (df["precipitacao"] >= 0).all()
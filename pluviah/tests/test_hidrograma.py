@@ -0,0 +1,76 @@
+# tests/test_hidrograma.py
+
+import numpy as np
+import pytest
+from idf import intensidade_equacao_idf
+from hidrograma import (
+    hietograma_blocos_alternados,
+    hietograma_chicago,
+    chuva_efetiva_scs,
+    hidrograma_unitario_scs,
+    convoluir,
+    hidrograma_projeto
+)
+
+PARAMS_IDF = {"K": 1200.0, "a": 0.15, "b": 12.0, "c": 0.8}
+
+@pytest.mark.parametrize("hietograma", [hietograma_blocos_alternados, hietograma_chicago])
+def test_hietograma_preserva_altura_total_da_idf(hietograma):
+    """
+    A soma dos blocos deve ser igual a altura IDF para a duracao total da chuva.
+    """
+    blocos = hietograma(PARAMS_IDF, 10, 120, 10)
+    altura_idf = intensidade_equacao_idf(PARAMS_IDF, 10, 120) * 120 / 60
+
+    assert blocos.shape == (1, 12)
+    assert blocos.sum() == pytest.approx(altura_idf)
+
+def test_blocos_alternados_pico_na_posicao_central():
+    """
+    O maior bloco fica na posicao do pico e e igual a altura IDF do primeiro intervalo.
+    """
+    blocos = hietograma_blocos_alternados(PARAMS_IDF, 25, 60, 5)[0]
+
+    assert np.argmax(blocos) == 6
+    assert blocos.max() == pytest.approx(intensidade_equacao_idf(PARAMS_IDF, 25, 5) * 5 / 60)
+
+def test_chuva_efetiva_scs_valor_conhecido():
+    """
+    Para P = 100 mm e CN = 80: S = 63.5 mm, Ia = 12.7 mm, Pe = 87.3² / 150.8 = 50.54 mm.
+    """
+    efetiva = chuva_efetiva_scs(np.array([[40.0, 60.0]]), CN=80)
+
+    assert efetiva.sum() == pytest.approx(50.54, rel=1e-3)
+
+def test_chuva_efetiva_scs_area_impermeavel():
+    """
+    Com CN = 100 (S = Ia = 0) toda a chuva escoa, inclusive com intervalos secos no inicio.
+    """
+    chuva = np.array([[0.0, 0.0, 5.0, 10.0, 0.0]])
+
+    assert chuva_efetiva_scs(chuva, CN=100) == pytest.approx(chuva)
+
+def test_convolucao_fft_igual_a_direta_e_conserva_volume():
+    """
+    A convolucao por FFT deve reproduzir np.convolve e o volume escoado deve igualar a chuva efetiva.
+    """
+    rng = np.random.default_rng(0)
+    pe = rng.uniform(0, 5, (3, 40))
+    uh = hidrograma_unitario_scs([1.0, 2.0, 4.0], [30.0, 30.0, 60.0], dt_min=5)
+
+    q = convoluir(pe, uh)
+
+    for k in range(3):
+        assert q[k] == pytest.approx(np.convolve(pe[k], uh[k]), abs=1e-9)
+    volume = q.sum(axis=1) * 5 * 60
+    assert volume == pytest.approx(pe.sum(axis=1) * 1000 * np.array([1.0, 2.0, 4.0]))
+
+def test_hidrograma_projeto_em_lote():
+    """
+    Bacias maiores e mais impermeaveis, com o mesmo Tc, devem ter vazao de pico maior.
+    """
+    resultado = hidrograma_projeto(PARAMS_IDF, 10, 180, 5, A_km2=[1.0, 1.0, 3.0], tc_min=40, CN=[70, 90, 90])
+
+    picos = resultado["vazao_pico_m3s"]
+    assert resultado["vazao_m3s"].shape[0] == 3
+    assert picos[0] < picos[1] < picos[2]
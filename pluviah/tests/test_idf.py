@@ -2,7 +2,8 @@
 
 import pandas as pd
 import pytest
-from idf import calculate_annual_maxima
+import numpy as np
+from idf import calculate_annual_maxima, ajustar_equacao_idf, intensidade_equacao_idf
 
 @pytest.fixture
 def serie_chuva_exemplo():
@@ -39,3 +40,16 @@ def test_maxima_anual_duracao_2h(serie_chuva_exemplo):
     # Somas móveis para 2021: [8, 23, 45]. Máximo é 45.
     assert maximas.loc[2020] == pytest.approx(35)
     assert maximas.loc[2021] == pytest.approx(45)
+
+def test_ajuste_equacao_idf_recupera_parametros():
+    """
+    Ajustar a equacao IDF a intensidades geradas por ela mesma deve recuperar K, a, b e c.
+    """
+    params = {"K": 1500.0, "a": 0.18, "b": 15.0, "c": 0.85}
+    duracoes, trs = np.meshgrid([10, 30, 60, 120, 360, 1440], [2, 10, 50, 100])
+    intensidades = intensidade_equacao_idf(params, trs.ravel(), duracoes.ravel())
+
+    ajustado = ajustar_equacao_idf(duracoes.ravel(), trs.ravel(), intensidades)
+
+    for chave in params:
+        assert ajustado[chave] == pytest.approx(params[chave], rel=1e-3)
@@ -0,0 +1,77 @@
+# tests/test_janela_movel.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import genextreme, kendalltau, theilslopes
+from idf import calculate_idf_curves
+from janela_movel import idf_janela_movel, mann_kendall_sen
+from regional import momentos_l
+
+def _maximas(semente=1, anos=range(1950, 2021)):
+    anos = np.asarray(anos)
+    x = genextreme.rvs(-0.1, loc=50 + 0.3 * (anos - anos[0]), scale=12, random_state=semente)
+    return pd.Series(x, index=anos)
+
+def test_lp3_igual_a_calculate_idf_curves():
+    """
+    Parametros e quantis LP3 de cada janela devem coincidir com o ajuste completo da janela.
+    """
+    maximas = _maximas().drop([1960, 1985])
+    tabela = idf_janela_movel(maximas, largura=30, trs=[10, 100])
+
+    for fim in (1979, 1990, 2014):
+        janela = maximas.loc[fim - 29:fim]
+        df_idf, _, params_lp3, *_ = calculate_idf_curves(janela, 24, np.array([10, 100]))
+        linha = tabela.loc[fim]
+        assert (linha["mean_log"], linha["std_log"], linha["skew_log"]) == pytest.approx(
+            (params_lp3["mean_log"], params_lp3["std_log"], params_lp3["skew"]))
+        assert linha["LP3_TR100 (mm)"] == pytest.approx(df_idf["LP3_24h (mm)"].iloc[1])
+        assert linha["n"] == len(janela)
+
+def test_momentos_l_incrementais():
+    """
+    Momentos-L atualizados por insercao ordenada devem ser iguais aos recalculados em cada janela.
+    """
+    maximas = _maximas(semente=4).drop([1955, 1970, 1971])
+    tabela = idf_janela_movel(maximas, largura=20, passo=3)
+    completa = maximas.reindex(range(1950, 2021)).to_numpy()
+
+    inicios = tabela["inicio"].to_numpy() - 1950
+    lm = momentos_l(np.stack([completa[k:k + 20] for k in inicios]))
+
+    np.testing.assert_allclose(tabela["l1"], lm["l1"])
+    np.testing.assert_allclose(tabela["l2"], lm["l2"])
+    np.testing.assert_allclose(tabela["t3"], lm["t3"])
+    assert tabela["gumbel_beta"].to_numpy() == pytest.approx(lm["l2"] / np.log(2))
+
+def test_mann_kendall_e_sen_vetorizados():
+    """
+    Mann-Kendall e Sen por linha devem coincidir com kendalltau e theilslopes do SciPy.
+    """
+    rng = np.random.default_rng(0)
+    matriz = rng.gamma(5, 10, (6, 25)) + np.arange(25) * np.array([0, 0.5, 1, 5, -1, 0])[:, None]
+
+    resultado = mann_kendall_sen(matriz)
+
+    for linha, x in zip(resultado.itertuples(), matriz):
+        tau = kendalltau(np.arange(25), x)
+        assert linha.mk_S == pytest.approx(tau.statistic * 25 * 24 / 2)
+        assert linha.mk_p == pytest.approx(tau.pvalue, abs=0.01)
+        assert linha.sen_inclinacao == pytest.approx(theilslopes(x).slope)
+    assert resultado.loc[3, "tendencia"] == "crescente"
+
+def test_matriz_de_series_com_tendencia():
+    """
+    Uma matriz series x anos gera uma tabela (serie, fim); janelas com poucos anos ficam NaN.
+    """
+    matriz = pd.DataFrame([_maximas(k).to_numpy() for k in range(3)], columns=range(1950, 2021))
+    matriz.loc[2, 1950:1975] = np.nan
+
+    tabela = idf_janela_movel(matriz, largura=30, tendencia=True)
+    unica = idf_janela_movel(matriz.loc[1], largura=30, tendencia=True)
+
+    assert tabela.index.names == ["serie", "fim"] and len(tabela) == 3 * 42
+    pd.testing.assert_frame_equal(tabela.loc[1], unica, check_names=False)
+    assert np.isnan(tabela.loc[(2, 1979), "Gumbel_TR100 (mm)"]) and np.isnan(tabela.loc[(2, 1979), "mk_p"])
+    assert tabela.loc[(2, 2020), "n"] == 30
@@ -5,8 +5,18 @@ from manning import (
     geom_trapezio,
     manning_Q,
     q_manning_circular_cheia,
-    dimensionar_conduto_circular
+    dimensionar_conduto_circular,
+    y_normal,
+    y_critico,
+    y_normal_vetor,
+    y_critico_vetor,
+    CurvaChave,
+    geom_circular_parcial,
+    y_circular_parcial,
+    verificar_condutos_parciais,
+    Q_REL_MAX
 )
+import numpy as np
 
 # --- Testes para Canais Abertos (Trapezoidal/Retangular) ---
 
@@ -132,3 +142,92 @@ def test_dimensionar_conduto_nao_encontrado():
 
     assert d_rec is None
     assert Q_calc is None
+
+# --- Testes para a Curva-Chave ---
+
+def test_curva_chave_concorda_com_bissecao():
+    """
+    Verifica se a profundidade interpolada na curva-chave respeita o limite de erro
+    em relacao a bissecao direta de y_normal.
+    """
+    b, z, S, n = 2.0, 1.5, 0.001, 0.015
+    curva = CurvaChave(b, z, S, n)
+    vazoes = np.array([0.05, 0.5, 3.0, 12.0, 40.0])
+
+    y_tab = curva.profundidade(vazoes)
+    y_ref = np.array([y_normal(q, b, z, S, n) for q in vazoes])
+
+    assert curva.erro_max <= 1e-4
+    assert np.all(np.abs(y_tab - y_ref) <= curva.limite_erro(vazoes) + 1e-5)
+
+def test_curva_chave_escalar_e_fora_da_faixa():
+    """
+    Consultas escalares retornam float; vazoes acima da tabela retornam None, como y_normal.
+    """
+    curva = CurvaChave(b=3.0, z=0.0, S=0.01, n=0.013, y_max=5.0)
+
+    assert isinstance(curva.profundidade(5.0), float)
+    assert curva.profundidade(curva.Q_max * 2) is None
+    assert np.isnan(curva.profundidade(np.array([curva.Q_max * 2]))[0])
+
+def test_curva_chave_tabela_exportada():
+    """
+    A tabela exportada deve ser monotona em y e Q e conter as grandezas hidraulicas.
+    """
+    tabela = CurvaChave(b=1.0, z=1.0, S=0.002, n=0.02, y_max=3.0).tabela()
+
+    assert list(tabela.columns) == ["y (m)", "Q (m³/s)", "A (m²)", "P (m)", "T (m)", "V (m/s)", "Froude"]
+    assert np.all(np.diff(tabela["y (m)"]) > 0)
+    assert np.all(np.diff(tabela["Q (m³/s)"]) > 0)
+
+# --- Testes para os Solucionadores Vetorizados ---
+
+def test_solucionadores_vetorizados_iguais_aos_escalares():
+    """
+    y_normal_vetor e y_critico_vetor devem reproduzir as versoes escalares para varias secoes.
+    """
+    Q = np.array([0.5, 5.0, 20.0])
+    b = np.array([1.0, 2.0, 4.0])
+    z = np.array([0.0, 1.5, 2.0])
+
+    yn = y_normal_vetor(Q, b, z, 0.001, 0.015)
+    yc = y_critico_vetor(Q, b, z)
+
+    assert yn == pytest.approx([y_normal(*a, 0.001, 0.015) for a in zip(Q, b, z)], abs=1e-5)
+    assert yc == pytest.approx([y_critico(*a) for a in zip(Q, b, z)], abs=1e-5)
+
+# --- Testes para Condutos Parcialmente Cheios ---
+
+def test_geom_circular_meia_secao():
+    """
+    Com lamina y = D/2, a area e metade da secao, P = pi*D/2 e T = D.
+    """
+    A, P, T = geom_circular_parcial(1.0, 0.5)
+
+    assert A == pytest.approx(np.pi / 8)
+    assert P == pytest.approx(np.pi / 2)
+    assert T == pytest.approx(1.0)
+
+def test_y_circular_parcial_meia_secao_e_cheia():
+    """
+    Em meia secao Q = Qcheia/2 (mesmo raio hidraulico); a lamina deve ser D/2.
+    Vazoes acima do maximo em conduto livre retornam NaN.
+    """
+    d, n, S = 0.5, 0.013, 0.01
+    Q_cheia = q_manning_circular_cheia(d, n, S)
+
+    assert y_circular_parcial(Q_cheia / 2, d, n, S) == pytest.approx(0.25, abs=1e-6)
+    assert np.isnan(y_circular_parcial(1.01 * Q_REL_MAX * Q_cheia, d, n, S))
+
+def test_verificacao_em_lote_consistente_com_manning():
+    """
+    A vazao recalculada por Manning com a lamina obtida deve reproduzir a vazao de entrada.
+    """
+    Q = np.array([0.02, 0.1, 0.3])
+    d = np.array([0.3, 0.4, 0.6])
+    tabela = verificar_condutos_parciais(Q, d, 0.013, 0.005)
+
+    for q, diam, y in zip(Q, d, tabela["y (m)"]):
+        A, P, _ = geom_circular_parcial(diam, y)
+        assert manning_Q(A, P, 0.005, 0.013) == pytest.approx(q, rel=1e-4)
+    assert (tabela["y/D"] < 1).all()
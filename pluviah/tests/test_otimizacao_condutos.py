@@ -0,0 +1,83 @@
+# tests/test_otimizacao_condutos.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from config import G, RHO
+from manning import verificar_condutos_parciais, geom_circular_parcial
+from otimizacao_condutos import otimizar_condutos, custo_trechos
+
+DIAMETROS = [0.3, 0.4, 0.5, 0.6, 0.8, 1.0]
+DECLIVIDADES = [0.001, 0.002, 0.005, 0.01, 0.02]
+
+def _forca_bruta(Q, L, St, n=0.013, v_min=0.6, v_max=5.0, tau_min=1.0, yd_max=0.75, cob=1.0, prof_max=5.0):
+    """Melhor opcao por varredura com as funcoes escalares de verificacao."""
+    melhor = (np.inf, None, None)
+    for d in DIAMETROS:
+        for S in DECLIVIDADES + ([St] if St > 0 else []):
+            v = verificar_condutos_parciais(Q, d, n, S).iloc[0]
+            y = v["y (m)"]
+            if np.isnan(y):
+                continue
+            A, P, _ = geom_circular_parcial(d, y)
+            tau = RHO * G * A / P * S
+            h_m = cob + d
+            h_j = h_m + L * (S - St)
+            if (v["y/D"] <= yd_max and v_min <= v["V (m/s)"] <= v_max and tau >= tau_min
+                    and h_j >= cob + d - 1e-9 and max(h_m, h_j) <= prof_max):
+                custo = float(custo_trechos(d, L, h_m, h_j))
+                if custo < melhor[0]:
+                    melhor = (custo, d, S)
+    return melhor
+
+def test_igual_a_varredura_escalar():
+    """
+    A avaliacao com broadcast deve escolher o mesmo diametro, declividade e custo da varredura escalar.
+    """
+    trechos = pd.DataFrame({"Q": [0.08, 0.4, 1.1, 0.25], "L": [60.0, 80.0, 45.0, 100.0],
+                            "S_terreno": [0.0, 0.006, 0.015, -0.004]})
+
+    resultado = otimizar_condutos(trechos, diametros=DIAMETROS, declividades=DECLIVIDADES)
+
+    for (_, t), (_, r) in zip(trechos.iterrows(), resultado.iterrows()):
+        custo, d, S = _forca_bruta(t["Q"], t["L"], t["S_terreno"])
+        assert r["viavel"]
+        assert (r["diametro (m)"], r["declividade (m/m)"]) == pytest.approx((d, S))
+        assert r["custo (R$)"] == pytest.approx(custo, rel=1e-6)
+
+def test_restricoes_atendidas_em_terreno_plano():
+    """
+    Em terreno plano, a velocidade e a tensao minimas exigem declividade, aprofundando a jusante.
+    """
+    trechos = {"Q": np.linspace(0.05, 1.5, 30), "L": np.full(30, 70.0), "S_terreno": np.zeros(30)}
+
+    resultado = otimizar_condutos(trechos)
+
+    assert resultado["viavel"].all()
+    assert (resultado["V (m/s)"] >= 0.6).all() and (resultado["V (m/s)"] <= 5.0).all()
+    assert (resultado["Tensão (Pa)"] >= 1.0).all() and (resultado["y/D"] <= 0.75).all()
+    assert (resultado["prof_jusante (m)"] > resultado["prof_montante (m)"]).all()
+    assert (resultado["prof_jusante (m)"] <= 5.0 + 1e-9).all()
+
+def test_modelo_de_custo_define_a_troca_diametro_declividade():
+    """
+    Escavacao cara favorece declividade menor com tubo maior; tubo caro favorece o contrario.
+    """
+    trecho = {"Q": [0.6], "L": [100.0], "S_terreno": [0.0]}
+
+    escavacao_cara = otimizar_condutos(trecho, custos={"escavacao_m3": 2000.0, "escoramento_m2": 0.0}).iloc[0]
+    tubo_caro = otimizar_condutos(trecho, custos={"tubo_coef": 50000.0}).iloc[0]
+    tabela = otimizar_condutos(trecho, custos={"tubo_por_diametro": {0.8: 100.0, 1.0: 90.0}}).iloc[0]
+
+    assert escavacao_cara["declividade (m/m)"] < tubo_caro["declividade (m/m)"]
+    assert escavacao_cara["diametro (m)"] > tubo_caro["diametro (m)"]
+    assert tabela["diametro (m)"] in (0.8, 1.0)
+
+def test_trecho_sem_opcao_viavel():
+    """
+    Vazao acima da capacidade do maior diametro resulta em viavel=False e NaN.
+    """
+    resultado = otimizar_condutos({"Q": [0.3, 80.0], "L": [50.0, 50.0], "S_terreno": [0.01, 0.01]})
+
+    assert resultado["viavel"].tolist() == [True, False]
+    assert resultado.loc[1, "opcoes_viaveis"] == 0 and np.isnan(resultado.loc[1, "custo (R$)"])
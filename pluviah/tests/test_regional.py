@@ -0,0 +1,78 @@
+# tests/test_regional.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import genextreme
+from regional import momentos_l, discordancia, gev_momentos_l, quantil_gev, analise_regional
+
+def _regiao(t, t3, n_estacoes=40, n_max=40, semente=0):
+    """Maximas sinteticas de uma regiao homogenea (GEV com L-CV t e L-assimetria t3)."""
+    rng = np.random.default_rng(semente)
+    n = rng.integers(10, n_max, n_estacoes)
+    indice = rng.uniform(20, 60, n_estacoes)
+    xi, alpha, k = gev_momentos_l(1.0, t, t3)
+    x = indice[:, None] * quantil_gev(xi, alpha, k, rng.random((n_estacoes, n_max)))
+    return np.where(np.arange(n_max) < n[:, None], x, np.nan)
+
+def test_momentos_l_com_preenchimento_nan():
+    """
+    Linhas completadas com NaN devem ter os mesmos momentos-L da amostra sem preenchimento.
+    """
+    amostra = np.array([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0])
+    matriz = np.array([np.append(amostra, [np.nan] * 4), np.arange(12.0)])
+
+    lm = momentos_l(matriz)
+    x = np.sort(amostra)
+    i, n = np.arange(1, 9), 8
+    b1 = np.sum((i - 1) / (n - 1) * x) / n
+
+    assert lm["n"].tolist() == [8, 12]
+    assert lm["l1"][0] == pytest.approx(x.mean())
+    assert lm["l2"][0] == pytest.approx(2 * b1 - x.mean())
+    assert lm["t3"][1] == pytest.approx(0.0, abs=1e-12)  # amostra simetrica
+
+def test_gev_por_momentos_l_recupera_parametros():
+    """
+    Para uma amostra grande, o ajuste por momentos-L deve recuperar a GEV geradora (k = c do SciPy).
+    """
+    y = genextreme.rvs(c=-0.1, loc=10.0, scale=3.0, size=200000, random_state=2)
+    lm = momentos_l(y)
+
+    xi, alpha, k = gev_momentos_l(lm["l1"], lm["l2"], lm["t3"])
+
+    assert (float(xi), float(alpha), float(k)) == pytest.approx((10.0, 3.0, -0.1), abs=0.05)
+
+def test_discordancia_identifica_estacao_atipica():
+    """
+    A soma dos Di e igual ao numero de estacoes, e uma estacao com razoes-L atipicas se destaca.
+    """
+    lm = momentos_l(_regiao(0.2, 0.15, n_estacoes=20))
+    t, t3, t4 = lm["t"].copy(), lm["t3"].copy(), lm["t4"].copy()
+    t[0], t3[0] = 0.6, 0.6
+
+    D = discordancia(t, t3, t4)
+
+    assert D.sum() == pytest.approx(20.0)
+    assert np.argmax(D) == 0 and D[0] > 3.0
+
+def test_analise_regional_heterogeneidade_e_quantis():
+    """
+    Regiao homogenea tem H1 baixo, mistura de regioes tem H1 alto e estacoes curtas recebem quantis.
+    """
+    homogenea = _regiao(0.2, 0.15)
+    mistura = np.vstack([homogenea[:20], _regiao(0.4, 0.15, semente=1)[:20]])
+    curta = homogenea.copy()
+    curta[0, 3:] = np.nan  # apenas 3 anos
+
+    resultado = analise_regional({1: pd.DataFrame(curta), 24: pd.DataFrame(mistura)},
+                                 trs=[10, 100], n_sim=200, semente=3)
+    regiao = resultado["regiao"].set_index("duracao")
+    quantis = resultado["quantis"]
+
+    assert regiao.loc[1, "H1"] < 2.0
+    assert regiao.loc[24, "H1"] > 2.0
+    estacao0 = quantis[(quantis["duracao"] == 1) & (quantis["estacao"] == 0)]
+    assert estacao0["precipitacao_mm"].to_numpy() == pytest.approx(
+        np.nanmean(curta[0]) * estacao0["fator_crescimento"].to_numpy())
+    assert np.isnan(resultado["estacoes"].loc[0, "t"])
@@ -0,0 +1,68 @@
+# tests/test_relatorio.py
+
+import re
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+import pytest
+from relatorio import gerar_html, grafico_idf_svg, exportar_html_lote
+
+@pytest.fixture
+def dados_relatorio():
+    """Estrutura dados_relatorio como montada pelo dashboard, sem imagem do grafico."""
+    trs = np.array([2, 5, 10, 25, 50, 100])
+    gumbel = 40 + 12 * -np.log(-np.log(1 - 1 / trs))
+    lp3 = gumbel * 1.05
+    df_idf = pd.DataFrame({
+        "TR (anos)": trs, "Gumbel_24h (mm)": gumbel, "LP3_24h (mm)": lp3,
+        "Intensidade_Gumbel_24h (mm/h)": gumbel / 24, "Intensidade_LP3_24h (mm/h)": lp3 / 24,
+    })
+    return {
+        "idf": {"df_idf": df_idf, "fig_path": None, "duracao": 24,
+                "params_gumbel": {"mu": 40.0, "beta": 12.0, "ks_p": 0.6},
+                "params_lp3": {"mean_log": 1.7, "std_log": 0.1, "skew": 0.2}, "comparacao": None},
+        "chuva_projeto": {"intensidade": 55.5, "chuva_total": 27.75},
+        "tc": {"tc_min": None},
+        "vazao": {"q_projeto": 1.234, "C": 0.6, "A": 7.4},
+        "conduto": {"diametro": None},
+        "canal": {"tipo": "Trapezoidal <b>", "yn": 0.8, "yc": 0.6, "regime": "Subcrítico"},
+    }
+
+def test_html_autocontido_com_svg(dados_relatorio):
+    """
+    O HTML deve trazer CSS embutido, grafico SVG valido e as tabelas, sem depender da imagem do Kaleido.
+    """
+    pagina = gerar_html(dados_relatorio)
+
+    assert pagina.startswith("<!DOCTYPE html>") and "<style>" in pagina
+    assert "<img" not in pagina and "<script" not in pagina and "<link" not in pagina
+    svg = ET.fromstring(re.search(r"<svg.*?</svg>", pagina, re.S).group(0))
+    assert len(svg.findall("{http://www.w3.org/2000/svg}polyline")) == 2
+    assert "Tabela de Precipitações e Intensidades" in pagina and "Vazão de Projeto (Q): 1.234 m³/s" in pagina
+    assert "Nenhum dimensionamento" not in pagina and "Trapezoidal &lt;b&gt;" in pagina
+
+def test_coordenadas_do_grafico(dados_relatorio):
+    """
+    Os pontos do SVG devem seguir a escala log em x e crescer (y menor) com o periodo de retorno.
+    """
+    svg = grafico_idf_svg(dados_relatorio["idf"]["df_idf"], 24)
+    pontos = re.search(r'<polyline points="([^"]+)"', svg).group(1).split()
+    xs, ys = np.array([[float(v) for v in p.split(",")] for p in pontos]).T
+
+    trs = dados_relatorio["idf"]["df_idf"]["TR (anos)"].to_numpy()
+    assert (xs - xs[0]) / (xs[-1] - xs[0]) == pytest.approx(np.log(trs / 2) / np.log(50), abs=1e-3)
+    assert np.all(np.diff(ys) < 0)
+
+def test_exportacao_em_lote(dados_relatorio, tmp_path):
+    """
+    A exportacao em lote grava um arquivo por relatorio, com o nome de cada um.
+    """
+    sem_idf = {k: v for k, v in dados_relatorio.items() if k != "idf"}
+
+    caminhos = exportar_html_lote({"bacia_a": dados_relatorio, "bacia_b": sem_idf}, tmp_path / "html")
+
+    assert [p.rsplit("/", 1)[-1] for p in caminhos] == ["Relatorio_PLUVIAH_bacia_a.html",
+                                                        "Relatorio_PLUVIAH_bacia_b.html"]
+    conteudo_b = open(caminhos[1], encoding="utf-8").read()
+    assert "<svg" not in conteudo_b and "Chuva Total (P): 27.75 mm" in conteudo_b
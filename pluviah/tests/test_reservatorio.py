@@ -0,0 +1,82 @@
+# tests/test_reservatorio.py
+
+import numpy as np
+import pytest
+from reservatorio import (
+    orificio, vertedor, vazao_estruturas, lago_prismatico, lago_tabela, tabelas_indicacao,
+    propagar_puls, resumo_propagacao, menor_lago_viavel, hidrograma_racional_modificado
+)
+
+def _puls_escalar(entrada, lago, dt_min):
+    """Puls modificado passo a passo com np.interp, como referencia."""
+    tabela = tabelas_indicacao(lago, dt_min * 60.0)
+    indicacao, saida = tabela["indicacao"][0], tabela["saida"][0]
+    resultado, psi = [0.0], 0.0
+    for t in range(len(entrada) - 1):
+        si = min(entrada[t] + entrada[t + 1] + psi, indicacao[-1])
+        resultado.append(np.interp(si, indicacao, saida))
+        psi = si - 2 * resultado[-1]
+    return np.array(resultado)
+
+def test_estruturas_de_saida():
+    """
+    Orificio (carga ate o centro) e vertedor retangular somam suas vazoes; abaixo das soleiras a saida e nula.
+    """
+    estruturas = [orificio(0.4, 0.0), vertedor(2.0, 1.5)]
+    Q = vazao_estruturas(estruturas, [0.1, 1.0, 2.0])
+
+    assert Q[0] == 0.0
+    assert Q[1] == pytest.approx(0.61 * np.pi * 0.04 * np.sqrt(2 * 9.81 * 0.8))
+    assert Q[2] == pytest.approx(0.61 * np.pi * 0.04 * np.sqrt(2 * 9.81 * 1.8) + 1.84 * 2.0 * 0.5**1.5)
+    with pytest.raises(ValueError):
+        vazao_estruturas([{"tipo": "comporta"}], 1.0)
+
+def test_volume_prismatico_e_por_areas():
+    """
+    O volume exato do lago prismatico deve coincidir com a integracao das areas do espelho d'agua.
+    """
+    lago = lago_prismatico(40.0, 20.0, 2.0, talude=2.0, n_cotas=401)
+    areas = (40.0 + 4.0 * lago["cotas"]) * (20.0 + 4.0 * lago["cotas"])
+    por_areas = lago_tabela(lago["cotas"], areas=areas)
+
+    assert lago["volumes"][-1] == pytest.approx(40 * 20 * 2 + 60 * 2 * 4 + 4 / 3 * 4 * 8)
+    assert por_areas["volumes"][-1] == pytest.approx(lago["volumes"][-1], rel=1e-5)
+
+def test_puls_igual_a_referencia_e_conserva_volume():
+    """
+    A propagacao em lote deve reproduzir o Puls passo a passo e conservar o volume afluente.
+    """
+    dt = 2.0
+    entradas = hidrograma_racional_modificado([3.0, 6.0], tc_min=20, duracao_min=60, dt_min=dt)
+    lagos = [lago_prismatico(L, L / 2, 3.0, 2.0, [orificio(0.5, 0.0), vertedor(3.0, 2.5)]) for L in (60.0, 150.0)]
+    r = propagar_puls(entradas, lagos, dt, duracao_extra_min=2000)
+
+    assert r["saida_m3s"].shape == (2, 2, len(r["tempo_min"]))
+    for k, lago in enumerate(lagos):
+        for c in range(2):
+            esperado = _puls_escalar(r["entrada_m3s"][c], lago, dt)
+            np.testing.assert_allclose(r["saida_m3s"][k, c], esperado, atol=1e-9)
+
+    assert not r["transbordou"][1].any()
+    afluente = entradas[1].sum() * dt * 60
+    efluente = r["saida_m3s"][1, 1].sum() * dt * 60 + r["volume_m3"][1, 1, -1]
+    assert efluente == pytest.approx(afluente, rel=1e-6)
+
+def test_dimensionamento_em_lote():
+    """
+    Entre varios lagos de tentativa, o menor viavel atende a vazao limite sem transbordar; os menores nao.
+    """
+    entradas = hidrograma_racional_modificado(np.array([4.0, 8.0]), tc_min=20, duracao_min=60, dt_min=2.0)
+    assert entradas.max(axis=1) == pytest.approx([4.0, 8.0])
+
+    lagos = [lago_prismatico(L, L / 2, 3.0, 2.0, [orificio(0.5, 0.0), vertedor(3.0, 2.5)])
+             for L in np.linspace(40, 200, 17)]
+    r = propagar_puls(entradas, lagos, 2.0, duracao_extra_min=240)
+    escolhido = menor_lago_viavel(r, vazao_max=2.0)
+    resumo = resumo_propagacao(r).set_index(["lago", "chuva"])
+
+    assert escolhido is not None and escolhido > 0
+    assert (resumo.loc[escolhido, "Q_saida_max (m³/s)"] <= 2.0).all()
+    assert (resumo.loc[escolhido - 1, "transbordou"] | (resumo.loc[escolhido - 1, "Q_saida_max (m³/s)"] > 2.0)).any()
+    assert (resumo["amortecimento (%)"] >= 0).all()
+    assert menor_lago_viavel(r, vazao_max=0.01) is None
@@ -0,0 +1,61 @@
+# tests/test_secao_irregular.py
+
+import numpy as np
+import pytest
+from manning import geom_trapezio, manning_Q, y_normal, y_critico
+from secao_irregular import SecaoIrregular
+
+# Trapezio b = 2, z = 1.5 e 3 m de altura descrito por pontos levantados
+ESTACOES_TRAP = [0.0, 4.5, 6.5, 11.0]
+COTAS_TRAP = [103.0, 100.0, 100.0, 103.0]
+
+# Canal principal com planicies de inundacao nas duas margens
+ESTACOES_COMPOSTA = [0, 0, 20, 20, 23, 25, 28, 28, 48, 48]
+COTAS_COMPOSTA = [5, 3, 2.5, 2, 0, 0, 2, 2.5, 3, 5]
+
+def test_geometria_igual_ao_trapezio():
+    """
+    Para uma secao levantada com forma trapezoidal, A, P e T devem coincidir com geom_trapezio.
+    """
+    secao = SecaoIrregular(ESTACOES_TRAP, COTAS_TRAP, n=0.015)
+    profundidades = np.array([0.3, 1.0, 2.5])
+
+    A, P, T = secao.geometria(profundidades)
+
+    for k, y in enumerate(profundidades):
+        assert (A[k], P[k], T[k]) == pytest.approx(geom_trapezio(2.0, 1.5, y))
+
+def test_vazao_e_profundidades_iguais_as_do_trapezio():
+    """
+    Vazao, profundidade normal e critica devem reproduzir as funcoes de manning.py.
+    """
+    secao = SecaoIrregular(ESTACOES_TRAP, COTAS_TRAP, n=0.015)
+    A, P, _ = geom_trapezio(2.0, 1.5, 1.2)
+
+    assert secao.vazao(1.2, 0.001) == pytest.approx(manning_Q(A, P, 0.001, 0.015))
+    assert secao.y_normal(5.0, 0.001) == pytest.approx(y_normal(5.0, 2.0, 1.5, 0.001, 0.015), abs=1e-5)
+    assert secao.y_critico(5.0) == pytest.approx(y_critico(5.0, 2.0, 1.5), abs=1e-5)
+
+def test_subdivisao_nao_altera_geometria_total():
+    """
+    As verticais de divisao nao sao perimetro molhado: A, P e T totais independem da subdivisao.
+    """
+    simples = SecaoIrregular(ESTACOES_COMPOSTA, COTAS_COMPOSTA, n=0.03)
+    composta = SecaoIrregular(ESTACOES_COMPOSTA, COTAS_COMPOSTA, n=[0.05, 0.02, 0.05], divisoes=[20, 28])
+    y = np.linspace(0.1, 4.5, 25)
+
+    for total_simples, total_composto in zip(simples.geometria(y), composta.geometria(y)):
+        assert total_composto == pytest.approx(total_simples)
+    assert composta.geometria(1.0)[2] == pytest.approx(5.0)  # apenas o canal principal
+
+def test_secao_composta_rugosidade_por_subsecao():
+    """
+    Planicies mais rugosas reduzem a vazao somente quando ha transbordamento.
+    """
+    lisa = SecaoIrregular(ESTACOES_COMPOSTA, COTAS_COMPOSTA, n=[0.02, 0.02, 0.02], divisoes=[20, 28])
+    rugosa = SecaoIrregular(ESTACOES_COMPOSTA, COTAS_COMPOSTA, n=[0.08, 0.02, 0.08], divisoes=[20, 28])
+
+    assert rugosa.vazao(1.5, 0.001) == pytest.approx(lisa.vazao(1.5, 0.001))
+    assert rugosa.vazao(3.5, 0.001) < lisa.vazao(3.5, 0.001)
+    y = rugosa.y_normal(np.array([5.0, 50.0, 120.0]), 0.001)
+    assert np.all(np.diff(y) > 0)
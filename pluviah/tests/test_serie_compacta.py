@@ -0,0 +1,62 @@
+# tests/test_serie_compacta.py
+
+import gc
+import pickle
+
+import numpy as np
+import pytest
+from gerador import gerar_serie
+from idf import calculate_annual_maxima
+from serie_compacta import SerieCompacta, RegistroSeries
+
+def test_serie_regular_guarda_apenas_inicio_e_passo():
+    """
+    Serie horaria regular: 4 bytes por registro, indice reconstruido igual e maximas preservadas.
+    """
+    df = gerar_serie(3, semente=5)
+    serie = SerieCompacta.de_dataframe(df)
+
+    assert serie.regular
+    assert serie.nbytes == 4 * len(df)
+    reconstruido = serie.para_dataframe()
+    assert reconstruido.index.equals(df.index)
+    np.testing.assert_allclose(
+        calculate_annual_maxima(reconstruido, 24), calculate_annual_maxima(df, 24), rtol=1e-5)
+
+def test_serie_com_falhas_mantem_indice_explicito():
+    """
+    Com lacunas no tempo, o indice int64 e mantido e reconstruido exatamente.
+    """
+    df = gerar_serie(1, semente=6)
+    df = df.drop(df.index[100:130])
+    serie = SerieCompacta.de_dataframe(df)
+
+    assert not serie.regular
+    assert serie.para_dataframe().index.equals(df.index)
+    copia = pickle.loads(pickle.dumps(serie))
+    assert copia.chave == serie.chave
+    assert not copia.valores.flags.writeable
+
+def test_registro_compartilha_conteudo_identico():
+    """
+    Duas sessoes com o mesmo conteudo usam a mesma copia; a serie sai do registro sem referencias.
+    """
+    registro = RegistroSeries()
+    df = gerar_serie(1, semente=7)
+    ref_a = registro.adquirir(df, "sessao_a")
+    ref_b = registro.adquirir(df.copy(), "sessao_b")
+
+    assert ref_a.serie is ref_b.serie
+    assert ref_a.dataframe() is ref_b.dataframe()
+    assert registro.referencias(ref_a.chave) == 2
+
+    memoria = registro.memoria_sessao({"serie": ref_a}).iloc[0]
+    assert memoria["compartilhado_com"] == 2
+    assert memoria["bytes_atribuidos"] == pytest.approx(memoria["bytes"] / 2)
+
+    ref_a.liberar()
+    ref_a.liberar()  # liberar de novo nao tem efeito
+    assert registro.referencias(ref_b.chave) == 1
+    del ref_b  # fim da sessao: a referencia coletada e liberada automaticamente
+    gc.collect()
+    assert registro.uso().empty
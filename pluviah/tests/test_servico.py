@@ -0,0 +1,179 @@
+# tests/test_servico.py
+
+import http.client
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+from manning import dimensionar_conduto_circular, dimensionar_conduto_circular_vetor, q_manning_circular_cheia
+import servico as modulo_servico
+from servico import ServicoPluviah
+
+@pytest.fixture
+def servico():
+    servico = ServicoPluviah(porta=0, processos=0, janela_ms=20.0).iniciar()
+    yield servico
+    servico.parar()
+
+def _post(servico, rota, corpo):
+    requisicao = urllib.request.Request(f"{servico.url}/{rota}", data=json.dumps(corpo).encode(),
+                                        headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(requisicao) as resposta:
+        return json.loads(resposta.read())
+
+def test_dimensionamento_vetorizado_igual_ao_iterativo():
+    """
+    A inversao da vazao a secao cheia deve escolher o mesmo diametro da busca iterativa.
+    """
+    rng = np.random.default_rng(3)
+    Q, n, S = rng.uniform(0.01, 4.0, 300), rng.uniform(0.010, 0.018, 300), rng.uniform(0.001, 0.05, 300)
+
+    d, q = dimensionar_conduto_circular_vetor(Q, n, S, 0.05, 3.0, 0.01)
+
+    for k in range(len(Q)):
+        d_ref, q_ref = dimensionar_conduto_circular(Q[k], n[k], S[k], 0.05, 3.0, 0.01)
+        assert d[k] == pytest.approx(d_ref)
+        assert q[k] == pytest.approx(q_ref)
+    assert np.isnan(dimensionar_conduto_circular_vetor(50.0, 0.013, 0.001, 0.05, 3.0, 0.01)[0])
+
+def test_dimensionamento_vetorizado_na_fronteira_da_grade():
+    """
+    Vazoes logo acima ou abaixo da capacidade a secao cheia de um diametro da grade devem dar o mesmo
+    diametro da busca iterativa (e nao NaN).
+    """
+    diametros = np.round(np.arange(0.05, 2.0, 0.01), 2)
+    for eps in (1e-12, -1e-12):
+        Q = np.array([q_manning_circular_cheia(d, 0.013, 0.01) for d in diametros]) * (1 + eps)
+        d, _ = dimensionar_conduto_circular_vetor(Q, 0.013, 0.01, 0.05, 3.0, 0.01)
+        esperado = [dimensionar_conduto_circular(q, 0.013, 0.01, 0.05, 3.0, 0.01)[0] for q in Q]
+        assert d == pytest.approx(esperado)
+
+def test_requisicoes_concorrentes_sao_agrupadas(servico):
+    """
+    Requisicoes simultaneas de dimensionamento devem ser resolvidas em menos lotes que requisicoes.
+    """
+    vazoes = np.linspace(0.1, 2.0, 16)
+    respostas = [None] * len(vazoes)
+    largada = threading.Barrier(len(vazoes))
+    agrupador = servico.agrupadores["conduto"]
+    funcao, atendidos = agrupador.funcao, [0]
+
+    def segurado(**campos):
+        # Segura o lote ate que todas as requisicoes estejam nele ou na fila
+        limite = time.monotonic() + 10.0
+        while atendidos[0] + len(campos["Q"]) + agrupador.fila.qsize() < len(vazoes) and time.monotonic() < limite:
+            time.sleep(0.001)
+        atendidos[0] += len(campos["Q"])
+        return funcao(**campos)
+
+    agrupador.funcao = segurado
+
+    def cliente(k):
+        largada.wait()
+        respostas[k] = _post(servico, "conduto", {"Q": vazoes[k], "n": 0.013, "S": 0.01})
+
+    threads = [threading.Thread(target=cliente, args=(k,)) for k in range(len(vazoes))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for Q, resposta in zip(vazoes, respostas):
+        d_ref, _ = dimensionar_conduto_circular(Q, 0.013, 0.01, 0.05, 3.0, 0.01)
+        assert resposta["diametro_m"] == pytest.approx(d_ref)
+    metricas = servico.metricas.resumo()["rotas"]["conduto"]
+    assert metricas["requisicoes"] == len(vazoes)
+    assert metricas["lotes"] <= 2
+
+def test_rotas_vetoriais_e_ajuste_idf(servico):
+    """
+    Listas retornam listas (null onde nao ha solucao) e o ajuste IDF devolve parametros por duracao.
+    """
+    resposta = _post(servico, "conduto", {"Q": [0.5, 100.0], "n": 0.013, "S": 0.01})
+    assert resposta["diametro_m"][1] is None
+    assert _post(servico, "vazao_racional", {"C": 0.8, "i_mm_h": 90.0, "A_ha": [1.0, 2.0]})["Q_m3s"] == \
+        pytest.approx([0.2, 0.4])
+
+    rng = np.random.default_rng(0)
+    maximas = {"1": (20 + 5 * rng.gumbel(size=30)).tolist(), "24": (60 + 15 * rng.gumbel(size=30)).tolist()}
+    idf = _post(servico, "idf", {"maximas": maximas, "trs": [2, 10, 100]})
+    assert idf["duracoes"]["1"]["gumbel"]["mu"] == pytest.approx(20, rel=0.2)
+    assert set(idf["equacao_idf"]) == {"K", "a", "b", "c"}
+
+def test_erros_de_requisicao(servico):
+    """
+    Campos ausentes retornam 400 e rotas desconhecidas 404, com mensagem em JSON.
+    """
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        _post(servico, "conduto", {"Q": 1.0})
+    assert erro.value.code == 400
+    assert "n, S" in json.loads(erro.value.read())["erro"]
+
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        _post(servico, "inexistente", {})
+    assert erro.value.code == 404
+
+def test_query_string_e_content_length_invalido(servico):
+    """
+    A query string nao altera a rota; Content-Length invalido da 400 e fecha a conexao, pois o corpo
+    nao lido corromperia a requisicao seguinte na mesma conexao.
+    """
+    with urllib.request.urlopen(f"{servico.url}/saude?x=1") as resposta:
+        assert json.loads(resposta.read()) == {"status": "ok"}
+    with urllib.request.urlopen(f"{servico.url}/metricas?") as resposta:
+        assert "rotas" in json.loads(resposta.read())
+    assert _post(servico, "vazao_racional?formato=json", {"C": 0.5, "i_mm_h": 72.0, "A_ha": 1.0})["Q_m3s"] == \
+        pytest.approx(0.1)
+
+    conexao = http.client.HTTPConnection(*servico.servidor.server_address[:2], timeout=5)
+    try:
+        conexao.putrequest("POST", "/conduto")
+        conexao.putheader("Content-Length", "abc")
+        conexao.endheaders(b'{"Q": 1.0, "n": 0.013, "S": 0.01}')
+        resposta = conexao.getresponse()
+        assert resposta.status == 400
+        assert "Content-Length" in json.loads(resposta.read())["erro"]
+        assert resposta.getheader("Connection") == "close"
+    finally:
+        conexao.close()
+
+def test_erros_internos_nao_viram_erros_do_cliente(servico, monkeypatch):
+    """
+    Campos ausentes sao validados explicitamente (400); excecoes internas, mesmo KeyError ou IndexError, dao 500.
+    """
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        _post(servico, "tc", {"metodos": ["kirpich"]})
+    assert erro.value.code == 400
+    assert "sub_bacias" in json.loads(erro.value.read())["erro"]
+
+    def falha(*args, **kwargs):
+        raise KeyError("coluna_interna")
+
+    monkeypatch.setattr(modulo_servico, "calcular_tc_lote", falha)
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        _post(servico, "tc", {"sub_bacias": [{"L_m": 1000.0, "S_m_m": 0.01}]})
+    assert erro.value.code == 500
+
+def test_requisicao_invalida_nao_derruba_o_lote():
+    """
+    Se a chamada do lote falha, cada requisicao e refeita sozinha e so a invalida recebe o erro.
+    """
+    def raiz(x):
+        if (x < 0).any():
+            raise ValueError("x negativo")
+        return {"raiz": np.sqrt(x)}
+
+    agrupador = modulo_servico._Agrupador("teste", raiz, modulo_servico._Metricas(), janela_s=0.2)
+    try:
+        valida = agrupador.submeter({"x": np.array([4.0, 9.0])})
+        invalida = agrupador.submeter({"x": np.array([-1.0])})
+        assert valida.result(5)["raiz"] == pytest.approx([2.0, 3.0])
+        with pytest.raises(ValueError):
+            invalida.result(5)
+    finally:
+        agrupador.parar()
+    assert agrupador.metricas.resumo()["rotas"]["teste"]["lotes"] == 1
@@ -0,0 +1,111 @@
+# tests/test_tarefas.py
+
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+from tarefas import GerenciadorTarefas, chave_tarefa, CONCLUIDA, CANCELADA, ERRO
+
+@pytest.fixture
+def gerenciador():
+    gerenciador = GerenciadorTarefas(max_workers=2)
+    yield gerenciador
+    gerenciador.encerrar()
+
+def test_tarefas_identicas_em_andamento_sao_deduplicadas(gerenciador):
+    """
+    Submeter a mesma chave duas vezes deve retornar a mesma tarefa e executar a funcao uma vez.
+    """
+    liberar = threading.Event()
+    chamadas = []
+
+    def calculo(tarefa, x):
+        chamadas.append(x)
+        liberar.wait(5)
+        return x * 2
+
+    t1 = gerenciador.submeter("a", calculo, 21)
+    t2 = gerenciador.submeter("a", calculo, 21)
+    liberar.set()
+
+    assert t1 is t2
+    assert t1.aguardar(5).estado == CONCLUIDA
+    assert t1.resultado == 42
+    assert chamadas == [21]
+
+def test_progresso_e_cancelamento_cooperativo(gerenciador):
+    """
+    A tarefa informa o progresso e para na proxima chamada de reportar apos o cancelamento.
+    """
+    em_execucao = threading.Event()
+    continuar = threading.Event()
+
+    def calculo(tarefa):
+        tarefa.reportar(0.5, "metade")
+        em_execucao.set()
+        continuar.wait(5)
+        tarefa.reportar(0.9, "quase")
+        return "nao deveria chegar aqui"
+
+    tarefa = gerenciador.submeter("b", calculo)
+    em_execucao.wait(5)
+    assert tarefa.progresso == 0.5 and tarefa.mensagem == "metade"
+
+    assert gerenciador.cancelar("b")
+    continuar.set()
+    assert tarefa.aguardar(5).estado == CANCELADA
+    assert tarefa.resultado is None
+    # Uma tarefa cancelada pode ser submetida de novo
+    assert gerenciador.submeter("b", lambda t: 1) is not tarefa
+
+def test_erro_fica_registrado_na_tarefa(gerenciador):
+    """
+    Excecoes da funcao nao se propagam: a tarefa termina com estado de erro.
+    """
+    def calculo(tarefa):
+        raise ValueError("serie curta")
+
+    tarefa = gerenciador.submeter("c", calculo).aguardar(5)
+
+    assert tarefa.estado == ERRO
+    assert isinstance(tarefa.erro, ValueError)
+    assert gerenciador.tabela()["estado"].tolist() == [ERRO]
+
+def test_chave_depende_do_conteudo_e_dos_parametros():
+    """
+    Dados identicos geram a mesma chave; mudar um valor ou parametro muda a chave.
+    """
+    idx = pd.date_range("2020-01-01", periods=48, freq="h")
+    df = pd.DataFrame({"precipitacao": np.arange(48.0)}, index=idx)
+    outro = df.copy()
+    outro.iloc[10, 0] = 99.0
+
+    assert chave_tarefa("idf", df, 24, np.array([2, 5])) == chave_tarefa("idf", df.copy(), 24, np.array([2, 5]))
+    assert chave_tarefa("idf", df, 24) != chave_tarefa("idf", outro, 24)
+    assert chave_tarefa("idf", df, 24) != chave_tarefa("idf", df, 12)
+
+def test_cancelar_retira_apenas_o_proprio_interesse(gerenciador):
+    """
+    Uma tarefa compartilhada por duas sessoes so e interrompida quando as duas cancelam.
+    """
+    continuar = threading.Event()
+
+    def calculo(tarefa):
+        continuar.wait(5)
+        tarefa.reportar(0.9)
+        return "ok"
+
+    tarefa = gerenciador.submeter("d", calculo, interessado="sessao_1")
+    assert gerenciador.submeter("d", calculo, interessado="sessao_2") is tarefa
+
+    assert not gerenciador.cancelar("d", interessado="sessao_1")
+    assert not tarefa.cancelamento_solicitado
+    assert gerenciador.cancelar("d", interessado="sessao_2")
+    continuar.set()
+    assert tarefa.aguardar(5).estado == CANCELADA
+
+    # Submissao anonima so e interrompida por cancelamento forcado
+    outra = gerenciador.submeter("e", lambda t: continuar.wait(5) and t.reportar(1.0))
+    assert not gerenciador.cancelar("e", interessado="sessao_1")
+    assert outra.aguardar(5).estado == CONCLUIDA
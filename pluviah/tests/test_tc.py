@@ -1,7 +1,14 @@
 # tests/test_tc.py
 
+import numpy as np
+import pandas as pd
 import pytest
-from tc import calcular_tc_kirpich, calcular_tc_giandotti
+from tc import (
+    calcular_tc_kirpich,
+    calcular_tc_giandotti,
+    calcular_tc_california,
+    calcular_tc_lote
+)
 
 # Usamos pytest.approx para lidar com a imprecisão de números de ponto flutuante (floats)
 # Testes para a fórmula de Kirpich
@@ -46,3 +53,40 @@ def test_giandotti_calculo_correto():
     tc_calculado = calcular_tc_giandotti(A_km2, L_km, deltaH_m)
     
     assert tc_calculado == pytest.approx(resultado_esperado, rel=1e-3)
+
+# Testes para o calculo vetorizado em lote
+def test_kirpich_vetorizado_igual_ao_escalar():
+    """
+    A chamada com arrays deve reproduzir as chamadas escalares, incluindo Tc = 0 para entradas invalidas.
+    """
+    L = np.array([1000, 500, 0, 2000])
+    i = np.array([0.01, 0.02, 0.01, 0.005])
+
+    resultado = calcular_tc_kirpich(L, i)
+
+    assert resultado == pytest.approx([calcular_tc_kirpich(a, b) for a, b in zip(L, i)])
+    assert resultado[2] == 0.0
+
+def test_california_equivale_a_kirpich():
+    """
+    A California Culverts Practice e a forma de Kirpich com L em km e desnivel H, logo os valores devem coincidir.
+    """
+    L_m, deltaH_m = 3000.0, 45.0
+    tc_california = calcular_tc_california(L_m / 1000.0, deltaH_m)
+    tc_kirpich = calcular_tc_kirpich(L_m, deltaH_m / L_m)
+
+    assert tc_california == pytest.approx(tc_kirpich, rel=1e-2)
+
+def test_lote_com_colunas_parciais():
+    """
+    Metodos sem as colunas necessarias sao ignorados e a tabela traz as estatisticas de comparacao.
+    """
+    sub_bacias = pd.DataFrame({"L_m": [1000.0, 2500.0], "deltaH_m": [10.0, 50.0], "A_km2": [0.8, 3.0]})
+
+    tabela = calcular_tc_lote(sub_bacias)
+
+    assert "Kirpich" in tabela.columns and "Dooge" in tabela.columns
+    assert "SCS Lag" not in tabela.columns  # exige CN
+    assert tabela.loc[0, "Kirpich"] == pytest.approx(calcular_tc_kirpich(1000.0, 0.01))
+    assert (tabela["Tc mínimo"] <= tabela["Tc médio"]).all()
+    assert (tabela["Tc médio"] <= tabela["Tc máximo"]).all()